@@ -0,0 +1,30 @@
+"""
+Benchmarks of the hot paths of QuerySetSequence (iterating, ordering across
+QuerySets and slicing) using the test models and synthetic data.
+
+Run them with ``python -m benchmarks`` (time) or ``python -m benchmarks.memory``
+(memory), see ``--help`` of each.
+
+"""
+import os
+from contextlib import contextmanager
+
+import django
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Configure Django with the test settings and create a test database (which is
+    destroyed afterwards). Yields the connection.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,100 @@
+"""
+Run the benchmarks and report the time and the rows per second of each case.
+
+The database is configured by the test settings: SQLite, or PostgreSQL if the
+POSTGRES_* environment variables are set. A test database is created (and
+destroyed) for the run.
+
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import benchmark_database
+
+
+def parse_args(argv, suite):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.strip().split("\n")[0]
+    )
+    parser.add_argument("--sources", type=int, nargs="+", default=suite.SOURCES)
+    parser.add_argument("--rows", type=int, nargs="+", default=suite.ROWS)
+    parser.add_argument(
+        "--ordering",
+        nargs="+",
+        choices=tuple(suite.ORDERINGS),
+        default=tuple(suite.ORDERINGS),
+    )
+    parser.add_argument(
+        "--iterable", nargs="+", choices=suite.ITERABLES, default=suite.ITERABLES
+    )
+    parser.add_argument(
+        "--slice", nargs="+", choices=suite.SLICES, default=suite.SLICES
+    )
+    parser.add_argument(
+        "--max-total-rows",
+        type=int,
+        default=suite.MAX_TOTAL_ROWS,
+        help="skip cases with more rows than this in total",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="report the fastest of this many runs"
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="only use 2 and 10 sources of 10 and 100 rows",
+    )
+    parser.add_argument("--json", metavar="PATH", help="also write the results here")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sources = [s for s in args.sources if s <= 10]
+        args.rows = [r for r in args.rows if r <= 100]
+    return args
+
+
+def main(argv=None):
+    with benchmark_database() as connection:
+        from benchmarks import suite
+
+        args = parse_args(argv, suite)
+        cases = suite.get_cases(
+            args.sources,
+            args.rows,
+            args.ordering,
+            args.iterable,
+            args.slice,
+            args.max_total_rows,
+        )
+
+        print(f"{connection.vendor}, {len(cases)} cases, best of {args.repeat}")
+        header = ("sources", "rows", "ordering", "iterable", "slice")
+        print(
+            "%7s %5s %-11s %-11s %-5s %10s %8s %12s"
+            % (*header, "time (ms)", "results", "rows/s")
+        )
+
+        results = []
+        for result in suite.run(cases, args.repeat):
+            case = result.case
+            rate = result.count / result.seconds if result.seconds else float("inf")
+            print(
+                "%7d %5d %-11s %-11s %-5s %10.2f %8d %12.0f"
+                % (*case, result.seconds * 1000, result.count, rate)
+            )
+            results.append(
+                {
+                    **case._asdict(),
+                    "seconds": result.seconds,
+                    "results": result.count,
+                    "rows_per_second": rate,
+                }
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"vendor": connection.vendor, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
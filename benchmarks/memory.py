@@ -0,0 +1,190 @@
+"""
+Measure the memory used by evaluating QuerySetSequences, using tracemalloc.
+
+For each case the peak memory (while evaluating) and the retained memory (held
+by the QuerySetSequence afterwards, e.g. the result cache) are reported per
+result. A report can be saved (--json) and compared with a previous one
+(--compare), e.g. across releases.
+
+"""
+import argparse
+import gc
+import itertools
+import json
+import platform
+import sys
+import tracemalloc
+from collections import namedtuple
+
+import django
+
+from benchmarks import benchmark_database
+
+# The total number of rows, split between the sources.
+ROWS = (100_000, 1_000_000)
+SOURCES = 10
+# Each mode is the ordering and whether iterator() is used.
+MODES = {
+    "cached": ((), False),
+    "iterator": ((), True),
+    "ordered": (("title",), False),
+    # Ordering by a field which values() / values_list() don't return.
+    "extra_order": (("id",), False),
+}
+ITERABLES = ("model", "values", "values_list", "flat")
+
+MemoryCase = namedtuple("MemoryCase", ["rows", "mode", "iterable"])
+MemoryResult = namedtuple("MemoryResult", ["case", "count", "peak", "retained"])
+
+
+def get_cases(rows=ROWS, modes=tuple(MODES), iterables=ITERABLES):
+    return [MemoryCase(*args) for args in itertools.product(rows, modes, iterables)]
+
+
+def make_sequence(case, sources=SOURCES):
+    """Create the (unevaluated) QuerySetSequence of a case."""
+    from benchmarks import suite
+
+    qss = suite.make_sequence(
+        suite.Case(sources, case.rows // sources, "none", case.iterable, "all")
+    )
+    ordering, _ = MODES[case.mode]
+    return qss.order_by(*ordering) if ordering else qss
+
+
+def measure(case, sources=SOURCES):
+    """
+    Evaluate the QuerySetSequence of a case, returns the number of results and
+    the peak and retained memory (in bytes).
+
+    The data of the case must already be loaded.
+    """
+    _, use_iterator = MODES[case.mode]
+    qss = make_sequence(case, sources)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        if use_iterator:
+            count = sum(1 for _ in qss.iterator())
+        else:
+            # Keep the results cached by the QuerySetSequence.
+            count = len(qss)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return MemoryResult(case, count, peak - baseline, current - baseline)
+
+
+def run(cases, sources=SOURCES):
+    """Run the cases, loading the data of each as needed. Yields the results."""
+    from benchmarks import suite
+
+    loaded = None
+    for case in cases:
+        if loaded != case.rows:
+            suite.load_data(sources, case.rows // sources)
+            loaded = case.rows
+        yield measure(case, sources)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.memory",
+        description=__doc__.strip().split("\n")[0],
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=ROWS)
+    parser.add_argument("--sources", type=int, default=SOURCES)
+    parser.add_argument("--mode", nargs="+", choices=tuple(MODES), default=tuple(MODES))
+    parser.add_argument("--iterable", nargs="+", choices=ITERABLES, default=ITERABLES)
+    parser.add_argument("--quick", action="store_true", help="only use 10,000 rows")
+    parser.add_argument("--json", metavar="PATH", help="also write the report here")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="compare with a report from --json"
+    )
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.rows = [10_000]
+    return args
+
+
+def _per_row(value, count):
+    return value / count if count else 0.0
+
+
+def _percent(new, old):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for result in json.load(f)["results"]:
+                key = (result["rows"], result["mode"], result["iterable"])
+                previous[key] = result
+
+    with benchmark_database() as connection:
+        cases = get_cases(args.rows, args.mode, args.iterable)
+        print(
+            f"{connection.vendor}, Django {django.get_version()}, Python "
+            f"{platform.python_version()}, {len(cases)} cases"
+        )
+        print(
+            "%8s %-11s %-11s %12s %12s %14s"
+            % ("rows", "mode", "iterable", "peak (MiB)", "peak/row", "retained/row")
+        )
+
+        results = []
+        for result in run(cases, args.sources):
+            case = result.case
+            peak = _per_row(result.peak, result.count)
+            retained = _per_row(result.retained, result.count)
+            line = "%8d %-11s %-11s %12.1f %12.1f %14.1f" % (
+                *case,
+                result.peak / 2**20,
+                peak,
+                retained,
+            )
+
+            # Show the change in peak and retained memory per row.
+            old = previous.get(tuple(case))
+            if old is not None:
+                line += " %+7.1f%% %+7.1f%%" % (
+                    _percent(peak, old["peak_per_row"]),
+                    _percent(retained, old["retained_per_row"]),
+                )
+            print(line)
+
+            results.append(
+                {
+                    **case._asdict(),
+                    "results": result.count,
+                    "peak": result.peak,
+                    "retained": result.retained,
+                    "peak_per_row": peak,
+                    "retained_per_row": retained,
+                }
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "vendor": connection.vendor,
+                    "django": django.get_version(),
+                    "python": platform.python_version(),
+                    "sources": args.sources,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+The benchmark cases and the synthetic data they run against.
+
+Each source is a QuerySet of the books or the articles (alternately) of one
+author. Titles are numbered such that ordering by title interleaves the results
+of every source.
+
+"""
+import itertools
+import time
+from collections import namedtuple
+
+from queryset_sequence import QuerySetSequence
+from tests.models import Article, Author, Book, PeriodicalPublisher
+
+# The number of QuerySets in the QuerySetSequence.
+SOURCES = (2, 10, 100, 500)
+# The number of rows of each QuerySet.
+ROWS = (10, 100, 1000)
+ORDERINGS = {
+    "none": (),
+    "#": ("#",),
+    "interleaved": ("title",),
+    "reversed": ("-title",),
+}
+ITERABLES = ("model", "values", "values_list", "flat")
+# Everything, the first page or a page half way through the results.
+SLICES = ("all", "first", "deep")
+PAGE_SIZE = 10
+# Cases with more rows than this in total are skipped.
+MAX_TOTAL_ROWS = 100_000
+
+Case = namedtuple("Case", ["sources", "rows", "ordering", "iterable", "slice"])
+Result = namedtuple("Result", ["case", "seconds", "count"])
+
+
+def get_cases(
+    sources=SOURCES,
+    rows=ROWS,
+    orderings=tuple(ORDERINGS),
+    iterables=ITERABLES,
+    slices=SLICES,
+    max_total_rows=MAX_TOTAL_ROWS,
+):
+    """Return the cases to run, grouped by the data they need."""
+    return [
+        Case(*args)
+        for args in itertools.product(sources, rows, orderings, iterables, slices)
+        if args[0] * args[1] <= max_total_rows
+    ]
+
+
+def load_data(sources, rows):
+    """Replace the data of the test models with the synthetic data."""
+    for model in (Book, Article, Author, PeriodicalPublisher):
+        model.objects.all().delete()
+
+    publisher = PeriodicalPublisher.objects.create(name="Publisher")
+    authors = Author.objects.bulk_create(
+        [Author(name="Author %d" % i) for i in range(sources)]
+    )
+
+    books = []
+    articles = []
+    for i, author in enumerate(authors):
+        for j in range(rows):
+            title = "%08d" % (j * sources + i)
+            if i % 2:
+                articles.append(
+                    Article(title=title, author=author, publisher=publisher)
+                )
+            else:
+                books.append(Book(title=title, author=author, pages=j % 1000))
+    Book.objects.bulk_create(books, batch_size=1000)
+    Article.objects.bulk_create(articles, batch_size=1000)
+
+
+def make_sequence(case):
+    """Create the (unevaluated) QuerySetSequence of a case."""
+    author_ids = Author.objects.order_by("pk").values_list("pk", flat=True)
+    qss = QuerySetSequence(
+        *[
+            (Article if i % 2 else Book).objects.filter(author_id=author_id)
+            for i, author_id in enumerate(author_ids)
+        ]
+    )
+
+    ordering = ORDERINGS[case.ordering]
+    if ordering:
+        qss = qss.order_by(*ordering)
+
+    if case.iterable == "values":
+        qss = qss.values("title")
+    elif case.iterable == "values_list":
+        qss = qss.values_list("title", "author_id")
+    elif case.iterable == "flat":
+        qss = qss.values_list("title", flat=True)
+
+    if case.slice == "first":
+        qss = qss[:PAGE_SIZE]
+    elif case.slice == "deep":
+        offset = case.sources * case.rows // 2
+        qss = qss[offset : offset + PAGE_SIZE]
+
+    return qss
+
+
+def run_case(case, repeat=3):
+    """
+    Evaluate the QuerySetSequence of a case, returns the fastest of the runs.
+
+    The data of the case must already be loaded.
+    """
+    best = None
+    for _ in range(repeat):
+        qss = make_sequence(case)
+        start = time.perf_counter()
+        count = len(list(qss))
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return Result(case, best, count)
+
+
+def run(cases, repeat=3):
+    """Run the cases, loading the data of each as needed. Yields the results."""
+    loaded = None
+    for case in cases:
+        if loaded != (case.sources, case.rows):
+            load_data(case.sources, case.rows)
+            loaded = (case.sources, case.rows)
+        yield run_case(case, repeat)
@@ -1,19 +1,43 @@
 import asyncio
+import copy
 import functools
+import heapq
 from collections import defaultdict
-from itertools import dropwhile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import chain, dropwhile, groupby, islice
 from operator import __not__, attrgetter, eq, ge, gt, itemgetter, le, lt, mul
 
 import django
+from asgiref.sync import sync_to_async
 from django.core.exceptions import (
+    FieldDoesNotExist,
     FieldError,
     MultipleObjectsReturned,
     ObjectDoesNotExist,
 )
-from django.db import connection, transaction
+from django.db import (
+    NotSupportedError,
+    connection,
+    connections,
+    router,
+    transaction,
+)
+from django.db.models import Q, Value
 from django.db.models.base import Model
 from django.db.models.constants import LOOKUP_SEP
-from django.db.models.query import EmptyQuerySet, QuerySet
+from django.db.models.deletion import Collector
+from django.db.models.query import EmptyQuerySet, QuerySet, prefetch_related_objects
+from django.db.models.utils import create_namedtuple_class
+
+from queryset_sequence.aggregates import combine_aggregates, split_aggregates
+from queryset_sequence.budget import get_budgets, query_budget
+from queryset_sequence.distinct import DISTINCT_MAX_IN_MEMORY, dedupe, dedupe_sorted
+from queryset_sequence.explain import explain_querysets
+from queryset_sequence.indexes import find_missing_indexes
+from queryset_sequence.signals import has_receivers, post_evaluate, pre_evaluate
+from queryset_sequence.sql_cache import cache_queryset_sql
+from queryset_sequence.stats import EvaluationStats, StatsRecorder, track_call
 
 # Only export the public API for QuerySetSequence. (Note that QuerySequence and
 # QuerySetSequenceModel are considered semi-public: the APIs probably won't
@@ -49,32 +73,298 @@ def multiply_iterables(it1, it2):
     return list(map(mul, it1, it2))
 
 
-def cumsum(seq):
-    s = 0
-    for c in seq:
-        s += c
-        yield s
+# The column the index of a QuerySet is returned as by the database. (Django
+# does not allow '#' to be used as an alias.)
+QUERYSET_INDEX_ALIAS = "_queryset_index"
+
+
+def annotate_queryset_index(qs, index):
+    """
+    Annotate a QuerySet with its index in a QuerySetSequence.
+
+    The database then returns the index as part of each row, as the
+    QUERYSET_INDEX_ALIAS field, which can also be used for database-side
+    filtering, ordering, etc.
+    """
+    return qs.annotate(**{QUERYSET_INDEX_ALIAS: Value(index)})
+
+
+def iterate_queryset(qs):
+    """
+    Iterate over the results of a QuerySet without caching them on it: the
+    QuerySets of a QuerySetSequence are shared between its clones, which must
+    each query the database. A QuerySet which was already evaluated (clones
+    never share those) is iterated from its results.
+    """
+    if qs._result_cache is not None:
+        yield from qs._result_cache
+    elif qs._prefetch_related_lookups:
+        results = list(qs._iterable_class(qs))
+        prefetch_related_objects(results, *qs._prefetch_related_lookups)
+        yield from results
+    else:
+        yield from qs._iterable_class(qs)
+
+
+@functools.lru_cache(maxsize=128)
+def build_model_index(models):
+    """
+    Map each model class to the positions of the models (a tuple) which are that
+    model or a subclass of it (e.g. a proxy model or a multi-table child).
+    """
+    index = defaultdict(list)
+    for position, model in enumerate(models):
+        for cls in model.__mro__:
+            if issubclass(cls, Model) and cls is not Model:
+                index[cls].append(position)
+    return {cls: tuple(positions) for cls, positions in index.items()}
+
+
+class _AnyField:
+    """Contains the name of every field, except the QuerySet index."""
+
+    def __contains__(self, field_name):
+        return field_name != "#"
+
+
+ANY_FIELD = _AnyField()
+
+
+def batched(seq, db):
+    """
+    Split a list of query parameters into batches small enough for the
+    database.
+    """
+    batch_size = connections[db].features.max_query_params or len(seq) or 1
+    for start in range(0, len(seq), batch_size):
+        yield seq[start : start + batch_size]
+
+
+def _get_forward_relation(model, name):
+    """
+    Return the field of the model called name if it is a forward many-to-one or
+    one-to-one relation (i.e. a ForeignKey or OneToOneField), otherwise None.
+    """
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field.concrete and (field.many_to_one or field.one_to_one):
+        return field
+    return None
+
+
+def _prefetch_forward_relations(instances_by_field):
+    """
+    Fetch the related objects of many-to-one and one-to-one relations across
+    models at once.
+
+    The instances are grouped by the model (and database) they point to, so
+    that each related model is queried once (per batch of values) instead of
+    once per source model. Each related object is shared between all instances
+    which point to it.
+
+    Returns the list of (unique) related objects.
+    """
+    # The values to fetch for each related model, target field and database.
+    wanted = defaultdict(set)
+    for field, instances in instances_by_field.items():
+        target = field.target_field
+        for obj in instances:
+            if field.is_cached(obj):
+                continue
+            value = getattr(obj, field.attname)
+            if value is not None:
+                wanted[(field.related_model, target.attname, obj._state.db)].add(value)
+
+    fetched = {}
+    for (related_model, attname, db), values in wanted.items():
+        manager = related_model._base_manager.db_manager(db)
+        for batch in batched(list(values), db):
+            qs = manager.filter(**{attname + "__in": batch}).order_by()
+            for rel_obj in qs:
+                fetched[
+                    (related_model, attname, db, getattr(rel_obj, attname))
+                ] = rel_obj
+
+    related = {}
+    for field, instances in instances_by_field.items():
+        attname = field.target_field.attname
+        for obj in instances:
+            if field.is_cached(obj):
+                rel_obj = field.get_cached_value(obj)
+            else:
+                rel_obj = fetched.get(
+                    (
+                        field.related_model,
+                        attname,
+                        obj._state.db,
+                        getattr(obj, field.attname),
+                    )
+                )
+                field.set_cached_value(obj, rel_obj)
+                # A one-to-one relation can also be followed backwards.
+                if rel_obj is not None and field.one_to_one:
+                    field.remote_field.set_cached_value(rel_obj, obj)
+
+            if rel_obj is not None:
+                related[id(rel_obj)] = rel_obj
+
+    return list(related.values())
+
+
+def share_related_objects(obj, identity_map):
+    """
+    Replace the related objects cached on an instance (e.g. by select_related())
+    with the instance already in the identity map for that model and primary
+    key, or register them if there is none.
+
+    The identity_map is a dictionary of (concrete model, primary key) to
+    instance, shared between all of the instances of an evaluation. Only the
+    related objects are registered, not the instance itself: the identity map
+    grows with the distinct related objects, not with every result (e.g. of
+    iterator()).
+    """
+    # Avoid creating the cache for instances without any related objects.
+    fields_cache = obj._state.__dict__.get("fields_cache")
+    if not fields_cache:
+        return
+
+    for name, rel_obj in fields_cache.items():
+        if not isinstance(rel_obj, Model) or rel_obj.pk is None:
+            continue
+
+        key = (rel_obj._meta.concrete_model, rel_obj.pk)
+        shared = identity_map.get(key)
+        if shared is None:
+            # The first time this object is seen, also share the objects
+            # related to it.
+            identity_map[key] = rel_obj
+            share_related_objects(rel_obj, identity_map)
+        elif shared is not rel_obj:
+            fields_cache[name] = shared
+
+
+def prefetch_related_objects_across_models(instances, *lookups):
+    """
+    Like Django's prefetch_related_objects, but the instances can be of
+    different models.
+
+    Lookups which start with a many-to-one or one-to-one relation are fetched
+    once per related model (instead of once per model of the instances) and the
+    remainder of the lookup is applied to the related objects. Any other lookup
+    (e.g. many-to-many, reverse relations or Prefetch objects) is handled by
+    Django for each model separately.
+    """
+    instances_by_model = defaultdict(list)
+    for obj in instances:
+        instances_by_model[type(obj)].append(obj)
+
+    for lookup in lookups:
+        # The models where the lookup must be handled by Django.
+        other_models = list(instances_by_model)
+
+        if isinstance(lookup, str):
+            through_attr, _, remainder = lookup.partition(LOOKUP_SEP)
+
+            instances_by_field = {}
+            for model in list(other_models):
+                field = _get_forward_relation(model, through_attr)
+                if field is not None:
+                    instances_by_field[field] = instances_by_model[model]
+                    other_models.remove(model)
+
+            if instances_by_field:
+                related = _prefetch_forward_relations(instances_by_field)
+                if remainder and related:
+                    prefetch_related_objects_across_models(related, remainder)
+
+        for model in other_models:
+            prefetch_related_objects(instances_by_model[model], lookup)
 
 
 class BaseIterable:
-    def __init__(self, querysetsequence):
+    def __init__(
+        self, querysetsequence, chunked_fetch=False, chunk_size=None, stats=None
+    ):
         # Create a clone so that subsequent calls to iterate are kept separate.
-        self._querysets = querysetsequence._querysets
+        self._querysets = list(querysetsequence._querysets)
         self._queryset_idxs = querysetsequence._queryset_idxs
         self._order_by = querysetsequence._order_by
         self._standard_ordering = querysetsequence._standard_ordering
         self._low_mark = querysetsequence._low_mark
         self._high_mark = querysetsequence._high_mark
+        # Whether to stream results from each QuerySet (see iterator()).
+        self._chunked_fetch = chunked_fetch
+        self._chunk_size = chunk_size
+        # The fields to remove duplicates by (empty for the entire result), or
+        # None if not distinct.
+        self._distinct_fields = querysetsequence._distinct_fields
+        self._distinct_max_in_memory = querysetsequence._distinct_max_in_memory
+        # The fields the results are ordered by, as given.
+        self._result_order_by = [f.lstrip("-") for f in querysetsequence._order_by]
+        # The statistics of this evaluation, if collected (see collect_stats()).
+        self._stats = stats
 
     @staticmethod
     def _get_fields(obj, *field_names):
         """Retrieve the values of fields from the object."""
         raise NotImplementedError()
 
-    def _add_queryset_index(self, obj, value):
-        """Add the QuerySet index to the object and return the object."""
+    def _get_field_getter(self, field_name):
+        """
+        Return a callable which retrieves the value of a (non-'#') field from a
+        row, as returned by the underlying QuerySets.
+        """
+        raise NotImplementedError()
+
+    def _get_projection(self):
+        """
+        Return a callable which converts a row returned by the underlying
+        QuerySets (and the index of that QuerySet) into the value to yield.
+
+        This is computed once, before iterating. If the rows can be returned
+        as-is, None is returned and the rows are not touched at all.
+        """
+        raise NotImplementedError()
+
+    def _get_result_getter(self, field_names):
+        """
+        Return a callable which retrieves the values of fields from a result, as
+        yielded.
+        """
+        raise NotImplementedError()
+
+    def _get_identity_key(self):
+        """
+        Return a tuple of a callable which returns the key identifying a result
+        and the names of the fields which are equal for results with the same
+        key.
+        """
         raise NotImplementedError()
 
+    def _get_distinct_key(self):
+        """
+        Return the key to remove duplicate results by, see _get_identity_key().
+
+        Returns None if duplicates cannot occur across QuerySets.
+        """
+        if self._distinct_fields:
+            return self._get_result_getter(self._distinct_fields), set(
+                self._distinct_fields
+            )
+        return self._get_identity_key()
+
+    def _iter_queryset(self, qs, i):
+        """Return an iterator over the rows of one of the QuerySets."""
+        if self._chunked_fetch:
+            rows = qs.iterator(self._chunk_size)
+        else:
+            rows = iterate_queryset(qs)
+        if self._stats is not None:
+            return self._stats.track_iterator(i, qs, rows)
+        return iter(rows)
+
     @classmethod
     def _get_field_names(cls, model):
         """Return a list of field names that are part of a model."""
@@ -90,6 +380,10 @@ class BaseIterable:
             2. Order by the model's primary key, if there is no Meta.ordering.
 
         """
+        # The same (e.g. shared related) object is always equal to itself.
+        if value1 is value2:
+            return 0
+
         if isinstance(value1, Model) and isinstance(value2, Model):
             field_names = value1._meta.ordering
 
@@ -160,39 +454,78 @@ class BaseIterable:
 
         return comparator
 
+    def _generate_entry_comparator(self):
+        """
+        Construct a comparator for the (iterable, QuerySet index, row) entries
+        used by _ordered_iterator.
+
+        The '#' field is compared using the QuerySet index of the entry, while
+        other fields are read from the row with getters built up front. This
+        allows rows to be compared before (or without) being projected.
+        """
+        getters = []
+        reverses = []
+        for field_name in self._order_by:
+            if field_name[0] == "-":
+                reverses.append(-1)
+                field_name = field_name[1:]
+            else:
+                reverses.append(1)
+
+            if field_name == "#":
+                getters.append(itemgetter(1))
+            else:
+                getter = self._get_field_getter(field_name)
+                getters.append(lambda entry, getter=getter: getter(entry[2]))
+
+        fields = list(zip(getters, reverses))
+        _cmp = self._cmp
+
+        def comparator(entry_1, entry_2):
+            for getter, reverse in fields:
+                result = _cmp(getter(entry_1), getter(entry_2))
+                # The first non-zero comparison decides the order.
+                if result:
+                    return result * reverse
+
+            # Everything was equivalent.
+            return 0
+
+        return comparator
+
     def _ordered_iterator(self):
         """
         Interleave the values of each QuerySet in order to handle the requested
-        ordering. Also adds the '#' property to each returned item.
+        ordering.
         """
+        project = self._project
+
         # A list of tuples, each with:
         #   * The iterable
         #   * The QuerySet number
-        #   * The next value
+        #   * The next value (as returned by the QuerySet)
         #
         # (Remember that each QuerySet is already sorted.)
         iterables = []
         for i, qs in zip(self._queryset_idxs, self._querysets):
-            it = iter(qs)
+            # No QuerySet can contribute more than high_mark values.
+            if self._high_mark is not None:
+                qs = qs[: self._high_mark]
+            it = self._iter_queryset(qs, i)
             try:
                 value = next(it)
             except StopIteration:
                 # If this is already empty, just skip it.
                 continue
-            # Set the QuerySet number so that the comparison works properly.
-            value = self._add_queryset_index(value, i)
             iterables.append((it, i, value))
 
         # The offset of items returned.
         index = 0
 
         # Create a comparison function based on the requested ordering.
-        _comparator = self._generate_comparator(self._order_by)
-
-        def comparator(tuple_1, tuple_2):
-            # The last element in each tuple is the actual item to compare.
-            return _comparator(tuple_1[2], tuple_2[2])
-
+        comparator = self._generate_entry_comparator()
+        if self._stats is not None:
+            comparator = self._stats.track_comparator(comparator)
         comparator = functools.cmp_to_key(comparator)
 
         # If in reverse mode, get the last value instead of the first value from
@@ -215,9 +548,10 @@ class BaseIterable:
             else:
                 it, i, value = iterables[0]
 
-            # Return the next value if we're within the slice of interest.
+            # Return the next value if we're within the slice of interest. Only
+            # values which are returned need to be projected.
             if self._low_mark <= index:
-                yield value
+                yield value if project is None else project(value, i)
             index += 1
             # We've left the slice of interest, we're done.
             if index == self._high_mark:
@@ -226,39 +560,116 @@ class BaseIterable:
             # Iterate the iterable that just lost a value.
             try:
                 value = next(it)
-                # Set the QuerySet number so that the comparison works properly.
-                value = self._add_queryset_index(value, i)
                 iterables[next_value_ind] = it, i, value
             except StopIteration:
                 # This iterator is done, remove it.
                 del iterables[next_value_ind]
 
     def _unordered_iterator(self):
+        """Return the value of each QuerySet, one QuerySet after another."""
+        project = self._project
+        for i, qs in zip(self._queryset_idxs, self._querysets):
+            if project is None:
+                yield from self._iter_queryset(qs, i)
+            else:
+                for item in self._iter_queryset(qs, i):
+                    yield project(item, i)
+
+    def _sliced_iterator(self):
         """
-        Return the value of each QuerySet, but also add the '#' property to each
-        return item.
+        Return the values within the slice of each QuerySet, one QuerySet after
+        another.
+
+        QuerySets are only counted until the start of the slice is reached and
+        are only queried until the end of the slice is reached.
         """
+        project = self._project
+        low_mark, high_mark = self._low_mark, self._high_mark
         for i, qs in zip(self._queryset_idxs, self._querysets):
-            for item in qs:
-                yield self._add_queryset_index(item, i)
+            if high_mark is not None and high_mark <= low_mark:
+                return
+
+            # Skip any QuerySets which are entirely before the slice.
+            if low_mark:
+                count = track_call(self._stats, i, qs, qs.count)
+                if count <= low_mark:
+                    low_mark -= count
+                    if high_mark is not None:
+                        high_mark -= count
+                    continue
+
+            fetched = 0
+            for item in self._iter_queryset(qs[low_mark:high_mark], i):
+                fetched += 1
+                yield item if project is None else project(item, i)
+
+            # Everything before the slice was skipped by this QuerySet.
+            if high_mark is not None:
+                high_mark -= low_mark + fetched
+            low_mark = 0
+
+    def _distinct_iterator(self, key, key_fields):
+        """Remove duplicate results across the QuerySets, then apply the slice."""
+        low_mark, high_mark = self._low_mark, self._high_mark
+        self._low_mark, self._high_mark = 0, None
+        results = self._iterate()
+
+        # If ordered by (some of) the fields of the key, duplicates are next to
+        # each other and only need to be compared to results with the same values
+        # of those fields. Otherwise, every key must be remembered.
+        run_fields = []
+        for field_name in self._result_order_by:
+            if field_name not in key_fields:
+                break
+            run_fields.append(field_name)
+
+        if run_fields:
+            self._add_strategy("distinct-sorted")
+            results = dedupe_sorted(results, key, self._get_result_getter(run_fields))
+        else:
+            self._add_strategy("distinct-hashed")
+            results = dedupe(results, key, self._distinct_max_in_memory)
+
+        return islice(results, low_mark, high_mark)
 
     def __iter__(self):
         # If there's no QuerySets, just return an empty iterator.
         if not len(self._querysets):
             return iter([])
 
+        if self._distinct_fields is not None:
+            distinct_key = self._get_distinct_key()
+            if distinct_key is not None:
+                return self._distinct_iterator(*distinct_key)
+
+        return self._iterate()
+
+    def _add_strategy(self, strategy):
+        """Record how the results are produced, if collecting statistics."""
+        if self._stats is not None:
+            self._stats.strategies.append(strategy)
+
+    def _iterate(self):
+
+        # Figure out how to convert rows before any are fetched.
+        self._project = self._get_projection()
+        if self._stats is not None:
+            self._project = self._stats.track_projection(self._project)
+
         # If order is necessary, evaluate and start feeding data back.
         if self._order_by:
             # If the first element of order_by is '#', this means first order by
             # QuerySet. If it isn't this, then returned the interleaved
             # iterator.
             if self._order_by[0].lstrip("-") != "#":
+                self._add_strategy("ordered")
                 return self._ordered_iterator()
 
             # Otherwise, order by QuerySet first. Handle reversing the
             # QuerySets, if necessary.
             elif self._order_by[0].startswith("-"):
                 self._querysets = self._querysets[::-1]
+                self._queryset_idxs = self._queryset_idxs[::-1]
 
         # If there is no ordering, or the ordering is specific to each QuerySet,
         # evaluation can be pushed off further.
@@ -266,190 +677,195 @@ class BaseIterable:
         # If there is no slicing, iterate through each QuerySet. This avoids
         # calling count() on each QuerySet.
         if self._low_mark == 0 and self._high_mark is None:
+            self._add_strategy("unordered")
             return self._unordered_iterator()
 
-        # First trim any QuerySets based on the currently set limits!
-        counts = [0]
-        counts.extend(cumsum([it.count() for it in self._querysets]))
+        self._add_strategy("sliced")
+        return self._sliced_iterator()
 
-        # Trim the beginning of the QuerySets, if necessary.
-        start_index = 0
-        low_mark, high_mark = self._low_mark, self._high_mark
-        if low_mark != 0:
-            # Convert a negative index into a positive.
-            if low_mark < 0:
-                low_mark += counts[-1]
-
-            # Find the point when low_mark crosses a threshold.
-            for i, offset in enumerate(counts):
-                if offset <= low_mark:
-                    start_index = i
-                if low_mark < offset:
-                    break
 
-        # Trim the end of the QuerySets, if necessary.
-        end_index = len(self._querysets)
-        if high_mark is None:
-            # If it was unset (meaning all), set it to the maximum.
-            high_mark = counts[-1]
-        elif high_mark:
-            # Convert a negative index into a positive.
-            if high_mark < 0:
-                high_mark += counts[-1]
-
-            # Find the point when high_mark crosses a threshold.
-            for i, offset in enumerate(counts):
-                if high_mark <= offset:
-                    end_index = i
-                    break
+class ModelIterable(BaseIterable):
+    def __init__(self, querysetsequence, **kwargs):
+        super().__init__(querysetsequence, **kwargs)
 
-        # Remove QuerySets we don't care about.
-        self._querysets = self._querysets[start_index:end_index]
-        self._queryset_idxs = self._queryset_idxs[start_index:end_index]
+        # Related objects are shared between the instances of this iteration,
+        # see QuerySetSequence.identity_map().
+        self._identity_map = {} if querysetsequence._identity_map else None
 
-        # The low_mark needs the removed QuerySets subtracted from it.
-        low_mark -= counts[start_index]
-        # The high_mark needs the count of all QuerySets before it subtracted
-        # from it.
-        high_mark -= counts[end_index - 1]
+    @staticmethod
+    def _get_fields(obj, *field_names):
+        return attrgetter(*field_names)(obj)
 
-        # Apply the offsets to the edge QuerySets (apply the high mark first
-        # in-case there's only a single QuerySet left).
-        self._querysets[-1] = self._querysets[-1][:high_mark]
-        self._querysets[0] = self._querysets[0][low_mark:]
+    def _get_field_getter(self, field_name):
+        return attrgetter(field_name.replace(LOOKUP_SEP, "."))
 
-        # For anything left, just iterate through each QuerySet.
-        return self._unordered_iterator()
+    def _get_result_getter(self, field_names):
+        return attrgetter(*[f.replace(LOOKUP_SEP, ".") for f in field_names])
 
+    def _get_identity_key(self):
+        def key(obj):
+            return obj._meta.concrete_model, obj.pk
 
-class ModelIterable(BaseIterable):
-    @staticmethod
-    def _get_fields(obj, *field_names):
-        return attrgetter(*field_names)(obj)
+        # Every field of the same instance is equal.
+        return key, ANY_FIELD
 
-    def _add_queryset_index(self, obj, value):
-        # For models, always add the QuerySet index.
-        setattr(obj, "#", value)
-        return obj
+    def _get_distinct_key(self):
+        if self._distinct_fields:
+            return super()._get_distinct_key()
+
+        # Each QuerySet is distinct, so instances can only be repeated if
+        # multiple QuerySets return the same (concrete) model.
+        models = {qs.model._meta.concrete_model for qs in self._querysets}
+        if len(models) == len(self._querysets):
+            return None
+        return self._get_identity_key()
+
+    def _get_projection(self):
+        identity_map = self._identity_map
+
+        def project(obj, value):
+            # For models, always add the QuerySet index.
+            setattr(obj, "#", value)
+            if identity_map is not None:
+                # Drop any duplicate related objects as soon as possible.
+                share_related_objects(obj, identity_map)
+            return obj
+
+        return project
 
 
 class ValuesIterable(BaseIterable):
-    def __init__(self, querysetsequence):
-        super().__init__(querysetsequence)
+    def __init__(self, querysetsequence, **kwargs):
+        super().__init__(querysetsequence, **kwargs)
 
         self._fields = querysetsequence._fields
         # If no fields are specified (or if '#' is explicitly specified) include
         # the QuerySet index.
         self._include_qs_index = not self._fields or "#" in self._fields
-        self._remove_fields = False
+        # Any fields which are fetched only for ordering.
+        self._extra_fields = []
 
         # If there are any "order_by" fields which are *not* the fields to be
-        # returned, they also need to be captured.
-        if self._order_by:
-            qss_fields, std_fields = querysetsequence._separate_fields(*self._fields)
-            qss_order_fields, std_order_fields = querysetsequence._separate_fields(
-                *self._order_by
-            )
-            extra_fields = [
-                f for f in std_order_fields if f.lstrip("-") not in std_fields
-            ]
-
-            self._querysets = [
-                qs.values(*std_fields, *extra_fields) for qs in self._querysets
-            ]
-
-            # If any additional fields are pulled, they'll need to be removed.
-            self._include_qs_index |= bool(qss_order_fields)
-            self._remove_fields = bool(extra_fields) or bool(qss_fields)
-
-    def __iter__(self):
-        if not self._remove_fields:
-            yield from super().__iter__()
-            return
+        # returned, they also need to be captured. (If no fields are given then
+        # every field is already returned.)
+        if self._order_by and self._fields:
+            _, std_fields = querysetsequence._separate_fields(*self._fields)
+            _, std_order_fields = querysetsequence._separate_fields(*self._order_by)
+            for field in std_order_fields:
+                field = field.lstrip("-")
+                if field not in std_fields and field not in self._extra_fields:
+                    self._extra_fields.append(field)
 
-        # The extra fields added for ordering need to be removed.
-        for it in super().__iter__():
-            yield {k: it[k] for k in self._fields}
+            if self._extra_fields:
+                self._querysets = [
+                    qs.values(*std_fields, *self._extra_fields)
+                    for qs in self._querysets
+                ]
 
     @staticmethod
     def _get_fields(obj, *field_names):
         return itemgetter(*field_names)(obj)
 
-    def _add_queryset_index(self, obj, value):
-        if self._include_qs_index:
-            obj["#"] = value
-        return obj
+    def _get_field_getter(self, field_name):
+        return itemgetter(field_name)
+
+    def _get_result_getter(self, field_names):
+        if self._fields:
+            for field_name in field_names:
+                if field_name not in self._fields:
+                    raise FieldError(
+                        "Cannot use '%s' with distinct(), it is not a field of "
+                        "values()." % field_name
+                    )
+        return itemgetter(*field_names)
+
+    def _get_identity_key(self):
+        # The entire row, without the QuerySet index.
+        def key(row):
+            return tuple(value for name, value in row.items() if name != "#")
+
+        key_fields = set(self._fields) - {"#"} if self._fields else ANY_FIELD
+        return key, key_fields
+
+    def _get_distinct_key(self):
+        # If the QuerySet index is one of the fields, results of different
+        # QuerySets always differ and each QuerySet is distinct.
+        if not self._distinct_fields and "#" in self._fields:
+            return None
+        return super()._get_distinct_key()
+
+    def _get_projection(self):
+        include_qs_index = self._include_qs_index
+        extra_fields = tuple(self._extra_fields)
+
+        # The rows can be returned exactly as the QuerySets return them.
+        if not include_qs_index and not extra_fields:
+            return None
+
+        def project(row, value):
+            # The dictionary is freshly created for each row by Django, so
+            # modify it in place instead of building a new one.
+            if include_qs_index:
+                row["#"] = value
+            for field in extra_fields:
+                del row[field]
+            return row
+
+        return project
 
 
 class ValuesListIterable(BaseIterable):
-    def __init__(self, querysetsequence):
-        super().__init__(querysetsequence)
+    def __init__(self, querysetsequence, **kwargs):
+        super().__init__(querysetsequence, **kwargs)
 
         fields = querysetsequence._fields
-        # Only keep the values from fields.
+        _, std_fields = querysetsequence._separate_fields(*fields)
+        # The fields of each result.
+        self._result_fields = list(fields)
+        # The number of values returned by the QuerySets which are kept.
         self._last_field = len(fields)
-        # The location of the QuerySet index.
-        try:
-            self._qs_index = fields.index("#")
-        except ValueError:
-            self._qs_index = None
+        # Any fields which are fetched only for ordering.
+        order_only_fields = []
 
         # If there are any "order_by" fields which are *not* the fields to be
         # returned, they also need to be captured.
         if self._order_by:
-            # Find any fields which are only used for ordering.
-            _, std_fields = querysetsequence._separate_fields(*fields)
             _, std_order_fields = querysetsequence._separate_fields(*self._order_by)
-            order_only_fields = [
-                f for f in std_order_fields if f.lstrip("-") not in std_fields
-            ]
-
-            # Capture both the fields to return as well as the fields used only
-            # for ordering.
-            all_fields = std_fields + order_only_fields
+            for field in std_order_fields:
+                field = field.lstrip("-")
+                if field not in std_fields and field not in order_only_fields:
+                    order_only_fields.append(field)
+
+        # Capture both the fields to return (including the QuerySet index, in
+        # position) as well as the fields used only for ordering.
+        all_fields = [*fields, *order_only_fields]
+        self._has_extra_fields = bool(order_only_fields)
+
+        if "#" in fields:
+            # Have the database return the QuerySet index in the proper place.
+            db_fields = [QUERYSET_INDEX_ALIAS if f == "#" else f for f in all_fields]
             self._querysets = [
-                qs.values_list(*std_fields, *order_only_fields)
-                for qs in self._querysets
+                annotate_queryset_index(qs, i).values_list(*db_fields)
+                for i, qs in zip(self._queryset_idxs, self._querysets)
             ]
+        elif order_only_fields:
+            self._querysets = [qs.values_list(*all_fields) for qs in self._querysets]
 
-            # If one of the returned fields is the QuerySet index, insert it so
-            # that the indexes of the fields after it are correct.
-            if self._qs_index:
-                all_fields = (
-                    all_fields[: self._qs_index] + ("#",) + all_fields[self._qs_index :]
-                )
-
-            # Convert the order_by field names into indexes, but encoded as strings.
-            #
-            # Note that this assumes that the ordering of the values is shallow
-            # (i.e. nothing returns a Model instance).
-            order_by_indexes = []
-            for field in self._order_by:
-                field_name = field.lstrip("-")
-
-                if field_name == "#":
-                    # If the index is not one of the returned fields, add it as
-                    # the last field.
-                    if not self._qs_index:
-                        self._qs_index = len(all_fields)
-                    field_index = self._qs_index
-                else:
-                    field_index = all_fields.index(field_name)
-
-                order_by_indexes.append(
-                    ("-" if field[0] == "-" else "") + str(field_index)
-                )
-            self._order_by = order_by_indexes
+        # Convert the order_by field names into indexes of the values returned
+        # by the QuerySets, but encoded as strings. The QuerySet index is
+        # compared separately.
+        #
+        # Note that this assumes that the ordering of the values is shallow
+        # (i.e. nothing returns a Model instance).
+        order_by_indexes = []
+        for field in self._order_by:
+            field_name = field.lstrip("-")
 
-    def __iter__(self):
-        # If there's no particular ordering, do not rebuild the tuples.
-        if not self._order_by:
-            yield from super().__iter__()
-            return
+            if field_name != "#":
+                field_name = str(all_fields.index(field_name))
 
-        # Remove the fields only used for ordering from the result.
-        for row in super().__iter__():
-            yield row[: self._last_field]
+            order_by_indexes.append(("-" if field[0] == "-" else "") + field_name)
+        self._order_by = order_by_indexes
 
     @staticmethod
     def _get_fields(obj, *field_names):
@@ -458,24 +874,325 @@ class ValuesListIterable(BaseIterable):
         field_indexes = [int(f) for f in field_names]
         return itemgetter(*field_indexes)(obj)
 
-    def _add_queryset_index(self, obj, value):
-        # If the QuerySet index needs to be inserted, build a new tuple with it.
-        if self._qs_index is None:
-            return obj
-        return obj[: self._qs_index] + (value,) + obj[self._qs_index :]
+    def _get_field_getter(self, field_name):
+        return itemgetter(int(field_name))
+
+    def _get_result_getter(self, field_names):
+        indexes = []
+        for field_name in field_names:
+            if field_name not in self._result_fields:
+                raise FieldError(
+                    "Cannot use '%s' with distinct(), it is not a field of "
+                    "values_list()." % field_name
+                )
+            indexes.append(self._result_fields.index(field_name))
+        return itemgetter(*indexes)
+
+    def _get_identity_key(self):
+        # The entire row, without the QuerySet index.
+        key_fields = set(self._result_fields) - {"#"}
+        if "#" not in self._result_fields:
+            return (lambda row: row), key_fields
+        indexes = [i for i, f in enumerate(self._result_fields) if f != "#"]
+        return (lambda row: tuple(row[i] for i in indexes)), key_fields
+
+    def _get_distinct_key(self):
+        # See ValuesIterable._get_distinct_key().
+        if not self._distinct_fields and "#" in self._result_fields:
+            return None
+        return super()._get_distinct_key()
+
+    def _get_projection(self):
+        # The rows can be returned exactly as the QuerySets return them.
+        if not self._has_extra_fields:
+            return None
+
+        # Remove the fields only used for ordering from the result.
+        trim = itemgetter(slice(0, self._last_field))
+        return lambda row, value: trim(row)
 
 
 class FlatValuesListIterable(ValuesListIterable):
-    def __iter__(self):
-        # Flat values lists can only have a single value in them, yield it.
-        for row in super().__iter__():
-            yield row[0]
+    def __init__(self, querysetsequence, **kwargs):
+        super().__init__(querysetsequence, **kwargs)
+
+        # Unless other fields are needed for ordering, have the QuerySets
+        # return the single value directly.
+        if not self._has_extra_fields:
+            fields = [
+                QUERYSET_INDEX_ALIAS if f == "#" else f
+                for f in querysetsequence._fields
+            ]
+            self._querysets = [
+                qs.values_list(*fields, flat=True) for qs in self._querysets
+            ]
+
+    def _get_field_getter(self, field_name):
+        # Without any extra fields, the only value is the row itself.
+        if not self._has_extra_fields:
+            return lambda row: row
+        return super()._get_field_getter(field_name)
+
+    def _get_result_getter(self, field_names):
+        # Each result is the only value.
+        super()._get_result_getter(field_names)
+        return lambda value: value
+
+    def _get_projection(self):
+        # Flat values lists can only have a single value in them, return it.
+        if not self._has_extra_fields:
+            return None
+        return lambda row, value: row[0]
 
 
 class NamedValuesListIterable(ValuesListIterable):
     pass
 
 
+class GroupedIterable(BaseIterable):
+    """
+    Combine the groups of values(...).annotate(...) across the QuerySets by the
+    group key, see QuerySetSequence.merge_groups().
+    """
+
+    def __init__(self, querysetsequence, **kwargs):
+        super().__init__(querysetsequence, **kwargs)
+
+        fields = querysetsequence._fields
+        if not fields:
+            raise TypeError(
+                "merge_groups() requires values() or values_list() to be called "
+                "with the fields to group by."
+            )
+        aggregates = querysetsequence._aggregates
+        self._group_fields = [f for f in fields if f not in aggregates]
+        if "#" in self._group_fields:
+            raise ValueError("Cannot group by '#' when merging groups.")
+
+        # The values of each combined row are the group key, then the aggregates.
+        names = [*self._group_fields, *aggregates]
+        partials, self._combiners = split_aggregates(aggregates)
+        self._partial_aliases = list(partials)
+
+        # The ordering as (index of the value, direction) of the combined rows.
+        self._ordering = []
+        for field in self._order_by:
+            name = field.lstrip("-")
+            if name not in names:
+                raise FieldError(
+                    "Cannot order merged groups by '%s'. Choices are: %s"
+                    % (name, ", ".join(names))
+                )
+            reverse = -1 if field[0] == "-" else 1
+            if not self._standard_ordering:
+                reverse = -reverse
+            self._ordering.append((names.index(name), reverse))
+
+        # When ordering only by the group key, each QuerySet returns its groups
+        # in order and they're combined while merging the QuerySets. (The rest
+        # of the group key is added to the ordering so that the rows of a group
+        # are adjacent.)
+        self._streaming = bool(self._ordering) and all(
+            index < len(self._group_fields) for index, _ in self._ordering
+        )
+        if self._streaming:
+            ordered = {index for index, _ in self._ordering}
+            self._ordering += [
+                (index, 1)
+                for index in range(len(self._group_fields))
+                if index not in ordered
+            ]
+
+        querysets = []
+        for qs in self._querysets:
+            order_by = []
+            if self._streaming:
+                # A reversed QuerySet also reverses the new ordering.
+                flip = 1 if qs.query.standard_ordering else -1
+                order_by = [
+                    ("-" if reverse * flip < 0 else "") + names[index]
+                    for index, reverse in self._ordering
+                ]
+            querysets.append(
+                (qs.annotate(**partials) if partials else qs.distinct())
+                .values_list(*self._group_fields, *partials)
+                .order_by(*order_by)
+            )
+        self._querysets = querysets
+
+        # Convert the combined rows into the shape requested by values() or
+        # values_list().
+        result_names = [*fields, *(a for a in aggregates if a not in fields)]
+        getter = itemgetter(*[names.index(name) for name in result_names])
+        if len(result_names) == 1:
+            getter = lambda row, getter=getter: (getter(row),)  # noqa: E731
+
+        iterable_class = querysetsequence._iterable_class
+        if iterable_class is ValuesIterable:
+            self._project = lambda row: dict(zip(result_names, getter(row)))
+        elif iterable_class is FlatValuesListIterable:
+            self._project = lambda row: getter(row)[0]
+        elif iterable_class is NamedValuesListIterable:
+            row_class = create_namedtuple_class(*result_names)
+            self._project = lambda row: row_class(*getter(row))
+        else:
+            self._project = getter
+
+    def _comparator(self, row_1, row_2):
+        for index, reverse in self._ordering:
+            result = self._cmp(row_1[index], row_2[index])
+            # The first non-zero comparison decides the order.
+            if result:
+                return result * reverse
+
+        # Everything was equivalent.
+        return 0
+
+    def _combine(self, group):
+        """Combine the partial aggregates of each row of a group."""
+        key, rows = group
+        start = len(self._group_fields)
+        results = [dict(zip(self._partial_aliases, row[start:])) for row in rows]
+        return (*key, *combine_aggregates(self._combiners, results).values())
+
+    def __iter__(self):
+        get_key = itemgetter(slice(0, len(self._group_fields)))
+        sort_key = functools.cmp_to_key(self._comparator)
+
+        if self._streaming:
+            self._add_strategy("grouped-streaming")
+            rows = heapq.merge(
+                *map(self._iter_queryset, self._querysets, self._queryset_idxs),
+                key=sort_key,
+            )
+            results = map(self._combine, groupby(rows, get_key))
+
+        else:
+            self._add_strategy("grouped-hashed")
+            groups = {}
+            for i, qs in zip(self._queryset_idxs, self._querysets):
+                for row in self._iter_queryset(qs, i):
+                    groups.setdefault(get_key(row), []).append(row)
+            results = map(self._combine, groups.items())
+
+            # Only the groups up to the end of the slice need to be sorted.
+            if self._ordering and self._high_mark is not None:
+                results = heapq.nsmallest(self._high_mark, results, key=sort_key)
+            elif self._ordering:
+                results = sorted(results, key=sort_key)
+
+        return map(self._project, islice(results, self._low_mark, self._high_mark))
+
+
+class CombinedIterable:
+    """
+    Apply intersection() or difference() to the results of QuerySetSequences
+    which cannot be combined by the database, see QuerySetSequence._combine().
+    """
+
+    def __init__(self, querysetsequence, **kwargs):
+        self._kind, others = querysetsequence._combinator
+        self._low_mark = querysetsequence._low_mark
+        self._high_mark = querysetsequence._high_mark
+
+        left = querysetsequence._clone()
+        left._combinator = None
+        left._low_mark, left._high_mark = 0, None
+        self._left = left._make_iterable(**kwargs)
+        # Only the QuerySets of this side are recorded in any statistics.
+        kwargs.pop("stats", None)
+        self._others = [
+            querysetsequence._with_querysets(querysets)._make_iterable(**kwargs)
+            for querysets in others
+        ]
+
+        # The results of each side are compared by their identity.
+        self._key, key_fields = self._left._get_identity_key()
+
+        # If ordered by fields which are equal for equal results, then the
+        # results of each side can be compared in runs of equal values of those
+        # fields, otherwise the keys of the other sides are kept in memory.
+        run_fields = []
+        self._directions = []
+        for field in querysetsequence._order_by:
+            field_name = field.lstrip("-")
+            if field_name not in key_fields:
+                break
+            run_fields.append(field_name)
+            direction = -1 if field[0] == "-" else 1
+            if not querysetsequence._standard_ordering:
+                direction = -direction
+            self._directions.append(direction)
+
+        self._run_key = None
+        if run_fields:
+            getter = self._left._get_result_getter(run_fields)
+            if len(run_fields) == 1:
+                self._run_key = lambda result: (getter(result),)
+            else:
+                self._run_key = getter
+
+    def _keep(self, key, other_keys):
+        """Whether a result of the first side is kept."""
+        if self._kind == "intersection":
+            return all(key in keys for keys in other_keys)
+        return not any(key in keys for keys in other_keys)
+
+    def _compare_runs(self, run_1, run_2):
+        for value_1, value_2, direction in zip(run_1, run_2, self._directions):
+            result = BaseIterable._cmp(value_1, value_2)
+            if result:
+                return result * direction
+        return 0
+
+    def _hashed_iterator(self):
+        key = self._key
+        other_keys = [{key(result) for result in other} for other in self._others]
+        results = (
+            result for result in self._left if self._keep(key(result), other_keys)
+        )
+        return dedupe(results, key)
+
+    def _sorted_iterator(self):
+        key = self._key
+        run_key = self._run_key
+
+        # The next result of each other side (or None when exhausted).
+        others = [iter(other) for other in self._others]
+        heads = [next(other, None) for other in others]
+
+        for run, results in groupby(self._left, run_key):
+            # Skip the results of the other sides which are before this run and
+            # collect the keys of the results in this run.
+            other_keys = []
+            for i, other in enumerate(others):
+                keys = set()
+                while heads[i] is not None:
+                    result = self._compare_runs(run_key(heads[i]), run)
+                    if result > 0:
+                        break
+                    if result == 0:
+                        keys.add(key(heads[i]))
+                    heads[i] = next(other, None)
+                other_keys.append(keys)
+
+            seen = set()
+            for result in results:
+                result_key = key(result)
+                if result_key not in seen and self._keep(result_key, other_keys):
+                    seen.add(result_key)
+                    yield result
+
+    def __iter__(self):
+        if self._run_key is None:
+            self._left._add_strategy("%s-hashed" % self._kind)
+            results = self._hashed_iterator()
+        else:
+            self._left._add_strategy("%s-sorted" % self._kind)
+            results = self._sorted_iterator()
+        return islice(results, self._low_mark, self._high_mark)
+
+
 class ProxyModel:
     """
     Wrapper for generating DoesNotExist exceptions without modifying
@@ -496,6 +1213,73 @@ class ProxyModel:
         return getattr(self._model, name)
 
 
+def copy_argument(value):
+    """
+    Copy the containers (e.g. a list of primary keys) of an argument of a
+    chained call, which could be changed before the call is applied to the
+    QuerySets. Iterators are consumed into a list, to apply to every QuerySet.
+    """
+    if isinstance(value, Q):
+        copied = copy.copy(value)
+        copied.children = [copy_argument(child) for child in value.children]
+        return copied
+    if type(value) in (list, tuple, set, frozenset):
+        return type(value)(copy_argument(item) for item in value)
+    if type(value) is dict:
+        return {key: copy_argument(item) for key, item in value.items()}
+    if isinstance(value, Iterator):
+        return list(value)
+    return value
+
+
+class PendingOperations:
+    """
+    The operations chained onto the QuerySets of a QuerySetSequence which are
+    not applied yet, see QuerySetSequence._chain().
+
+    Each chained operation creates a new instance from the previous one, which
+    is shared between clones. Each instance remembers the QuerySets it was
+    applied to: clones (e.g. of a QuerySetSequence defined on a view class)
+    reuse them and further operations are only applied on top of them.
+    """
+
+    def __init__(self, parent=None, op=None):
+        self.parent = parent
+        # The operations, as tuples of the method, args and kwargs.
+        self.ops = (*parent.ops, op) if parent is not None else ()
+        # The QuerySet each base QuerySet became, by the id() of the base
+        # QuerySet and whether the SQL is cached. The base QuerySet is kept, so
+        # that its id() isn't reused.
+        self._applied = {}
+
+    def __bool__(self):
+        return bool(self.ops)
+
+    def chain(self, method, args, kwargs):
+        """Return the operations followed by another one."""
+        return PendingOperations(self, (method, args, kwargs))
+
+    def apply(self, base, cache_sql=False):
+        """Return the QuerySet with the operations applied to it."""
+        if self.parent is None:
+            return base
+
+        key = (id(base), cache_sql)
+        applied = self._applied.get(key)
+        # A QuerySet which was evaluated (e.g. one from get_querysets()) would
+        # return its cached results.
+        if applied is not None and applied[1]._result_cache is None:
+            return applied[1]
+
+        method, args, kwargs = self.ops[-1]
+        # Only the SQL of the final QuerySet is cached.
+        qs = getattr(self.parent.apply(base), method)(*args, **kwargs)
+        if cache_sql:
+            cache_queryset_sql(qs, base, self.ops)
+        self._applied[key] = (base, qs)
+        return qs
+
+
 class QuerySetSequence:
     """
     Wrapper for multiple QuerySets without the restriction on the identity of
@@ -513,6 +1297,27 @@ class QuerySetSequence:
 
         self._iterable_class = ModelIterable
         self._result_cache = None
+        # Lookups which are prefetched across all of the QuerySets.
+        self._prefetch_lookups = ()
+        # Whether related objects are shared between instances.
+        self._identity_map = False
+        # Whether the compiled SQL of the QuerySets is cached (see cache_sql()).
+        self._cache_sql = False
+        # Records the statistics of evaluations (see collect_stats()), shared
+        # between clones.
+        self._stats_recorder = None
+        # Identifies this QuerySetSequence and its clones for query_budget().
+        self._budget_scope = object()
+        # The aggregates annotated after values(), by alias.
+        self._aggregates = {}
+        # Whether groups are combined across QuerySets.
+        self._merge_groups = False
+        # The fields results are distinct by (see distinct()).
+        self._distinct_fields = None
+        # A set operation which is applied while iterating, as a tuple of the
+        # kind and a list of the QuerySets of each other side.
+        self._combinator = None
+        self._distinct_max_in_memory = DISTINCT_MAX_IN_MEMORY
 
         self.model = ProxyModel(model)
 
@@ -521,8 +1326,54 @@ class QuerySetSequence:
         # The original ordering of the QuerySets.
         self._queryset_idxs = list(range(len(self._querysets)))
 
+    @property
+    def _querysets(self):
+        """The QuerySets, with any pending operations applied."""
+        if self._pending_ops:
+            self._querysets = [
+                self._pending_ops.apply(base, self._cache_sql)
+                for base in self._base_querysets
+            ]
+        return self._base_querysets
+
+    @_querysets.setter
+    def _querysets(self, querysets):
+        self._base_querysets = querysets
+        self._pending_ops = PendingOperations()
+
+    def _chain(self, method, *args, **kwargs):
+        """
+        Return a clone which calls a method on each QuerySet. The call is
+        deferred until the QuerySets are needed, all pending calls are then
+        applied to each QuerySet at once.
+        """
+        clone = self._clone()
+        clone._pending_ops = self._pending_ops.chain(
+            method,
+            tuple(copy_argument(arg) for arg in args),
+            {name: copy_argument(value) for name, value in kwargs.items()},
+        )
+
+        # Apply the call to a QuerySet of each model right away, so invalid
+        # arguments (e.g. an unknown field) raise here as they do for a
+        # QuerySet. The results are reused once the QuerySets are needed.
+        models = {}
+        for qs in clone._base_querysets:
+            models.setdefault(qs.model, qs)
+        for qs in models.values():
+            clone._pending_ops.apply(qs)
+        return clone
+
     def _clone(self):
-        clone = QuerySetSequence(*[qs._clone() for qs in self._querysets])
+        # The QuerySets are never modified, so are shared between clones until
+        # any pending operations are applied (which creates new QuerySets). A
+        # QuerySet which was evaluated (e.g. one from get_querysets()) would
+        # return its cached results, so it is cloned.
+        clone = QuerySetSequence()
+        clone._base_querysets = [
+            qs if qs._result_cache is None else qs.all() for qs in self._base_querysets
+        ]
+        clone._pending_ops = self._pending_ops
         clone._queryset_idxs = self._queryset_idxs
         clone._order_by = self._order_by
         clone._fields = self._fields
@@ -530,13 +1381,128 @@ class QuerySetSequence:
         clone._low_mark = self._low_mark
         clone._high_mark = self._high_mark
         clone._iterable_class = self._iterable_class
+        clone._prefetch_lookups = self._prefetch_lookups
+        clone._identity_map = self._identity_map
+        clone._cache_sql = self._cache_sql
+        clone._stats_recorder = self._stats_recorder
+        clone._budget_scope = self._budget_scope
+        clone._aggregates = self._aggregates
+        clone._merge_groups = self._merge_groups
+        clone._distinct_fields = self._distinct_fields
+        clone._combinator = self._combinator
+        clone._distinct_max_in_memory = self._distinct_max_in_memory
         clone.model = self.model
 
-        return clone
+        return clone
+
+    def _make_iterable(self, **kwargs):
+        if self._combinator:
+            return CombinedIterable(self, **kwargs)
+        if self._merge_groups:
+            return GroupedIterable(self, **kwargs)
+        return self._iterable_class(self, **kwargs)
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            with self._collect_stats("iterate") as stats:
+                self._result_cache = list(self._make_iterable(stats=stats))
+                self._prefetch_related_objects(self._result_cache)
+                if stats is not None:
+                    stats.results = len(self._result_cache)
+
+    def _start_stats(self, method):
+        """
+        Return the EvaluationStats to record an evaluation in, or None if it
+        isn't instrumented (see collect_stats(), queryset_sequence.signals and
+        query_budget()).
+        """
+        budgets = get_budgets(self._budget_scope)
+        if self._stats_recorder is not None:
+            stats = self._stats_recorder.start(method)
+        elif budgets or has_receivers():
+            stats = EvaluationStats(method)
+        else:
+            return None
+        stats.budgets = budgets
+        return stats
+
+    @contextmanager
+    def _evaluating(self, stats, capture=True):
+        """
+        Instrument an evaluation, if stats is not None. Unless capture is False,
+        the queries made meanwhile are recorded.
+        """
+        if stats is None:
+            yield
+            return
+
+        pre_evaluate.send(
+            sender=QuerySetSequence, sequence=self, method=stats.method, stats=stats
+        )
+        try:
+            if capture:
+                with stats.capture(self._querysets):
+                    yield
+            else:
+                yield
+        finally:
+            post_evaluate.send(
+                sender=QuerySetSequence,
+                sequence=self,
+                method=stats.method,
+                stats=stats,
+            )
+
+    @contextmanager
+    def _collect_stats(self, method):
+        """
+        Instrument an evaluation, if enabled. Yields the EvaluationStats, or
+        None.
+        """
+        stats = self._start_stats(method)
+        with self._evaluating(stats):
+            yield stats
 
-    def _fetch_all(self):
-        if self._result_cache is None:
-            self._result_cache = list(self._iterable_class(self))
+    def _track_results(self, results, stats):
+        """
+        Instrument an evaluation by an iterator over the results. The queries
+        are only recorded while fetching each result: not while the caller has
+        it (which could make queries of its own or iterate something else).
+        """
+        stats.results = 0
+        querysets = self._querysets
+        with self._evaluating(stats, capture=False):
+            while True:
+                with stats.capture(querysets):
+                    try:
+                        result = next(results)
+                    except StopIteration:
+                        return
+                stats.results += 1
+                yield result
+
+    def _prefetch_related_objects(self, instances):
+        """Prefetch the sequence's lookups for the results across QuerySets."""
+        if self._prefetch_lookups and self._iterable_class is ModelIterable:
+            prefetch_related_objects_across_models(instances, *self._prefetch_lookups)
+
+    def _prefetch_iterator(self, iterable, chunk_size):
+        """Prefetch the sequence's lookups for each chunk of an iterator."""
+        while True:
+            results = list(islice(iterable, chunk_size))
+            if not results:
+                return
+            self._prefetch_related_objects(results)
+            yield from results
+
+    def _prefetch_result(self, obj):
+        """
+        Prefetch the sequence's lookups for a single result (e.g. of get() or
+        first()), which might be None.
+        """
+        if obj is not None:
+            self._prefetch_related_objects([obj])
+        return obj
 
     @property
     def _prefetch_related_lookups(self):
@@ -547,7 +1513,7 @@ class QuerySetSequence:
         # Note that this really just needs to return a truth-y value if any of
         # the QuerySets are using prefetch_related, but this tries to keep the
         # type sane at least.
-        result = ()
+        result = self._prefetch_lookups
         for qs in self._querysets:
             result += qs._prefetch_related_lookups
         return result
@@ -609,11 +1575,11 @@ class QuerySetSequence:
             return other
         combined = self._clone()
 
-        querysets = []
-        for qs in combined._querysets:
-            # Only QuerySets of the same type can have any overlap.
-            if issubclass(qs.model, other.model):
-                querysets.append(qs & other)
+        # Only QuerySets of the same type can have any overlap.
+        querysets = [
+            combined._querysets[position] & other
+            for position in self._get_positions_for_model(other.model)
+        ]
 
         # If none are left, we're left with an EmptyQuerySet.
         if not querysets:
@@ -669,6 +1635,10 @@ class QuerySetSequence:
         """
         # Ensure negate is a boolean.
         negate = bool(negate)
+        # The QuerySet index of each QuerySet, which might not be its position.
+        queryset_idxs = self._queryset_idxs
+        # Any pending operations apply to whichever QuerySets are kept.
+        base_querysets = self._base_querysets
 
         for kwarg, value in kwargs.items():
             parts = kwarg.split(LOOKUP_SEP)
@@ -760,28 +1730,46 @@ class QuerySetSequence:
         self._queryset_idxs = list(self._queryset_idxs)
 
         # Finally, keep only the QuerySets we care about!
-        self._querysets = [self._querysets[i] for i in self._queryset_idxs]
+        kept_idxs = set(self._queryset_idxs)
+        self._base_querysets = [
+            qs for i, qs in zip(queryset_idxs, base_querysets) if i in kept_idxs
+        ]
 
     # Methods that return new QuerySets
     def filter(self, *args, **kwargs):
+        self._not_support_combined_queries("filter")
         qss_fields, fields = self._separate_filter_fields(**kwargs)
 
-        clone = self._clone()
+        clone = self._chain("filter", *args, **fields)
         clone._filter_or_exclude_querysets(False, **qss_fields)
-        clone._querysets = [qs.filter(*args, **fields) for qs in clone._querysets]
         return clone
 
     def exclude(self, **kwargs):
+        self._not_support_combined_queries("exclude")
         qss_fields, fields = self._separate_filter_fields(**kwargs)
 
-        clone = self._clone()
+        clone = self._chain("exclude", **fields)
         clone._filter_or_exclude_querysets(True, **qss_fields)
-        clone._querysets = [qs.exclude(**fields) for qs in clone._querysets]
         return clone
 
     def annotate(self, *args, **kwargs):
-        clone = self._clone()
-        clone._querysets = [qs.annotate(*args, **kwargs) for qs in clone._querysets]
+        self._not_support_combined_queries("annotate")
+        clone = self._chain("annotate", *args, **kwargs)
+
+        # Aggregates after values() are computed per group, keep track of them
+        # in case the groups are combined (see merge_groups()).
+        if self._fields is not None:
+            annotations = {arg.default_alias: arg for arg in args}
+            annotations.update(kwargs)
+            clone._aggregates = {
+                **self._aggregates,
+                **{
+                    alias: annotation
+                    for alias, annotation in annotations.items()
+                    if getattr(annotation, "contains_aggregate", False)
+                },
+            }
+
         return clone
 
     if django.VERSION > (3, 2):
@@ -793,39 +1781,49 @@ class QuerySetSequence:
         _, filtered_fields = self._separate_fields(*fields)
 
         # Apply the filtered fields to each underlying QuerySet.
-        clone = self._clone()
-        clone._querysets = [qs.order_by(*filtered_fields) for qs in self._querysets]
+        clone = self._chain("order_by", *filtered_fields)
 
         # But keep the original fields for the clone.
         clone._order_by = list(fields)
         return clone
 
     def reverse(self):
-        clone = self._clone()
-        clone._querysets = [qs.reverse() for qs in reversed(self._querysets)]
+        clone = self._chain("reverse")
+        clone._base_querysets = clone._base_querysets[::-1]
         clone._standard_ordering = not self._standard_ordering
         return clone
 
-    def distinct(self, *fields):
-        if len({qs.model for qs in self._querysets}) != len(self._querysets):
-            raise NotImplementedError("Multiple QS of same model unsupported")
-        clone = self._clone()
-        clone._querysets = [qs.distinct() for qs in clone._querysets]
+    def distinct(self, *fields, max_in_memory=DISTINCT_MAX_IN_MEMORY):
+        """
+        Remove duplicate results across all QuerySets, by the given fields (or
+        the entire result). The first of any duplicate results is kept.
+
+        Duplicates are found while iterating. If ordered by the fields they're
+        found in constant memory, otherwise up to max_in_memory keys are kept in
+        memory before storing them on disk.
+        """
+        self._not_support_combined_queries("distinct")
+        if "#" in fields:
+            raise ValueError("Cannot use '#' with distinct().")
+
+        # Each QuerySet removes its own duplicates (by every column).
+        clone = self._chain("distinct")
+        clone._distinct_fields = fields
+        clone._distinct_max_in_memory = max_in_memory
         return clone
 
     def values(self, *fields, **expressions):
+        self._not_support_combined_queries("values")
         _, std_fields = self._separate_fields(*fields)
 
-        clone = self._clone()
-        clone._querysets = [
-            qs.values(*std_fields, **expressions) for qs in self._querysets
-        ]
+        clone = self._chain("values", *std_fields, **expressions)
         clone._fields = list(fields) + list(expressions.keys())
         clone._iterable_class = ValuesIterable
 
         return clone
 
     def values_list(self, *fields, flat=False, named=False):
+        self._not_support_combined_queries("values_list")
         if flat and named:
             raise TypeError("'flat' and 'named' can't be used together.")
         if flat and len(fields) > 1:
@@ -836,12 +1834,8 @@ class QuerySetSequence:
 
         _, std_fields = self._separate_fields(*fields)
 
-        clone = self._clone()
         # Note that we always process the flat-ness ourself.
-        clone._querysets = [
-            qs.values_list(*std_fields, flat=False, named=named)
-            for qs in self._querysets
-        ]
+        clone = self._chain("values_list", *std_fields, flat=False, named=named)
         clone._fields = list(fields)
         clone._iterable_class = (
             NamedValuesListIterable
@@ -853,11 +1847,35 @@ class QuerySetSequence:
 
         return clone
 
-    def dates(self, field, kind, order="ASC"):
-        raise NotImplementedError()
+    def _merge_dates(self, querysets, alias, order):
+        """
+        Merge the (distinct and ordered) dates returned by each QuerySet, without
+        duplicates.
+        """
+        clone = self._clone()
+        clone._querysets = querysets
+        clone._fields = [alias]
+        clone._iterable_class = FlatValuesListIterable
+        clone._order_by = [("-" if order == "DESC" else "") + alias]
+        clone._standard_ordering = True
+        clone._distinct_fields = ()
+        return clone
+
+    def dates(self, field_name, kind, order="ASC"):
+        self._not_support_combined_queries("dates")
+        querysets = [qs.dates(field_name, kind, order) for qs in self._querysets]
+        return self._merge_dates(querysets, "datefield", order)
 
     def datetimes(self, field_name, kind, order="ASC", tzinfo=None, is_dst=None):
-        raise NotImplementedError()
+        self._not_support_combined_queries("datetimes")
+        kwargs = {"tzinfo": tzinfo}
+        # Django 5.0 removed is_dst.
+        if is_dst is not None:
+            kwargs["is_dst"] = is_dst
+        querysets = [
+            qs.datetimes(field_name, kind, order, **kwargs) for qs in self._querysets
+        ]
+        return self._merge_dates(querysets, "datetimefield", order)
 
     def none(self):
         # This is a bit odd, but use the first QuerySet to properly return an
@@ -865,27 +1883,181 @@ class QuerySetSequence:
         return self._querysets[0].none()
 
     def all(self):
+        # The QuerySets are shared (and never evaluated), so they don't need
+        # to be copied.
+        return self._clone()
+
+    def _not_support_combined_queries(self, operation_name):
+        if self._combinator:
+            raise NotSupportedError(
+                "Calling QuerySetSequence.%s() after %s() is not supported."
+                % (operation_name, self._combinator[0])
+            )
+
+    def _with_querysets(self, querysets):
+        """
+        Return a QuerySetSequence of other QuerySets which is ordered the same
+        as this one, without any slicing or set operations.
+        """
         clone = self._clone()
-        clone._querysets = [qs.all() for qs in self._querysets]
+        clone._set_querysets(querysets)
+        clone._low_mark, clone._high_mark = 0, None
+        clone._combinator = None
+        if clone._order_by:
+            clone = clone.order_by(*clone._order_by)
+        if not clone._standard_ordering:
+            clone._querysets = [qs.reverse() for qs in clone._querysets]
         return clone
 
-    def union(self, *other_qs, **kwargs):
-        raise NotImplementedError()
+    def _combine_in_database(self, kind, others, keep_duplicates):
+        """
+        Apply the set operation to the QuerySets of each model in the database.
 
-    def intersection(self, *other_qs, **kwargs):
-        raise NotImplementedError()
+        Returns the list of QuerySets, or None if the QuerySets are not simple
+        model QuerySets on a single database which supports the operation (or
+        if multiple QuerySets of a side have the same model).
+        """
+        querysets = [*self._querysets, *chain.from_iterable(others)]
+        if not querysets or self._fields is not None:
+            return None
+        # The combined QuerySets can only be ordered by their own columns.
+        if any(LOOKUP_SEP in f or f.lstrip("-") == "#" for f in self._order_by):
+            return None
 
-    def difference(self, *other_qs, **kwargs):
-        raise NotImplementedError()
+        db = querysets[0].db
+        if not getattr(connections[db].features, "supports_select_%s" % kind):
+            return None
+        for qs in querysets:
+            query = qs.query
+            if (
+                qs.db != db
+                or qs._fields is not None
+                or qs._prefetch_related_lookups
+                or query.is_sliced
+                or query.combinator
+                or query.distinct_fields
+                or query.annotations
+                or query.extra
+                or query.select_related
+                or query.deferred_loading != (frozenset(), True)
+            ):
+                return None
+
+        # Each side as a dictionary of concrete model to QuerySet.
+        sides = []
+        models = {}
+        for side_querysets in [self._querysets, *others]:
+            side = {}
+            for qs in side_querysets:
+                concrete_model = qs.model._meta.concrete_model
+                if concrete_model in side:
+                    return None
+                # Proxy models of the same table cannot be combined.
+                if models.setdefault(concrete_model, qs.model) is not qs.model:
+                    return None
+                # The ordering is applied to the combined QuerySet.
+                side[concrete_model] = qs.order_by()
+            sides.append(side)
+
+        left, *rights = sides
+        result = []
+        if kind == "union":
+            for model in models:
+                parts = [side[model] for side in sides if model in side]
+                if len(parts) > 1:
+                    result.append(parts[0].union(*parts[1:], all=keep_duplicates))
+                elif keep_duplicates:
+                    result.append(parts[0])
+                else:
+                    result.append(parts[0].distinct())
+        elif kind == "intersection":
+            for model, qs in left.items():
+                if all(model in right for right in rights):
+                    result.append(qs.intersection(*[right[model] for right in rights]))
+        else:
+            for model, qs in left.items():
+                parts = [right[model] for right in rights if model in right]
+                result.append(qs.difference(*parts) if parts else qs.distinct())
+        return result
+
+    def _combine(self, kind, other_qs, keep_duplicates=False):
+        if self._low_mark or self._high_mark is not None:
+            raise TypeError("Cannot use 'limit' or 'offset' with %s()." % kind)
+        if self._merge_groups:
+            raise NotSupportedError(
+                "Calling QuerySetSequence.%s() after merge_groups() is not "
+                "supported." % kind
+            )
+        if self._combinator and self._combinator[0] != kind:
+            self._not_support_combined_queries(kind)
+
+        # The QuerySets of each other side.
+        others = []
+        for other in other_qs:
+            if isinstance(other, QuerySetSequence):
+                if (
+                    other._low_mark
+                    or other._high_mark is not None
+                    or other._combinator
+                    or other._merge_groups
+                ):
+                    raise NotSupportedError(
+                        "Cannot use %s() with a sliced or combined "
+                        "QuerySetSequence." % kind
+                    )
+                others.append(other._querysets)
+            elif isinstance(other, QuerySet):
+                others.append([other])
+            else:
+                raise TypeError(
+                    "'%s' is not a QuerySet or QuerySetSequence."
+                    % other.__class__.__name__
+                )
 
-    def select_related(self, *fields):
         clone = self._clone()
-        clone._querysets = [qs.select_related(*fields) for qs in self._querysets]
+        if not self._combinator:
+            querysets = self._combine_in_database(kind, others, keep_duplicates)
+            if querysets is not None:
+                clone = clone._with_querysets(querysets)
+                clone._distinct_fields = None
+                return clone
+
+        if kind == "union":
+            # Chain all of the QuerySets together, without duplicates.
+            clone = clone._with_querysets(
+                [*self._querysets, *chain.from_iterable(others)]
+            )
+            return clone if keep_duplicates else clone.distinct()
+
+        # Otherwise, the results are compared while iterating.
+        if self._combinator:
+            others = self._combinator[1] + others
+        clone._combinator = (kind, others)
         return clone
 
+    def union(self, *other_qs, all=False):
+        return self._combine("union", other_qs, all)
+
+    def intersection(self, *other_qs):
+        return self._combine("intersection", other_qs)
+
+    def difference(self, *other_qs):
+        return self._combine("difference", other_qs)
+
+    def select_related(self, *fields):
+        self._not_support_combined_queries("select_related")
+        return self._chain("select_related", *fields)
+
     def prefetch_related(self, *lookups):
-        clone = self._clone()
-        clone._querysets = [qs.prefetch_related(*lookups) for qs in self._querysets]
+        if lookups == (None,):
+            # Clear any lookups, including those of the individual QuerySets.
+            clone = self._chain("prefetch_related", None)
+            clone._prefetch_lookups = ()
+        else:
+            # The lookups are prefetched across all QuerySets once they are
+            # evaluated, see _fetch_all().
+            clone = self._clone()
+            clone._prefetch_lookups = clone._prefetch_lookups + lookups
         return clone
 
     def extra(
@@ -897,34 +2069,27 @@ class QuerySetSequence:
         order_by=None,
         select_params=None,
     ):
-        clone = self._clone()
-        clone._querysets = [
-            qs.extra(
-                select=select,
-                where=where,
-                params=params,
-                tables=tables,
-                order_by=order_by,
-                select_params=select_params,
-            )
-            for qs in self._querysets
-        ]
-        return clone
+        self._not_support_combined_queries("extra")
+        return self._chain(
+            "extra",
+            select=select,
+            where=where,
+            params=params,
+            tables=tables,
+            order_by=order_by,
+            select_params=select_params,
+        )
 
     def defer(self, *fields):
-        clone = self._clone()
-        clone._querysets = [qs.defer(*fields) for qs in self._querysets]
-        return clone
+        self._not_support_combined_queries("defer")
+        return self._chain("defer", *fields)
 
     def only(self, *fields):
-        clone = self._clone()
-        clone._querysets = [qs.only(*fields) for qs in self._querysets]
-        return clone
+        self._not_support_combined_queries("only")
+        return self._chain("only", *fields)
 
     def using(self, alias):
-        clone = self._clone()
-        clone._querysets = [qs.using(alias) for qs in self._querysets]
-        return clone
+        return self._chain("using", alias)
 
     def select_for_update(self, nowait=False, skip_locked=False, of=(), no_key=False):
         raise NotImplementedError()
@@ -933,33 +2098,45 @@ class QuerySetSequence:
         raise NotImplementedError()
 
     # Methods that do not return QuerySets
+    def _route_pk_instance(self, kwargs):
+        """
+        If the primary key to get is a model instance, only the QuerySets of that
+        model can contain it.
+        """
+        instance = kwargs.get("pk")
+        if not isinstance(instance, Model):
+            return self
+        kwargs["pk"] = instance.pk
+        return self._for_positions(self._get_positions_for_instance(instance))
+
     def get(self, **kwargs):
-        clone = self.filter(**kwargs)
+        clone = self._route_pk_instance(kwargs).filter(**kwargs)
 
         result = None
-        for qs in clone._querysets:
-            try:
-                obj = qs.get()
-            except ObjectDoesNotExist:
-                pass
-            # Don't catch the MultipleObjectsReturned(), allow it to raise.
-            else:
-                # If a second object is found, raise an exception.
-                if result:
-                    raise MultipleObjectsReturned()
-                result = obj
+        with clone._collect_stats("get") as stats:
+            for i, qs in zip(clone._queryset_idxs, clone._querysets):
+                try:
+                    obj = track_call(stats, i, qs, qs.get)
+                except ObjectDoesNotExist:
+                    pass
+                # Don't catch the MultipleObjectsReturned(), allow it to raise.
+                else:
+                    # If a second object is found, raise an exception.
+                    if result:
+                        raise MultipleObjectsReturned()
+                    result = obj
 
         # Checked all QuerySets and no object was found.
         if result is None:
             raise self.model.DoesNotExist()
 
         # Return the only result found.
-        return result
+        return self._prefetch_result(result)
 
     if django.VERSION >= (4, 1):
 
         async def aget(self, **kwargs):
-            clone = self.filter(**kwargs)
+            clone = self._route_pk_instance(kwargs).filter(**kwargs)
 
             awaitables = []
             for qs in clone._querysets:
@@ -987,7 +2164,7 @@ class QuerySetSequence:
                 raise self.model.DoesNotExist()
 
             # Return the only result found.
-            return result
+            return await sync_to_async(self._prefetch_result)(result)
 
     def create(self, **kwargs):
         raise NotImplementedError()
@@ -1013,6 +2190,46 @@ class QuerySetSequence:
         async def aupdate_or_create(self, defaults=None, **kwargs):
             raise NotImplementedError()
 
+    def _get_queryset_for_model(self, model):
+        """
+        Return the QuerySet to use for writing instances of a model, preferring
+        a QuerySet of exactly that model.
+        """
+        matches = [
+            self._querysets[position]
+            for position in self._get_positions_for_model(
+                model, subclasses=False, parents=True
+            )
+        ]
+        for qs in matches:
+            if qs.model is model:
+                return qs
+        if matches:
+            return matches[0]
+
+        raise ValueError(
+            "%s instances cannot be written, there is no QuerySet of that model."
+            % model.__name__
+        )
+
+    def _group_objects_by_queryset(self, objs):
+        """
+        Group model instances by the QuerySet for their model.
+
+        Returns a dictionary of database alias to a list of tuples of
+        (QuerySet, instances).
+        """
+        objs_by_model = defaultdict(list)
+        for obj in objs:
+            objs_by_model[type(obj)].append(obj)
+
+        groups = defaultdict(list)
+        for model, model_objs in objs_by_model.items():
+            qs = self._get_queryset_for_model(model)
+            alias = qs._db or router.db_for_write(qs.model)
+            groups[alias].append((qs, model_objs))
+        return groups
+
     # Django 4.1 added additional parameters.
     if django.VERSION >= (4, 1):
 
@@ -1025,45 +2242,195 @@ class QuerySetSequence:
             update_fields=None,
             unique_fields=None,
         ):
-            raise NotImplementedError()
-
-        async def abulk_create(self, objs, batch_size=None, ignore_conflicts=False):
-            raise NotImplementedError()
+            objs = list(objs)
+            for alias, querysets in self._group_objects_by_queryset(objs).items():
+                with transaction.atomic(using=alias, savepoint=False):
+                    for qs, model_objs in querysets:
+                        qs.bulk_create(
+                            model_objs,
+                            batch_size=batch_size,
+                            ignore_conflicts=ignore_conflicts,
+                            update_conflicts=update_conflicts,
+                            update_fields=update_fields,
+                            unique_fields=unique_fields,
+                        )
+
+            # The instances are modified in place, return them in input order.
+            return objs
+
+        async def abulk_create(
+            self,
+            objs,
+            batch_size=None,
+            ignore_conflicts=False,
+            update_conflicts=False,
+            update_fields=None,
+            unique_fields=None,
+        ):
+            return await sync_to_async(self.bulk_create)(
+                objs=objs,
+                batch_size=batch_size,
+                ignore_conflicts=ignore_conflicts,
+                update_conflicts=update_conflicts,
+                update_fields=update_fields,
+                unique_fields=unique_fields,
+            )
 
     else:
 
         def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
-            raise NotImplementedError()
+            objs = list(objs)
+            for alias, querysets in self._group_objects_by_queryset(objs).items():
+                with transaction.atomic(using=alias, savepoint=False):
+                    for qs, model_objs in querysets:
+                        qs.bulk_create(
+                            model_objs,
+                            batch_size=batch_size,
+                            ignore_conflicts=ignore_conflicts,
+                        )
+
+            # The instances are modified in place, return them in input order.
+            return objs
 
     def bulk_update(self, objs, fields, batch_size=None):
-        raise NotImplementedError()
+        rows = 0
+        for alias, querysets in self._group_objects_by_queryset(objs).items():
+            with transaction.atomic(using=alias, savepoint=False):
+                for qs, model_objs in querysets:
+                    rows += qs.bulk_update(model_objs, fields, batch_size=batch_size)
+        return rows
 
     if django.VERSION >= (4, 1):
 
         async def abulk_update(self, objs, fields, batch_size=None):
-            raise NotImplementedError()
+            return await sync_to_async(self.bulk_update)(
+                objs=objs, fields=fields, batch_size=batch_size
+            )
 
     def count(self):
-        return sum(qs.count() for qs in self._querysets) - self._low_mark
+        # Groups or duplicates might be combined across QuerySets, so they must
+        # be counted.
+        if self._merge_groups or self._distinct_fields is not None or self._combinator:
+            return len(self)
+
+        # Stop counting once the end of any slice is reached.
+        total = 0
+        with self._collect_stats("count") as stats:
+            for i, qs in zip(self._queryset_idxs, self._querysets):
+                total += track_call(stats, i, qs, qs.count)
+                if self._high_mark is not None and total >= self._high_mark:
+                    break
+        return self._count_in_slice(total)
 
     if django.VERSION >= (4, 1):
 
         async def acount(self):
             awaitables = [qs.acount() for qs in self._querysets]
-            return sum(await asyncio.gather(*awaitables)) - self._low_mark
+            return self._count_in_slice(sum(await asyncio.gather(*awaitables)))
+
+    def _count_in_slice(self, total):
+        """Return how many of total results are within the slice."""
+        if self._high_mark is not None:
+            total = min(total, self._high_mark)
+        return max(total - self._low_mark, 0)
+
+    def _split_in_bulk_ids(self, id_list):
+        """
+        Split the ids given to in_bulk() between the QuerySets.
+
+        Each id is either a value (which might be in any of the QuerySets) or a
+        (model, value) tuple, which is only looked up in QuerySets of that model.
+
+        Returns a list of tuples of (QuerySet index, QuerySet, ids), ids is None
+        to fetch every object. QuerySets which cannot contain any of the ids are
+        skipped.
+        """
+        self._not_support_combined_queries("in_bulk")
+        if self._low_mark or self._high_mark is not None:
+            raise TypeError("Cannot use 'limit' or 'offset' with in_bulk().")
+
+        if id_list is None:
+            return [
+                (i, qs, None) for i, qs in zip(self._queryset_idxs, self._querysets)
+            ]
+
+        # Separate the values for any model from the values for a model.
+        ids = []
+        ids_by_model = defaultdict(list)
+        for value in id_list:
+            if (
+                isinstance(value, tuple)
+                and len(value) == 2
+                and isinstance(value[0], type)
+                and issubclass(value[0], Model)
+            ):
+                ids_by_model[value[0]].append(value[1])
+            else:
+                ids.append(value)
+
+        ids_by_position = defaultdict(list)
+        for model, model_ids in ids_by_model.items():
+            for position in self._get_positions_for_model(model, parents=True):
+                ids_by_position[position].extend(model_ids)
+
+        result = []
+        for position, (i, qs) in enumerate(zip(self._queryset_idxs, self._querysets)):
+            qs_ids = ids + ids_by_position[position]
+            if qs_ids:
+                result.append((i, qs, qs_ids))
+        return result
 
     def in_bulk(self, id_list=None, *, field_name="pk"):
-        raise NotImplementedError()
+        result = {}
+        querysets = self._split_in_bulk_ids(id_list)
+        with self._collect_stats("in_bulk") as stats:
+            for i, qs, ids in querysets:
+                # Django batches the ids based on what the database supports.
+                objs = track_call(
+                    stats,
+                    i,
+                    qs,
+                    functools.partial(qs.in_bulk, ids, field_name=field_name),
+                )
+                for value, obj in objs.items():
+                    setattr(obj, "#", i)
+                    result[(i, value)] = obj
+            self._prefetch_related_objects(list(result.values()))
+            if stats is not None:
+                stats.results = len(result)
+        return result
 
     if django.VERSION >= (4, 1):
 
         async def ain_bulk(self, id_list=None, *, field_name="pk"):
-            raise NotImplementedError()
+            querysets = self._split_in_bulk_ids(id_list)
+            awaitables = [
+                qs.ain_bulk(ids, field_name=field_name) for _, qs, ids in querysets
+            ]
 
-    def iterator(self):
-        clone = self._clone()
-        clone._querysets = [qs.iterator() for qs in self._querysets]
-        return clone
+            result = {}
+            for (i, _, _), objs in zip(querysets, await asyncio.gather(*awaitables)):
+                for value, obj in objs.items():
+                    setattr(obj, "#", i)
+                    result[(i, value)] = obj
+            await sync_to_async(self._prefetch_related_objects)(list(result.values()))
+            return result
+
+    def iterator(self, chunk_size=None):
+        # Stream the results of each QuerySet without caching them.
+        stats = self._start_stats("iterator")
+
+        iterable = iter(
+            self._make_iterable(chunked_fetch=True, chunk_size=chunk_size, stats=stats)
+        )
+        if self._prefetch_lookups:
+            # Prefetching happens for each chunk of results, using the same
+            # default chunk size as Django.
+            iterable = self._prefetch_iterator(iterable, chunk_size or 2000)
+
+        if stats is not None:
+            iterable = self._track_results(iterable, stats)
+        return iterable
 
     if django.VERSION >= (4, 1):
 
@@ -1110,18 +2477,21 @@ class QuerySetSequence:
             fields = self._get_latest_by()
 
         objs = []
-        for qs in self._querysets:
-            try:
-                objs.append(qs.latest(*fields))
-            except ObjectDoesNotExist:
-                pass
+        with self._collect_stats("latest") as stats:
+            for i, qs in zip(self._queryset_idxs, self._querysets):
+                try:
+                    objs.append(
+                        track_call(stats, i, qs, functools.partial(qs.latest, *fields))
+                    )
+                except ObjectDoesNotExist:
+                    pass
 
-        # Checked all QuerySets and no object was found.
-        if not objs:
-            raise self.model.DoesNotExist()
+            # Checked all QuerySets and no object was found.
+            if not objs:
+                raise self.model.DoesNotExist()
 
-        # Return the latest.
-        return self._get_first_or_last(objs, fields, True)
+            # Return the latest.
+            return self._prefetch_result(self._get_first_or_last(objs, fields, True))
 
     if django.VERSION >= (4, 1):
 
@@ -1134,18 +2504,23 @@ class QuerySetSequence:
             fields = self._get_latest_by()
 
         objs = []
-        for qs in self._querysets:
-            try:
-                objs.append(qs.earliest(*fields))
-            except ObjectDoesNotExist:
-                pass
+        with self._collect_stats("earliest") as stats:
+            for i, qs in zip(self._queryset_idxs, self._querysets):
+                try:
+                    objs.append(
+                        track_call(
+                            stats, i, qs, functools.partial(qs.earliest, *fields)
+                        )
+                    )
+                except ObjectDoesNotExist:
+                    pass
 
-        # Checked all QuerySets and no object was found.
-        if not objs:
-            raise self.model.DoesNotExist()
+            # Checked all QuerySets and no object was found.
+            if not objs:
+                raise self.model.DoesNotExist()
 
-        # Return the latest.
-        return self._get_first_or_last(objs, fields, False)
+            # Return the earliest.
+            return self._prefetch_result(self._get_first_or_last(objs, fields, False))
 
     if django.VERSION >= (4, 1):
 
@@ -1159,13 +2534,21 @@ class QuerySetSequence:
         if not self._querysets:
             return None
 
-        elif not self.ordered:
-            return self._querysets[0].first()
+        elif self._combinator:
+            return next(iter(self[:1]), None)
+
+        with self._collect_stats("first") as stats:
+            if not self.ordered:
+                i, qs = self._queryset_idxs[0], self._querysets[0]
+                return self._prefetch_result(track_call(stats, i, qs, qs.first))
 
-        else:
             # Get each first item for each and compare them, return the "first".
-            return self._get_first_or_last(
-                [qs.first() for qs in self._querysets], self._order_by, False
+            objs = [
+                track_call(stats, i, qs, qs.first)
+                for i, qs in zip(self._queryset_idxs, self._querysets)
+            ]
+            return self._prefetch_result(
+                self._get_first_or_last(objs, self._order_by, False)
             )
 
     if django.VERSION >= (4, 1):
@@ -1178,13 +2561,22 @@ class QuerySetSequence:
         if not self._querysets:
             return None
 
-        elif not self.ordered:
-            return self._querysets[-1].last()
+        elif self._combinator:
+            results = list(self)
+            return results[-1] if results else None
+
+        with self._collect_stats("last") as stats:
+            if not self.ordered:
+                i, qs = self._queryset_idxs[-1], self._querysets[-1]
+                return self._prefetch_result(track_call(stats, i, qs, qs.last))
 
-        else:
             # Get each last item for each and compare them, return the "last".
-            return self._get_first_or_last(
-                [qs.last() for qs in self._querysets], self._order_by, True
+            objs = [
+                track_call(stats, i, qs, qs.last)
+                for i, qs in zip(self._queryset_idxs, self._querysets)
+            ]
+            return self._prefetch_result(
+                self._get_first_or_last(objs, self._order_by, True)
             )
 
     if django.VERSION >= (4, 1):
@@ -1192,16 +2584,106 @@ class QuerySetSequence:
         async def alast(self):
             raise NotImplementedError()
 
+    def _split_aggregates(self, args, kwargs):
+        """
+        Split the aggregates into partial aggregates for each QuerySet, see
+        split_aggregates().
+        """
+        self._not_support_combined_queries("aggregate")
+        if self._low_mark or self._high_mark is not None:
+            raise NotImplementedError("Cannot aggregate a sliced QuerySetSequence.")
+
+        for arg in args:
+            # The default_alias property raises TypeError if default_alias
+            # can't be set automatically or AttributeError if it isn't an
+            # attribute.
+            try:
+                alias = arg.default_alias
+            except (AttributeError, TypeError):
+                raise TypeError("Complex aggregates require an alias")
+            if alias in kwargs:
+                raise ValueError(
+                    "The named annotation '%s' conflicts with the default name "
+                    "for another annotation." % alias
+                )
+            kwargs[alias] = arg
+
+        return split_aggregates(kwargs)
+
+    def _can_union_querysets(self):
+        """
+        Whether the QuerySets can be combined into a single UNION ALL query.
+        """
+        if len({qs.db for qs in self._querysets}) != 1:
+            return False
+        if not connections[self._querysets[0].db].features.supports_select_union:
+            return False
+
+        for qs in self._querysets:
+            query = qs.query
+            if (
+                query.is_sliced
+                or query.distinct
+                or query.combinator
+                or query.group_by is not None
+                or any(
+                    getattr(annotation, "contains_aggregate", False)
+                    for annotation in query.annotations.values()
+                )
+            ):
+                return False
+        return True
+
     def aggregate(self, *args, **kwargs):
-        raise NotImplementedError()
+        partials, combiners = self._split_aggregates(args, kwargs)
+        if not partials:
+            return {}
+
+        if len(self._querysets) > 1 and self._can_union_querysets():
+            # Compute the partial aggregates of every QuerySet in a single query,
+            # each QuerySet gives a single row (grouped by a constant).
+            aliases = list(partials)
+            querysets = [
+                annotate_queryset_index(qs.order_by(), i)
+                .values(QUERYSET_INDEX_ALIAS)
+                .annotate(**partials)
+                .values_list(*aliases)
+                for i, qs in enumerate(self._querysets)
+            ]
+            rows = querysets[0].union(*querysets[1:], all=True)
+            with self._collect_stats("aggregate"):
+                results = [dict(zip(aliases, row)) for row in rows]
+        else:
+            with self._collect_stats("aggregate") as stats:
+                results = [
+                    track_call(
+                        stats, i, qs, functools.partial(qs.aggregate, **partials)
+                    )
+                    for i, qs in zip(self._queryset_idxs, self._querysets)
+                ]
+
+        return combine_aggregates(combiners, results)
 
     if django.VERSION >= (4, 1):
 
         async def aaggregate(self, *args, **kwargs):
-            raise NotImplementedError()
+            partials, combiners = self._split_aggregates(args, kwargs)
+            if not partials:
+                return {}
+
+            awaitables = [qs.aaggregate(**partials) for qs in self._querysets]
+            results = await asyncio.gather(*awaitables)
+            return combine_aggregates(combiners, results)
 
     def exists(self):
-        return any(qs.exists() for qs in self._querysets)
+        # The results of a set operation are only known after comparing them.
+        if self._combinator:
+            return bool(self)
+        with self._collect_stats("exists") as stats:
+            return any(
+                track_call(stats, i, qs, qs.exists)
+                for i, qs in zip(self._queryset_idxs, self._querysets)
+            )
 
     if django.VERSION >= (4, 1):
 
@@ -1209,15 +2691,38 @@ class QuerySetSequence:
             awaitables = [qs.aexists() for qs in self._querysets]
             return any(await asyncio.gather(*awaitables, return_exceptions=True))
 
+    def _get_querysets_for_instance(self, obj):
+        """Return the QuerySets which might contain a model instance."""
+        self._not_support_combined_queries("contains")
+        if self._fields is not None:
+            raise TypeError(
+                "Cannot call QuerySetSequence.contains() after .values() or "
+                ".values_list()."
+            )
+        if not isinstance(obj, Model):
+            raise TypeError("'obj' must be a model instance.")
+        if obj.pk is None:
+            raise ValueError(
+                "QuerySetSequence.contains() cannot be used on unsaved objects."
+            )
+        return [
+            self._querysets[position]
+            for position in self._get_positions_for_instance(obj)
+        ]
+
     def contains(self, obj):
-        return any(qs.contains(obj) for qs in self._querysets)
+        return any(qs.contains(obj) for qs in self._get_querysets_for_instance(obj))
 
     if django.VERSION >= (4, 1):
 
-        async def acontains(self):
-            raise NotImplementedError()
+        async def acontains(self, obj):
+            awaitables = [
+                qs.acontains(obj) for qs in self._get_querysets_for_instance(obj)
+            ]
+            return any(await asyncio.gather(*awaitables))
 
     def update(self, **kwargs):
+        self._not_support_combined_queries("update")
         with transaction.atomic():
             return sum(qs.update(**kwargs) for qs in self._querysets)
 
@@ -1227,11 +2732,41 @@ class QuerySetSequence:
             raise NotImplementedError()
 
     def delete(self):
+        """
+        Delete the objects of every QuerySet, see QuerySet.delete().
+
+        The QuerySets using the same database are collected together, so the
+        origin of the pre_delete and post_delete signals is the
+        QuerySetSequence (not one of its QuerySets).
+        """
+        self._not_support_combined_queries("delete")
+        if self._low_mark or self._high_mark is not None:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+        if self._fields is not None:
+            raise TypeError("Cannot call delete() after .values() or .values_list()")
+
+        # Prepare each QuerySet for deletion the same way QuerySet.delete() does,
+        # grouped by database.
+        del_queries = defaultdict(list)
+        for qs in self._querysets:
+            del_query = qs._chain()
+            del_query._for_write = True
+            del_query.query.select_for_update = False
+            del_query.query.select_related = False
+            del_query.query.clear_ordering(force=True)
+            del_queries[del_query.db].append(del_query)
+
         deleted_count = 0
         deleted_objects = defaultdict(int)
-        for qs in self._querysets:
-            # Delete this QuerySet.
-            current_deleted_count, current_deleted_objects = qs.delete()
+        for alias, querysets in del_queries.items():
+            # A single collector for all QuerySets using a database avoids
+            # walking (and deleting) shared cascades multiple times. Anything
+            # which does not need signals or cascades is fast deleted.
+            with transaction.atomic(using=alias, savepoint=False):
+                collector = Collector(using=alias, origin=self)
+                for del_query in querysets:
+                    collector.collect(del_query)
+                current_deleted_count, current_deleted_objects = collector.delete()
 
             # Combine the results.
             deleted_count += current_deleted_count
@@ -1243,7 +2778,7 @@ class QuerySetSequence:
     if django.VERSION >= (4, 1):
 
         async def adelete(self):
-            raise NotImplementedError()
+            return await sync_to_async(self.delete)()
 
     def as_manager(self):
         raise NotImplementedError()
@@ -1269,3 +2804,146 @@ class QuerySetSequence:
     def get_querysets(self):
         """Returns a list of the QuerySet objects which form the sequence."""
         return self._querysets
+
+    def _get_positions_for_model(self, model, subclasses=True, parents=False):
+        """
+        Return the positions of the QuerySets of a model (or of a subclass of it,
+        if subclasses). If parents, QuerySets of a parent model of it are also
+        included.
+        """
+        # Pending operations do not change the model of the QuerySets.
+        models = tuple(qs.model for qs in self._base_querysets)
+        index = build_model_index(models)
+
+        positions = set(index.get(model, ())) if subclasses else set()
+        if parents:
+            for cls in model.__mro__:
+                positions.update(p for p in index.get(cls, ()) if models[p] is cls)
+        return sorted(positions)
+
+    def _get_positions_for_instance(self, obj):
+        """
+        Return the positions of the QuerySets which might contain an instance,
+        i.e. those of the same concrete model.
+        """
+        concrete_model = obj._meta.concrete_model
+        return [
+            position
+            for position in self._get_positions_for_model(concrete_model)
+            if self._base_querysets[position].model._meta.concrete_model
+            is concrete_model
+        ]
+
+    def _for_positions(self, positions):
+        """Return a QuerySetSequence of only the QuerySets at the positions."""
+        clone = self._clone()
+        clone._base_querysets = [
+            clone._base_querysets[position] for position in positions
+        ]
+        clone._queryset_idxs = [self._queryset_idxs[position] for position in positions]
+        return clone
+
+    def for_model(self, model):
+        """
+        Return a QuerySetSequence of only the QuerySets of a model (or of its
+        subclasses, e.g. proxy models). The QuerySet index ('#') of each result
+        is unchanged.
+        """
+        return self._for_positions(self._get_positions_for_model(model))
+
+    def merge_groups(self, enabled=True):
+        """
+        Combine the groups of values(...).annotate(...) across all QuerySets,
+        instead of returning the groups of each QuerySet.
+
+        The aggregates are computed by each QuerySet per group and combined.
+        """
+        self._not_support_combined_queries("merge_groups")
+        clone = self._clone()
+        clone._merge_groups = enabled
+        return clone
+
+    def identity_map(self, enabled=True):
+        """
+        Share related objects (e.g. from select_related()) between the results,
+        across all QuerySets: every related object with the same model and
+        primary key is the same instance.
+        """
+        clone = self._clone()
+        clone._identity_map = enabled
+        return clone
+
+    def explain_sources(self, analyze=False, parallel=None, **options):
+        """
+        Return the plan (a SourcePlan) of each QuerySet, with the estimated cost
+        and rows and warnings about sequential scans on the columns filtered or
+        ordered by. Plans are requested as JSON if the database supports it.
+
+        If analyze, each query is executed to measure its time and the slowest
+        QuerySet is marked. The QuerySets are explained in parallel (each using
+        its own connection) unless parallel is False or a database is in a
+        transaction.
+        """
+        return explain_querysets(
+            self._queryset_idxs,
+            self._querysets,
+            analyze=analyze,
+            parallel=parallel,
+            **options,
+        )
+
+    def check_indexes(self):
+        """
+        Return the indexes (a MissingIndex for each QuerySet) needed to read
+        each QuerySet in the order of this QuerySetSequence: on the fields it
+        is filtered on, followed by the fields it is ordered by.
+
+        The indexes, unique constraints and indexed fields of each model are
+        checked, the database is not queried.
+        """
+        return find_missing_indexes(
+            self._queryset_idxs, self._querysets, self._order_by
+        )
+
+    def query_budget(self, max_queries=None, max_rows=None, action="raise", **kwargs):
+        """
+        A context manager limiting the queries made and rows fetched by each
+        evaluation of this QuerySetSequence (or a clone of it) in the block.
+        Going over either raises QueryBudgetExceeded (or logs, if action is
+        "log") naming the QuerySet and the operation responsible.
+        """
+        return query_budget(
+            max_queries, max_rows, action, scope=self._budget_scope, **kwargs
+        )
+
+    def collect_stats(self, enabled=True):
+        """
+        Record statistics about each evaluation (iterating, count(), exists(),
+        get(), etc.) of this QuerySetSequence and its clones, see last_stats.
+        """
+        clone = self._clone()
+        clone._stats_recorder = StatsRecorder() if enabled else None
+        return clone
+
+    @property
+    def last_stats(self):
+        """
+        The statistics (an EvaluationStats) of the last evaluation of this
+        QuerySetSequence or of a clone of it, if collect_stats() was called.
+        """
+        if self._stats_recorder is None:
+            return None
+        return self._stats_recorder.last
+
+    def cache_sql(self, enabled=True):
+        """
+        Cache the compiled SQL of each QuerySet, keyed on the shared QuerySet and
+        the operations applied to it (e.g. filter() or order_by()) with their
+        arguments. Clones with the same operations (e.g. from all() on a
+        QuerySetSequence defined on a view) reuse the SQL instead of compiling it.
+
+        Operations with unhashable arguments are not cached.
+        """
+        clone = self._clone()
+        clone._cache_sql = enabled
+        return clone
@@ -0,0 +1,189 @@
+"""
+Computing aggregates across the QuerySets of a QuerySetSequence.
+
+Each aggregate is split into partial aggregates which each QuerySet computes in
+the database (e.g. an average becomes a sum and a count), the partial results
+are then combined in Python.
+
+"""
+from functools import reduce
+from math import sqrt
+from operator import add
+
+from django.db.models import (
+    Avg,
+    Count,
+    FloatField,
+    Func,
+    Max,
+    Min,
+    StdDev,
+    Sum,
+    Value,
+    Variance,
+)
+from django.db.models.functions import Cast
+
+
+def _not_null(values):
+    """Remove any NULL results, which are ignored by aggregates."""
+    return [v for v in values if v is not None]
+
+
+def _reduce(func, values):
+    """Combine the values with func, or return None if there are no values."""
+    values = _not_null(values)
+    if not values:
+        return None
+    return reduce(func, values)
+
+
+def split_aggregate(aggregate):
+    """
+    Split an aggregate into partial aggregates which can be computed by each
+    QuerySet.
+
+    Returns a tuple of the list of partial aggregates and a function which
+    combines them. The function is called with one argument per partial
+    aggregate: a list of the results of that partial aggregate for each QuerySet.
+    """
+    name = aggregate.__class__.__name__
+    if getattr(aggregate, "distinct", False):
+        raise NotImplementedError(
+            "%s(distinct=True) cannot be combined across QuerySets." % name
+        )
+
+    # Skip the filter, which gets passed separately.
+    expressions = Func.get_source_expressions(aggregate)
+    filter = aggregate.filter
+
+    if isinstance(aggregate, Avg):
+        partials = [
+            Sum(*expressions, filter=filter),
+            Count(*expressions, filter=filter),
+        ]
+
+        def combine(sums, counts):
+            total = _reduce(add, sums)
+            count = sum(counts)
+            if not count:
+                return None
+            return total / count
+
+    elif isinstance(aggregate, (StdDev, Variance)):
+        # Each QuerySet computes its count, mean and population variance, which
+        # are combined with the parallel algorithm of Chan et al. This doesn't
+        # lose precision when the mean is large compared to the spread, unlike
+        # computing it from the sum of the squares.
+        sample = aggregate.function.endswith("_SAMP")
+        value = Cast(expressions[0], FloatField())
+        partials = [
+            Count(expressions[0], filter=filter),
+            Avg(value, filter=filter),
+            Variance(value, filter=filter),
+        ]
+        is_stddev = isinstance(aggregate, StdDev)
+
+        def combine(counts, means, variances):
+            count = 0
+            mean = 0.0
+            # The sum of the squared differences from the mean.
+            m2 = 0.0
+            for qs_count, qs_mean, qs_variance in zip(counts, means, variances):
+                if not qs_count:
+                    continue
+                delta = float(qs_mean) - mean
+                total = count + qs_count
+                mean += delta * qs_count / total
+                m2 += (
+                    float(qs_variance) * qs_count
+                    + delta * delta * count * qs_count / total
+                )
+                count = total
+
+            degrees = count - 1 if sample else count
+            if degrees <= 0:
+                return None
+            variance = m2 / degrees
+            return sqrt(variance) if is_stddev else variance
+
+    elif isinstance(aggregate, Sum):
+        partials = [Sum(*expressions, filter=filter)]
+
+        def combine(sums):
+            return _reduce(add, sums)
+
+    elif isinstance(aggregate, Count):
+        partials = [Count(*expressions, filter=filter)]
+
+        def combine(counts):
+            return sum(counts)
+
+    elif isinstance(aggregate, Min):
+        partials = [Min(*expressions, filter=filter)]
+
+        def combine(values):
+            return _reduce(min, values)
+
+    elif isinstance(aggregate, Max):
+        partials = [Max(*expressions, filter=filter)]
+
+        def combine(values):
+            return _reduce(max, values)
+
+    else:
+        raise NotImplementedError(
+            "%s cannot be combined across QuerySets, only Avg, Count, Max, Min, "
+            "StdDev, Sum and Variance are supported." % name
+        )
+
+    # The default applies to the combined result, not to each QuerySet.
+    default = getattr(aggregate, "default", None)
+    if isinstance(default, Value):
+        default = default.value
+    elif hasattr(default, "resolve_expression"):
+        raise NotImplementedError(
+            "%s with a default expression cannot be combined across QuerySets." % name
+        )
+
+    if default is None:
+        return partials, combine
+
+    def combine_with_default(*results):
+        result = combine(*results)
+        return default if result is None else result
+
+    return partials, combine_with_default
+
+
+def split_aggregates(aggregates):
+    """
+    Split a dictionary of aggregates (by alias) into partial aggregates.
+
+    Returns a tuple of the partial aggregates (by alias) and a dictionary of
+    alias to a tuple of the aliases of the partial aggregates and the function
+    which combines them.
+    """
+    partials = {}
+    combiners = {}
+    for alias, aggregate in aggregates.items():
+        partial_aliases = []
+        partial_aggregates, combine = split_aggregate(aggregate)
+        for partial in partial_aggregates:
+            partial_alias = "_partial_%d" % len(partials)
+            partials[partial_alias] = partial
+            partial_aliases.append(partial_alias)
+        combiners[alias] = (partial_aliases, combine)
+
+    return partials, combiners
+
+
+def combine_aggregates(combiners, results):
+    """
+    Combine the results of the partial aggregates from each QuerySet (a list of
+    dictionaries) into the final results.
+    """
+    return {
+        alias: combine(*[[r[p] for r in results] for p in partial_aliases])
+        for alias, (partial_aliases, combine) in combiners.items()
+    }
@@ -0,0 +1,173 @@
+"""
+Limits on the queries made and rows fetched by each evaluation of a
+QuerySetSequence, e.g. to catch a count() querying many tables or related
+objects being loaded lazily (N+1 queries) while merging ordered QuerySets in
+development.
+
+Budgets apply to the evaluations of a QuerySetSequence (and its clones) inside
+QuerySetSequence.query_budget(), to all evaluations inside query_budget() or to
+all evaluations if the QUERYSET_SEQUENCE_QUERY_BUDGET setting is a dict of the
+arguments of QueryBudget, e.g.::
+
+    QUERYSET_SEQUENCE_QUERY_BUDGET = {"max_queries": 50, "action": "log"}
+
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from queryset_sequence.signals import logger
+
+# The budgets of the current context, as (scope, QueryBudget) tuples. The scope
+# is shared by a QuerySetSequence and its clones, or None for all of them.
+_active_budgets = ContextVar("queryset_sequence_budgets", default=())
+
+
+class QueryBudgetExceeded(Exception):
+    """An evaluation of a QuerySetSequence went over its budget."""
+
+    def __init__(self, message, stats):
+        super().__init__(message)
+        # The EvaluationStats of the evaluation, so far.
+        self.stats = stats
+
+
+class QueryBudget:
+    """
+    The maximum queries made and rows fetched by an evaluation of a
+    QuerySetSequence. As soon as either is exceeded the action is taken: "raise"
+    (QueryBudgetExceeded) or "log" (once per evaluation).
+    """
+
+    def __init__(
+        self,
+        max_queries=None,
+        max_rows=None,
+        action="raise",
+        logger=logger,
+        level=logging.WARNING,
+    ):
+        if action not in ("raise", "log"):
+            raise ValueError("action must be 'raise' or 'log', not %r." % action)
+        self.max_queries = max_queries
+        self.max_rows = max_rows
+        self.action = action
+        self.logger = logger
+        self.level = level
+
+    def check_queries(self, stats, index):
+        """Called before each query, index is the QuerySet making it (or None)."""
+        # Only act on the query going over the budget.
+        if self.max_queries is None or stats.queries != self.max_queries + 1:
+            return
+        if index is None:
+            responsible = (
+                "not made by one of the QuerySets (e.g. loading a related object "
+                "lazily)"
+            )
+        else:
+            responsible = "made by %s" % _describe_source(stats, index)
+        self._exceeded(
+            stats,
+            "%d queries: query %d was %s. Queries by QuerySet: %s; outside of the "
+            "QuerySets: %d."
+            % (
+                self.max_queries,
+                stats.queries,
+                responsible,
+                _summarize(stats, "queries"),
+                stats.queries - sum(s.queries for s in stats.sources.values()),
+            ),
+        )
+
+    def check_rows(self, stats, index):
+        """Called after each row fetched, index is the QuerySet fetched from."""
+        if self.max_rows is None or stats.fetched != self.max_rows + 1:
+            return
+        self._exceeded(
+            stats,
+            "%d rows: row %d was fetched from %s. Rows by QuerySet: %s."
+            % (
+                self.max_rows,
+                stats.fetched,
+                _describe_source(stats, index),
+                _summarize(stats, "fetched"),
+            ),
+        )
+
+    def _exceeded(self, stats, details):
+        message = "QuerySetSequence %s exceeded its budget of %s" % (
+            _describe_operation(stats),
+            details,
+        )
+        if self.action == "raise":
+            raise QueryBudgetExceeded(message, stats)
+        self.logger.log(self.level, message)
+
+    def __repr__(self):
+        return "<QueryBudget: max_queries=%s max_rows=%s action=%s>" % (
+            self.max_queries,
+            self.max_rows,
+            self.action,
+        )
+
+
+def _describe_operation(stats):
+    if stats.method == "iterate":
+        operation = "iteration"
+    else:
+        operation = "%s()" % stats.method
+    if stats.strategies:
+        operation += " (%s)" % ", ".join(stats.strategies)
+    return operation
+
+
+def _describe_source(stats, index):
+    source = stats.source(index)
+    return "QuerySet #%d (%s) on database %r" % (
+        index,
+        source.model.__name__ if source.model else None,
+        source.using,
+    )
+
+
+def _summarize(stats, attr, limit=5):
+    """The top QuerySets by an attribute of their SourceStats."""
+    sources = sorted(
+        stats.sources.values(), key=lambda source: getattr(source, attr), reverse=True
+    )
+    summary = ", ".join(
+        "#%d: %d" % (source.index, getattr(source, attr)) for source in sources[:limit]
+    )
+    if len(sources) > limit:
+        summary += ", ... (%d QuerySets)" % len(sources)
+    return summary or "none"
+
+
+@contextmanager
+def query_budget(max_queries=None, max_rows=None, action="raise", scope=None, **kwargs):
+    """
+    Apply a QueryBudget to the evaluations of QuerySetSequences in the block,
+    only to those with the scope if it is not None.
+    """
+    budget = QueryBudget(max_queries, max_rows, action, **kwargs)
+    token = _active_budgets.set((*_active_budgets.get(), (scope, budget)))
+    try:
+        yield budget
+    finally:
+        _active_budgets.reset(token)
+
+
+def get_budgets(scope):
+    """Return the budgets which apply to an evaluation."""
+    budgets = [
+        budget
+        for budget_scope, budget in _active_budgets.get()
+        if budget_scope is None or budget_scope is scope
+    ]
+    setting = getattr(settings, "QUERYSET_SEQUENCE_QUERY_BUDGET", None)
+    if setting:
+        budgets.append(QueryBudget(**setting))
+    return budgets
@@ -0,0 +1,94 @@
+"""
+Removing duplicate results across the QuerySets of a QuerySetSequence.
+
+"""
+import pickle
+import sqlite3
+
+# The default number of keys kept in memory before spilling to disk.
+DISTINCT_MAX_IN_MEMORY = 100_000
+
+
+class SpillingSet:
+    """
+    A set which keeps up to max_in_memory items in memory, any further items are
+    stored (pickled) in a temporary SQLite database on disk.
+
+    Items on disk are looked up by their hash and compared for equality in
+    Python, as in a set: pickles of equal items can differ (e.g. 1 and 1.0).
+
+    Only supports adding items.
+    """
+
+    def __init__(self, max_in_memory=DISTINCT_MAX_IN_MEMORY):
+        self._max_in_memory = max_in_memory
+        self._memory = set()
+        self._db = None
+
+    def add(self, item):
+        """Add an item, returns whether it was not already in the set."""
+        if item in self._memory:
+            return False
+        if len(self._memory) < self._max_in_memory:
+            self._memory.add(item)
+            return True
+
+        if self._db is None:
+            # An empty filename is a private, temporary on-disk database which is
+            # deleted when closed.
+            self._db = sqlite3.connect("")
+            self._db.execute("CREATE TABLE seen (hash INTEGER, item BLOB)")
+            self._db.execute("CREATE INDEX seen_hash ON seen (hash)")
+
+        item_hash = hash(item)
+        for (stored,) in self._db.execute(
+            "SELECT item FROM seen WHERE hash = ?", (item_hash,)
+        ):
+            if pickle.loads(stored) == item:
+                return False
+        self._db.execute(
+            "INSERT INTO seen VALUES (?, ?)",
+            (item_hash, pickle.dumps(item, pickle.HIGHEST_PROTOCOL)),
+        )
+        return True
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def dedupe(results, key, max_in_memory=DISTINCT_MAX_IN_MEMORY):
+    """
+    Yield the results which have not been seen before, by key.
+
+    Memory is bounded by max_in_memory keys, past that keys are stored on disk.
+    """
+    seen = SpillingSet(max_in_memory)
+    try:
+        for result in results:
+            if seen.add(key(result)):
+                yield result
+    finally:
+        seen.close()
+
+
+def dedupe_sorted(results, key, run_key):
+    """
+    Yield the results which have not been seen before, by key.
+
+    The results must be sorted such that duplicates are in the same run of
+    results with an equal run_key, only the keys of the current run are kept.
+    """
+    seen = set()
+    current_run = object()
+    for result in results:
+        run = run_key(result)
+        if run != current_run:
+            current_run = run
+            seen.clear()
+
+        result_key = key(result)
+        if result_key not in seen:
+            seen.add(result_key)
+            yield result
@@ -0,0 +1,293 @@
+"""
+Structured plans of the QuerySets of a QuerySetSequence, see
+QuerySetSequence.explain_sources().
+
+The plan of each QuerySet is requested as JSON where the backend supports it
+(PostgreSQL, MySQL / MariaDB) and parsed for the estimated cost and rows. Plans
+of other backends (e.g. SQLite) are kept as text, only scans are detected.
+
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.db.models.expressions import Col
+
+# The maximum number of threads (each with its own database connection) used to
+# explain the QuerySets in parallel.
+MAX_WORKERS = 8
+
+
+class SourcePlan:
+    """The plan of one of the QuerySets of a QuerySetSequence."""
+
+    def __init__(self, index, qs):
+        # The index of the QuerySet (as returned by '#').
+        self.index = index
+        # The model and the database alias of the QuerySet.
+        self.model = qs.model
+        self.using = qs.db
+        # The plan, as returned by QuerySet.explain(), and the format of it.
+        self.plan = None
+        self.format = None
+        # The estimated cost (in the units of the database) and rows, if the
+        # database provides them.
+        self.cost = None
+        self.rows = None
+        # The time (in seconds) to execute the query, only when analyzing.
+        self.time = None
+        # Problems found in the plan, e.g. sequential scans.
+        self.warnings = []
+        # Whether it is the slowest QuerySet, only when analyzing.
+        self.slowest = False
+
+    def __repr__(self):
+        return "<SourcePlan #%d: cost=%s rows=%s time=%s warnings=%d>" % (
+            self.index,
+            self.cost,
+            self.rows,
+            self.time,
+            len(self.warnings),
+        )
+
+    def __str__(self):
+        summary = "#%d %s (%s): cost=%s rows=%s" % (
+            self.index,
+            self.model.__name__,
+            self.using,
+            self.cost,
+            self.rows,
+        )
+        if self.time is not None:
+            summary += " time=%.6fs" % self.time
+        if self.slowest:
+            summary += " [slowest]"
+        lines = [summary]
+        lines.extend("Warning: %s" % warning for warning in self.warnings)
+        lines.append(self.plan)
+        return "\n".join(lines)
+
+
+def _get_fields(node):
+    """Yield the fields referenced by a WhereNode (or an expression)."""
+    if hasattr(node, "children"):
+        for child in node.children:
+            yield from _get_fields(child)
+    elif isinstance(node, Col):
+        yield node.target
+    elif hasattr(node, "get_source_expressions"):
+        for expression in node.get_source_expressions():
+            if expression is not None:
+                yield from _get_fields(expression)
+
+
+def get_filter_fields(qs):
+    """The fields a QuerySet is filtered on (of any model), in order."""
+    return list(dict.fromkeys(_get_fields(qs.query.where)))
+
+
+def get_filter_columns(qs):
+    """The columns a QuerySet is filtered on, by table."""
+    columns = {}
+    for field in get_filter_fields(qs):
+        columns.setdefault(field.model._meta.db_table, []).append(field.column)
+    return columns
+
+
+def get_ordering(qs):
+    """The fields (or expressions) a QuerySet is ordered by."""
+    query = qs.query
+    if query.order_by:
+        ordering = query.order_by
+    elif query.default_ordering:
+        ordering = query.get_meta().ordering
+    else:
+        ordering = ()
+    return [
+        field.lstrip("-") if isinstance(field, str) else str(field)
+        for field in ordering
+    ]
+
+
+def _scan_warnings(table, filters, ordering, filtered, sorted_):
+    """The warnings of a full scan of a table."""
+    warnings = []
+    filters = filters.get(table)
+    if filtered and filters:
+        warnings.append(
+            "Sequential scan on %s filtering on %s." % (table, ", ".join(filters))
+        )
+    if sorted_ and ordering:
+        warnings.append(
+            "Sequential scan on %s sorted by %s." % (table, ", ".join(ordering))
+        )
+    return warnings
+
+
+def parse_postgresql(source, plan, filters, ordering):
+    """Parse the JSON plan of PostgreSQL."""
+    root = json.loads(plan)[0]
+    node = root["Plan"]
+    source.cost = node.get("Total Cost")
+    source.rows = node.get("Plan Rows")
+    if "Execution Time" in root:
+        # In milliseconds.
+        source.time = root["Execution Time"] / 1000
+
+    def walk(node, sorted_):
+        sorted_ = sorted_ or node.get("Node Type") in ("Sort", "Incremental Sort")
+        if node.get("Node Type") == "Seq Scan":
+            source.warnings.extend(
+                _scan_warnings(
+                    node.get("Relation Name"),
+                    filters,
+                    ordering,
+                    "Filter" in node,
+                    sorted_,
+                )
+            )
+        for child in node.get("Plans", ()):
+            walk(child, sorted_)
+
+    walk(node, False)
+
+
+def parse_mysql(source, plan, filters, ordering):
+    """Parse the JSON plan of MySQL / MariaDB."""
+    block = json.loads(plan)["query_block"]
+    cost = block.get("cost_info", {}).get("query_cost")
+    source.cost = float(cost) if cost is not None else None
+
+    def walk(value, sorted_):
+        if isinstance(value, list):
+            for item in value:
+                walk(item, sorted_)
+            return
+        if not isinstance(value, dict):
+            return
+
+        sorted_ = sorted_ or value.get("using_filesort", False)
+        table = value.get("table")
+        if isinstance(table, dict):
+            rows = table.get("rows_produced_per_join", table.get("rows"))
+            if rows is not None:
+                source.rows = rows
+            if table.get("access_type") == "ALL":
+                source.warnings.extend(
+                    _scan_warnings(
+                        table.get("table_name"),
+                        filters,
+                        ordering,
+                        "attached_condition" in table,
+                        sorted_,
+                    )
+                )
+        for key, item in value.items():
+            if key != "table":
+                walk(item, sorted_)
+
+    walk(block, False)
+
+
+def parse_text(source, plan, filters, ordering):
+    """
+    Parse the text plan of SQLite (other text plans are not parsed). The cost
+    and rows are not available.
+    """
+    scans = []
+    sorted_ = False
+    for line in plan.splitlines():
+        # Each line is "id parent notused detail".
+        detail = line.split(" ", 3)[-1]
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            scans.append(detail.split()[1])
+        elif detail.startswith("USE TEMP B-TREE FOR") and "ORDER BY" in detail:
+            sorted_ = True
+
+    for table in scans:
+        source.warnings.extend(_scan_warnings(table, filters, ordering, True, sorted_))
+
+
+def explain_queryset(index, qs, analyze=False, **options):
+    """Return the SourcePlan of one of the QuerySets."""
+    source = SourcePlan(index, qs)
+    connection = connections[qs.db]
+    features = connection.features
+
+    if "format" not in options and "JSON" in features.supported_explain_formats:
+        options["format"] = "json"
+    source.format = (options.get("format") or "text").lower()
+    # Only PostgreSQL returns the execution time in a JSON plan, otherwise the
+    # query is executed (and timed) separately.
+    explain_analyze = analyze and connection.vendor == "postgresql"
+    if explain_analyze:
+        options["analyze"] = True
+
+    source.plan = qs.explain(**options)
+
+    filters = get_filter_columns(qs)
+    ordering = get_ordering(qs)
+    if source.format == "json":
+        if connection.vendor == "postgresql":
+            parse_postgresql(source, source.plan, filters, ordering)
+        elif connection.vendor == "mysql":
+            parse_mysql(source, source.plan, filters, ordering)
+    elif connection.vendor == "sqlite":
+        parse_text(source, source.plan, filters, ordering)
+
+    if analyze and source.time is None:
+        start = time.perf_counter()
+        for _ in qs.iterator():
+            pass
+        source.time = time.perf_counter() - start
+
+    return source
+
+
+def _explain_in_thread(index, qs, analyze, options):
+    try:
+        return explain_queryset(index, qs, analyze, **options)
+    finally:
+        # Close the connections opened by this thread.
+        connections.close_all()
+
+
+def can_run_in_parallel(using):
+    """
+    Whether queries on a database can be made from other threads (i.e. other
+    connections) and see the same data, e.g. not inside a transaction.
+    """
+    connection = connections[using]
+    return (
+        connection.features.test_db_allows_multiple_connections
+        and not connection.in_atomic_block
+    )
+
+
+def explain_querysets(indexes, querysets, analyze=False, parallel=None, **options):
+    """
+    Return the SourcePlan of each QuerySet. The QuerySets are explained in
+    parallel if possible, unless parallel is False.
+    """
+    if parallel is None:
+        parallel = len(querysets) > 1 and all(
+            can_run_in_parallel(qs.db) for qs in querysets
+        )
+
+    if parallel:
+        with ThreadPoolExecutor(min(len(querysets), MAX_WORKERS)) as executor:
+            futures = [
+                executor.submit(_explain_in_thread, index, qs, analyze, dict(options))
+                for index, qs in zip(indexes, querysets)
+            ]
+            sources = [future.result() for future in futures]
+    else:
+        sources = [
+            explain_queryset(index, qs, analyze, **options)
+            for index, qs in zip(indexes, querysets)
+        ]
+
+    if analyze and sources:
+        max(sources, key=lambda source: source.time).slowest = True
+    return sources
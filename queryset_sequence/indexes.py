@@ -0,0 +1,243 @@
+"""
+Find the indexes missing for the ordering and filtering of a QuerySetSequence,
+see QuerySetSequence.check_indexes().
+
+Merging ordered QuerySets (and paginating them with a cursor) reads each
+QuerySet in order, this is only efficient if every QuerySet can be read from an
+index starting with the columns it is filtered on, followed by the columns the
+QuerySetSequence is ordered by.
+
+check_view_indexes() is a system check for the QuerySetSequences of the views
+in the URLconf. It is not registered by default, to enable it::
+
+    from django.core import checks
+    from queryset_sequence.indexes import check_view_indexes
+
+    checks.register(check_view_indexes, checks.Tags.models)
+
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.db.models import UniqueConstraint
+from django.urls import get_resolver
+
+from queryset_sequence.explain import get_filter_fields
+
+
+class MissingIndex:
+    """An index missing for one of the QuerySets of a QuerySetSequence."""
+
+    def __init__(self, index, model, filters, ordering):
+        # The index of the QuerySet (as returned by '#').
+        self.index = index
+        self.model = model
+        # The names of the fields the QuerySet is filtered on and the
+        # QuerySetSequence is ordered by.
+        self.filters = filters
+        self.ordering = ordering
+
+    @property
+    def fields(self):
+        """The fields of the missing index, in order."""
+        return (*self.filters, *self.ordering)
+
+    @property
+    def hint(self):
+        return "Add models.Index(fields=%r) to %s.Meta.indexes." % (
+            list(self.fields),
+            self.model.__name__,
+        )
+
+    def __repr__(self):
+        return "<MissingIndex #%d: %s(%s)>" % (
+            self.index,
+            self.model.__name__,
+            ", ".join(self.fields),
+        )
+
+    def __str__(self):
+        reasons = []
+        if self.filters:
+            reasons.append("filtering on %s" % ", ".join(self.filters))
+        if self.ordering:
+            reasons.append("ordering by %s" % ", ".join(self.ordering))
+        return "QuerySet #%d (%s) has no index on (%s) for %s." % (
+            self.index,
+            self.model.__name__,
+            ", ".join(self.fields),
+            " and ".join(reasons),
+        )
+
+
+def _get_local_field(opts, name):
+    """Return a field of the table of the model, or None."""
+    if name == "pk":
+        return opts.pk
+    try:
+        field = opts.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field in opts.local_concrete_fields:
+        return field
+    return None
+
+
+def get_indexes(model):
+    """
+    Return the fields (by name) of each index on the table of a model: from
+    Meta.indexes, unique constraints and fields with db_index or unique.
+    Partial and expression indexes are ignored.
+    """
+    opts = model._meta.concrete_model._meta
+    field_lists = []
+    for index in opts.indexes:
+        if index.fields and index.condition is None:
+            field_lists.append([name.lstrip("-") for name in index.fields])
+    for constraint in opts.constraints:
+        if (
+            isinstance(constraint, UniqueConstraint)
+            and constraint.fields
+            and constraint.condition is None
+        ):
+            field_lists.append(constraint.fields)
+    field_lists.extend(opts.unique_together)
+    # Removed in Django 5.1.
+    field_lists.extend(getattr(opts, "index_together", ()))
+
+    indexes = [
+        (field.name,)
+        for field in opts.local_concrete_fields
+        if field.db_index or field.unique
+    ]
+    for names in field_lists:
+        fields = [_get_local_field(opts, name) for name in names]
+        if None not in fields:
+            indexes.append(tuple(field.name for field in fields))
+    return indexes
+
+
+def get_ordering_fields(model, order_by):
+    """
+    Return the names of the fields of the table of a model which an ordering
+    (of a QuerySetSequence) needs indexed. Ordering by '#' needs no index, the
+    fields after one which is not of the table (e.g. of a related model) can't
+    use an index.
+    """
+    opts = model._meta.concrete_model._meta
+    names = []
+    for name in order_by:
+        name = name.lstrip("-")
+        if name == "#":
+            continue
+        field = _get_local_field(opts, name)
+        if field is None:
+            break
+        names.append(field.name)
+    return list(dict.fromkeys(names))
+
+
+def is_covered(indexes, filters, ordering):
+    """
+    Whether one of the indexes starts with the filtered fields (in any order),
+    followed by the ordered fields.
+    """
+    for fields in indexes:
+        if len(fields) < len(filters) + len(ordering):
+            continue
+        if set(fields[: len(filters)]) != set(filters):
+            continue
+        if tuple(fields[len(filters) : len(filters) + len(ordering)]) == tuple(
+            ordering
+        ):
+            return True
+    return False
+
+
+def find_missing_indexes(indexes, querysets, order_by):
+    """Return a MissingIndex for each QuerySet not covered by an index."""
+    missing = []
+    seen = set()
+    for index, qs in zip(indexes, querysets):
+        model = qs.model
+        opts = model._meta.concrete_model._meta
+        filters = list(
+            dict.fromkeys(
+                field.name
+                for field in get_filter_fields(qs)
+                if field in opts.local_concrete_fields
+            )
+        )
+        ordering = [
+            name for name in get_ordering_fields(model, order_by) if name not in filters
+        ]
+        if not filters and not ordering:
+            continue
+        if is_covered(get_indexes(model), filters, ordering):
+            continue
+
+        # Report each index once, e.g. for multiple QuerySets of a model.
+        key = (opts.concrete_model, tuple(filters), tuple(ordering))
+        if key not in seen:
+            seen.add(key)
+            missing.append(MissingIndex(index, model, filters, ordering))
+    return missing
+
+
+def _get_view_classes(patterns):
+    """Yield the class of each class-based view of the URL patterns."""
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from _get_view_classes(pattern.url_patterns)
+            continue
+        # Django sets view_class, Django REST Framework viewsets set cls.
+        view_class = getattr(pattern.callback, "view_class", None) or getattr(
+            pattern.callback, "cls", None
+        )
+        if view_class is not None:
+            yield view_class
+
+
+def check_view_indexes(app_configs=None, **kwargs):
+    """
+    A system check for indexes missing for the QuerySetSequence (the queryset
+    attribute) of each class-based view in the URLconf, including the ordering
+    of a cursor pagination class.
+    """
+    from queryset_sequence import QuerySetSequence
+
+    if not getattr(settings, "ROOT_URLCONF", None):
+        return []
+
+    warnings = []
+    for view_class in dict.fromkeys(_get_view_classes(get_resolver().url_patterns)):
+        qss = getattr(view_class, "queryset", None)
+        if not isinstance(qss, QuerySetSequence):
+            continue
+
+        pagination_class = getattr(view_class, "pagination_class", None)
+        ordering = getattr(pagination_class, "ordering", None)
+        if ordering:
+            if isinstance(ordering, str):
+                ordering = (ordering,)
+            # Keyset pagination also orders by the primary key.
+            if hasattr(pagination_class, "get_key_ordering"):
+                ordering = pagination_class().get_key_ordering(ordering)
+            qss = qss.order_by(*ordering)
+
+        try:
+            missing_indexes = qss.check_indexes()
+        except FieldError:
+            # E.g. the ordering of the pagination class is not a field, this
+            # is reported when the view is used.
+            continue
+        for missing in missing_indexes:
+            warnings.append(
+                checks.Warning(
+                    str(missing),
+                    hint=missing.hint,
+                    obj=view_class,
+                    id="queryset_sequence.W001",
+                )
+            )
+    return warnings
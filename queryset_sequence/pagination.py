@@ -4,14 +4,23 @@ Framework.
 
 The standard Django REST Framework pagination classes will work fine. The
 classes provided here are useful when providing large datasets that use
-QuerySetSequence over an API as they first order by the QuerySet number and then
-particular fields.
+QuerySetSequence over an API: SequenceCursorPagination first orders by the
+QuerySet number and then particular fields, SequenceKeysetPagination orders by
+particular fields across all QuerySets.
 
 """
-from base64 import b64decode
+import binascii
+import json
+import zlib
+from base64 import b64decode, urlsafe_b64decode, urlsafe_b64encode
+from itertools import islice
 from urllib import parse
 
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
 from queryset_sequence import QuerySetSequence
+from queryset_sequence.stats import track_call
 
 try:
     from rest_framework.exceptions import NotFound
@@ -21,6 +30,7 @@ try:
         _positive_int,
         _reverse_ordering,
     )
+    from rest_framework.utils.urls import replace_query_param
 except ImportError:
     # This requires Django REST Framework to be installed.
     raise ImportError(
@@ -216,3 +226,388 @@ class SequenceCursorPagination(CursorPagination):
             raise NotFound(self.invalid_cursor_message)
 
         return Cursor(offset=offset, reverse=reverse, position=position)
+
+
+def _keyset_filter(ordering, position, index, inclusive=False):
+    """
+    Return the filter of the rows of the QuerySet with the index which come
+    after the position (the values of the ordering fields) in the ordering, or
+    are at it if inclusive. It is True if every row does, False if none does.
+    """
+    result = inclusive
+    # Build up from the last field: a row comes after the position if it comes
+    # after it by a field, or is equal by that field and comes after it by the
+    # next fields.
+    for order, value in reversed(list(zip(ordering, position))):
+        is_reversed = order.startswith("-")
+        field_name = order.lstrip("-")
+
+        # The QuerySet index is the same for every row of a QuerySet.
+        if field_name == "#":
+            if index != value:
+                result = (index < value) == is_reversed
+            continue
+
+        lookup = "lt" if is_reversed else "gt"
+        if result is True:
+            # Equal is enough.
+            result = Q(**{"%s__%se" % (field_name, lookup): value})
+        elif result is False:
+            result = Q(**{"%s__%s" % (field_name, lookup): value})
+        else:
+            result = Q(**{"%s__%s" % (field_name, lookup): value}) | (
+                Q(**{field_name: value}) & result
+            )
+    return result
+
+
+class SequenceKeysetPagination(CursorPagination):
+    """
+    Cursor pagination of a QuerySetSequence interleaved by an ordering across
+    all QuerySets (e.g. '-created' for the latest items of every QuerySet).
+
+    The cursor is the position of the last item of the page: its values of the
+    ordering fields, followed by the QuerySet number ('#') and the primary key
+    to break ties. The next page filters each QuerySet to the items after the
+    position and fetches at most a page (and an item) from each, so every page
+    costs the same however deep it is.
+
+    The ordering fields must not be nullable and must be fields of the models.
+    """
+
+    def get_key_ordering(self, ordering):
+        """The ordering with the QuerySet number and primary key to break ties."""
+        field_names = [order.lstrip("-") for order in ordering]
+        key = tuple(ordering)
+        if "#" not in field_names:
+            key += ("#",)
+        if "pk" not in field_names:
+            key += ("pk",)
+        return key
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # This code only works with a QuerySetSequence.
+        if not isinstance(queryset, QuerySetSequence):
+            raise ValueError(
+                "%s can only be used with an instance of QuerySetSequence."
+                % self.__class__.__name__
+            )
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.key_ordering = self.get_key_ordering(self.ordering)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (reverse, current_position) = (False, None)
+        else:
+            (reverse, current_position) = (self.cursor.reverse, self.cursor.position)
+
+        ordering = self.key_ordering
+        if reverse:
+            ordering = _reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+
+        # Only keep the items after the position in each QuerySet.
+        if current_position is not None:
+            querysets = []
+            for index, qs in zip(queryset._queryset_idxs, queryset._querysets):
+                keyset_filter = _keyset_filter(ordering, current_position, index)
+                if keyset_filter is False:
+                    qs = qs.none()
+                elif keyset_filter is not True:
+                    try:
+                        qs = qs.filter(keyset_filter)
+                    except (TypeError, ValueError, ValidationError):
+                        # A value of the position is invalid for its field.
+                        raise NotFound(self.invalid_cursor_message)
+                querysets.append(qs)
+
+            queryset = queryset._clone()
+            queryset._querysets = querysets
+
+        # Fetch an extra item to determine if there is a following page.
+        results = list(queryset[: self.page_size + 1])
+        self.page = list(results[: self.page_size])
+        has_following_position = len(results) > len(self.page)
+
+        # If we have a reverse queryset, then the query ordering was in reverse
+        # so we need to reverse the items again before returning them to the user.
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1])
+            self.previous_position = self._get_position_from_instance(self.page[0])
+        else:
+            # The items after (or before) the position were removed.
+            self.next_position = self.previous_position = current_position
+
+        # Display page controls in the browsable API if there is more
+        # than one page.
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position)
+        )
+
+    def _get_position_from_instance(self, instance, ordering=None):
+        """The values of the fields of the key ordering of an item."""
+        position = []
+        for order in ordering or self.key_ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                position.append(instance[field_name])
+            else:
+                position.append(getattr(instance, field_name))
+        return position
+
+    def encode_cursor(self, cursor):
+        """
+        Differs from the standard CursorPagination to encode the values of the
+        position as JSON (values JSON doesn't support, e.g. dates, as strings).
+        """
+        if cursor.position is not None:
+            cursor = cursor._replace(
+                position=json.dumps(cursor.position, default=str, separators=(",", ":"))
+            )
+        return super().encode_cursor(cursor)
+
+    def decode_cursor(self, request):
+        """
+        Differs from the standard CursorPagination to decode the values of the
+        position from JSON, and to not support offsets.
+        """
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.key_ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # The QuerySet number is compared with the number of each QuerySet.
+        for order, value in zip(self.key_ordering, position):
+            if order.lstrip("-") == "#" and type(value) is not int:
+                raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+
+# The boundary of a QuerySet in a vector cursor: after or before a row (by its
+# key), or after the last row.
+AFTER = "a"
+BEFORE = "b"
+END = "e"
+
+
+class SequenceVectorPagination(SequenceKeysetPagination):
+    """
+    Keyset pagination of a QuerySetSequence ordered across all QuerySets, with
+    a cursor which stores the position of each QuerySet (by QuerySet number).
+
+    Each QuerySet resumes from its own position: after (or before) the key, the
+    values of the ordering fields and the primary key, of a row of it. Once
+    every row of a QuerySet was returned it is no longer queried. QuerySets
+    without a position start from the beginning.
+
+    The cursor is compressed JSON, encoded as URL-safe base64.
+    """
+
+    def get_source_ordering(self, key_ordering):
+        """The ordering of the rows of a QuerySet, without the QuerySet number."""
+        return tuple(order for order in key_ordering if order.lstrip("-") != "#")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # This code only works with a QuerySetSequence.
+        if not isinstance(queryset, QuerySetSequence):
+            raise ValueError(
+                "%s can only be used with an instance of QuerySetSequence."
+                % self.__class__.__name__
+            )
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.key_ordering = self.get_key_ordering(self.ordering)
+        self.source_ordering = self.get_source_ordering(self.key_ordering)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (reverse, boundaries) = (False, {})
+        else:
+            (reverse, boundaries) = (self.cursor.reverse, self.cursor.position)
+
+        ordering = self.key_ordering
+        source_ordering = self.source_ordering
+        if reverse:
+            ordering = _reverse_ordering(ordering)
+            source_ordering = _reverse_ordering(source_ordering)
+        queryset = queryset.order_by(*ordering)
+
+        # Fetch an extra row (of each QuerySet) to determine if there is a
+        # following page.
+        limit = self.page_size + 1
+
+        # Resume each QuerySet from its boundary.
+        querysets = []
+        for index, qs in zip(queryset._queryset_idxs, queryset._querysets):
+            side, key = boundaries.get(index, (None, None))
+            if side == END:
+                # Every row of it is before the boundary.
+                if not reverse:
+                    qs = qs.none()
+            elif side is not None:
+                # The row at the boundary is included if it is after the boundary
+                # in the direction of the page.
+                keyset_filter = _keyset_filter(
+                    source_ordering, key, index, inclusive=(side == BEFORE) != reverse
+                )
+                try:
+                    qs = qs.filter(keyset_filter)
+                except (TypeError, ValueError, ValidationError):
+                    # A value of the position is invalid for its field.
+                    raise NotFound(self.invalid_cursor_message)
+            elif reverse:
+                # Every row of it is after the boundary.
+                qs = qs.none()
+            querysets.append(qs[:limit])
+        queryset._querysets = querysets
+
+        # Evaluate each QuerySet, to know the rows it has, then merge them.
+        with queryset._collect_stats("iterate") as stats:
+            fetched = {}
+            for index, qs in zip(queryset._queryset_idxs, querysets):
+                track_call(stats, index, qs, qs._fetch_all)
+                fetched[index] = len(qs._result_cache)
+            results = list(islice(queryset._make_iterable(stats=stats), limit))
+            self.page = results[: self.page_size]
+            queryset._prefetch_related_objects(self.page)
+            if stats is not None:
+                stats.results = len(results)
+        has_following_position = len(results) > len(self.page)
+
+        # A QuerySet is exhausted (in the direction of the page) if every row
+        # was fetched (fewer than the limit) and returned in this page.
+        on_page = {}
+        for item in self.page:
+            index = self._get_index(item)
+            on_page[index] = on_page.get(index, 0) + 1
+        exhausted = {
+            index
+            for index, count in fetched.items()
+            if count < limit and count == on_page.get(index, 0)
+        }
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = self.cursor is not None
+            self.has_previous = has_following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = self.cursor is not None
+
+        # The boundaries after the page, and before it.
+        self.next_position = dict(boundaries)
+        self.previous_position = dict(boundaries)
+        seen = set()
+        for item in self.page:
+            index = self._get_index(item)
+            key = self._get_position_from_instance(item, self.source_ordering)
+            # Before the first item and after the last item of each QuerySet.
+            if index not in seen:
+                seen.add(index)
+                self.previous_position[index] = (BEFORE, key)
+            self.next_position[index] = (AFTER, key)
+        for index in exhausted:
+            if reverse:
+                # Nothing is before it.
+                self.previous_position.pop(index, None)
+            else:
+                self.next_position[index] = (END, None)
+
+        # Display page controls in the browsable API if there is more
+        # than one page.
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_index(self, instance):
+        """The QuerySet number of an item."""
+        if isinstance(instance, dict):
+            return instance["#"]
+        return getattr(instance, "#")
+
+    def encode_cursor(self, cursor):
+        """
+        Encode the boundary of each QuerySet as compressed JSON: the QuerySets
+        by boundary, with the key of each.
+        """
+        data = {}
+        if cursor.reverse:
+            data["r"] = 1
+        for index, (side, key) in sorted(cursor.position.items()):
+            if side == END:
+                data.setdefault(END, []).append(index)
+            else:
+                data.setdefault(side, {})[str(index)] = key
+        serialized = json.dumps(data, default=str, separators=(",", ":"))
+        compressed = zlib.compress(serialized.encode("utf-8"), 9)
+        encoded = urlsafe_b64encode(compressed).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """Decode a cursor from encode_cursor()."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            compressed = urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            data = json.loads(zlib.decompress(compressed).decode("utf-8"))
+
+            boundaries = {}
+            for index in data.get(END, []):
+                boundaries[int(index)] = (END, None)
+            for side in (AFTER, BEFORE):
+                for index, key in data.get(side, {}).items():
+                    if not isinstance(key, list) or len(key) != len(
+                        self.source_ordering
+                    ):
+                        raise ValueError("Invalid key.")
+                    boundaries[int(index)] = (side, key)
+            reverse = bool(data.get("r", 0))
+        except (TypeError, ValueError, AttributeError, binascii.Error, zlib.error):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=boundaries)
@@ -0,0 +1,83 @@
+"""
+Signals sent while a QuerySetSequence is evaluated, for instrumentation (e.g.
+metrics or tracing).
+
+When no receivers are connected (and statistics are not collected, see
+QuerySetSequence.collect_stats()) evaluating is not instrumented at all.
+
+"""
+import logging
+
+from django.dispatch import Signal
+
+# Sent before and after a QuerySetSequence is evaluated (iterated, or e.g.
+# count() or get() is called). The sender is the QuerySetSequence class, the
+# arguments are:
+#
+#   * sequence: the QuerySetSequence.
+#   * method: the method evaluated, e.g. "iterate", "iterator" or "count".
+#   * stats: the EvaluationStats of the evaluation, complete after evaluating.
+pre_evaluate = Signal()
+post_evaluate = Signal()
+
+# Sent before and after each query of one of the QuerySets of a
+# QuerySetSequence is executed. The sender is the model of the QuerySet, the
+# arguments are:
+#
+#   * index: the index of the QuerySet (as returned by '#').
+#   * using: the alias of the database.
+#   * sql, params: the query.
+#   * stats: the EvaluationStats of the evaluation.
+#   * duration: the time (in seconds) the query took to execute, only sent
+#     after the query.
+pre_source_query = Signal()
+post_source_query = Signal()
+
+SIGNALS = (pre_evaluate, post_evaluate, pre_source_query, post_source_query)
+
+
+def has_receivers():
+    """Whether any receivers are connected to the signals."""
+    return any(signal.receivers for signal in SIGNALS)
+
+
+logger = logging.getLogger("queryset_sequence")
+
+
+class SlowSourceLogger:
+    """
+    Log the QuerySets of an evaluation which took longer than threshold seconds
+    (including creating the results), with the SQL executed.
+
+    Call connect() to start logging, disconnect() to stop.
+    """
+
+    def __init__(self, threshold=1.0, logger=logger, level=logging.WARNING):
+        self.threshold = threshold
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, sender, sequence, method, stats, **kwargs):
+        for source in stats.sources.values():
+            if source.time < self.threshold:
+                continue
+            self.logger.log(
+                self.level,
+                "QuerySet #%d (%s) of a QuerySetSequence took %.3fs in %s() on "
+                "database %r: %d queries, %d rows fetched.%s",
+                source.index,
+                source.model.__name__ if source.model else None,
+                source.time,
+                method,
+                source.using,
+                source.queries,
+                source.fetched,
+                "".join("\n%s" % sql for sql in source.sql),
+            )
+
+    def connect(self):
+        post_evaluate.connect(self, weak=False)
+        return self
+
+    def disconnect(self):
+        post_evaluate.disconnect(self)
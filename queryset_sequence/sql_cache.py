@@ -0,0 +1,206 @@
+"""
+An opt-in cache of the compiled SQL of the QuerySets of a QuerySetSequence, see
+QuerySetSequence.cache_sql().
+
+Each QuerySet of a QuerySetSequence is built by applying the pending operations
+(e.g. filter()) to a shared QuerySet. The same operations (with equal arguments
+of the same types) applied to the same QuerySet result in the same SQL in the
+same timezone, so it is only compiled once and reused.
+
+"""
+import functools
+import threading
+import weakref
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import F, Field, Model, Q
+from django.db.models.expressions import BaseExpression
+from django.utils import timezone
+
+# The number of compiled queries kept for each shared QuerySet.
+MAX_ENTRIES = 128
+
+# The compiled queries of each shared QuerySet, by key.
+_cache = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+# Arguments of these types compile to the same SQL if they are equal.
+_SIMPLE_TYPES = (str, int, bool, type(None), date, timedelta, UUID)
+
+
+def _get_value_key(value):
+    """
+    Return a key for an argument, which is only equal to the key of another
+    argument if both compile to the same SQL (unlike the arguments themselves,
+    e.g. 1 == 1.0). Raises TypeError for unsupported arguments.
+    """
+    value_type = type(value)
+    if value_type in _SIMPLE_TYPES:
+        return value_type, value
+    if value_type in (float, Decimal, datetime, time):
+        # E.g. Decimal("1.0") and Decimal("1.00") or datetimes in different
+        # timezones are equal.
+        return value_type, repr(value)
+    if value_type in (tuple, list):
+        return value_type, tuple(_get_value_key(item) for item in value)
+    if value_type in (set, frozenset):
+        return value_type, frozenset(_get_value_key(item) for item in value)
+    if value_type is dict:
+        return value_type, _get_kwargs_key(value)
+    if isinstance(value, Q):
+        return (
+            value_type,
+            value.connector,
+            value.negated,
+            tuple(_get_value_key(child) for child in value.children),
+        )
+    if isinstance(value, Model) and value.pk is not None:
+        return value_type, _get_value_key(value.pk)
+    if isinstance(value, (BaseExpression, F)) and hasattr(value, "_constructor_args"):
+        # Expressions are compared by the arguments they were created with.
+        args, kwargs = value._constructor_args
+        return value_type, _get_value_key(args), _get_kwargs_key(kwargs)
+    if isinstance(value, Field) and not hasattr(value, "model"):
+        # E.g. the output_field of an expression.
+        name, path, args, kwargs = value.deconstruct()
+        return value_type, _get_value_key(args), _get_kwargs_key(kwargs)
+    raise TypeError("Cannot cache the SQL for an argument of %r." % value_type)
+
+
+def _get_kwargs_key(kwargs):
+    return tuple(
+        sorted((name, _get_value_key(value)) for name, value in kwargs.items())
+    )
+
+
+def _get_key(ops):
+    """
+    Return a hashable key for the pending operations, or None if any of the
+    arguments are not supported.
+    """
+    try:
+        return tuple(
+            (method, _get_value_key(args), _get_kwargs_key(kwargs))
+            for method, args, kwargs in ops
+        )
+    except TypeError:
+        return None
+
+
+def _get_timezone():
+    """The name of the current timezone, which the SQL of some queries uses."""
+    if settings.USE_TZ:
+        return timezone.get_current_timezone_name()
+    return None
+
+
+def _get_entries(base):
+    with _lock:
+        try:
+            return _cache[base]
+        except KeyError:
+            entries = _cache[base] = {}
+            return entries
+
+
+def _store(entries, key, entry):
+    with _lock:
+        # Drop the oldest entries.
+        while len(entries) >= MAX_ENTRIES:
+            del entries[next(iter(entries))]
+        entries[key] = entry
+
+
+def _new_query(query_class):
+    """Create an empty Query when unpickling, see CachedSQLQuery.__reduce__()."""
+    return query_class.__new__(query_class)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cached_query_class(query_class):
+    """Create a subclass of a Query class which caches its compiled SQL."""
+
+    class CachedSQLQuery(query_class):
+        def clone(self):
+            # Changes to a clone would change the SQL, stop caching it.
+            obj = super().clone()
+            obj.__class__ = query_class
+            del obj._sql_cache
+            return obj
+
+        def __reduce__(self):
+            # Pickle as the original class (this class can't be pickled),
+            # without the cache.
+            state = self.__getstate__()
+            state.pop("_sql_cache", None)
+            return _new_query, (query_class,), state
+
+        def get_compiler(self, using=None, connection=None, elide_empty=True):
+            compiler = super().get_compiler(using, connection, elide_empty)
+            entries, key = self._sql_cache
+            as_sql = compiler.as_sql
+
+            def cached_as_sql(with_limits=True, with_col_aliases=False):
+                entry_key = (
+                    key,
+                    compiler.connection.alias,
+                    with_limits,
+                    with_col_aliases,
+                    elide_empty,
+                    # E.g. truncating datetimes uses the current timezone.
+                    _get_timezone(),
+                )
+                entry = entries.get(entry_key)
+                if entry is not None:
+                    # Restore the state which compiling sets on the compiler.
+                    (
+                        result,
+                        compiler.select,
+                        compiler.klass_info,
+                        compiler.annotation_col_map,
+                        compiler.col_count,
+                        compiler.has_extra_select,
+                    ) = entry
+                    return result
+
+                # Queries which can never match raise EmptyResultSet, which
+                # isn't cached.
+                result = as_sql(with_limits, with_col_aliases)
+                _store(
+                    entries,
+                    entry_key,
+                    (
+                        result,
+                        compiler.select,
+                        compiler.klass_info,
+                        compiler.annotation_col_map,
+                        compiler.col_count,
+                        compiler.has_extra_select,
+                    ),
+                )
+                return result
+
+            compiler.as_sql = cached_as_sql
+            return compiler
+
+    CachedSQLQuery.__name__ = "CachedSQL" + query_class.__name__
+    CachedSQLQuery.__qualname__ = CachedSQLQuery.__name__
+    return CachedSQLQuery
+
+
+def cache_queryset_sql(qs, base, ops):
+    """
+    Cache the compiled SQL of a QuerySet (which was created by applying the
+    pending operations to the base QuerySet), if possible.
+    """
+    key = _get_key(ops)
+    if key is None:
+        return
+
+    query = qs.query
+    query.__class__ = _get_cached_query_class(query.__class__)
+    query._sql_cache = (_get_entries(base), key)
@@ -0,0 +1,216 @@
+"""
+Statistics about the evaluation of a QuerySetSequence, see
+QuerySetSequence.collect_stats().
+
+Collecting is opt-in: unless it is enabled (or receivers of the signals in
+queryset_sequence.signals are connected) none of this is used. Otherwise the
+iterators and functions involved are wrapped to count calls.
+
+"""
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+from queryset_sequence.signals import post_source_query, pre_source_query
+
+
+class SourceStats:
+    """The statistics of one of the QuerySets of an evaluation."""
+
+    def __init__(self, index):
+        # The index of the QuerySet (as returned by '#').
+        self.index = index
+        # The model and the database alias of the QuerySet.
+        self.model = None
+        self.using = None
+        # The number of queries made.
+        self.queries = 0
+        # The time spent (in seconds) fetching results from the QuerySet,
+        # including creating them.
+        self.time = 0.0
+        # The rows fetched from the QuerySet.
+        self.fetched = 0
+        # The rows returned from the QuerySet (after merging and slicing).
+        self.yielded = 0
+        # Whether every row of the QuerySet was fetched.
+        self.exhausted = False
+        # The SQL of each query.
+        self.sql = []
+
+    @property
+    def overfetch(self):
+        """The rows which were fetched, but not returned."""
+        return self.fetched - self.yielded
+
+    def __repr__(self):
+        return "<SourceStats #%d: queries=%d time=%.6f fetched=%d yielded=%d>" % (
+            self.index,
+            self.queries,
+            self.time,
+            self.fetched,
+            self.yielded,
+        )
+
+
+class EvaluationStats:
+    """The statistics of a single evaluation of a QuerySetSequence."""
+
+    def __init__(self, method):
+        # The method which was evaluated, e.g. "iterate", "count" or "get".
+        self.method = method
+        # How the results were produced, e.g. "ordered" (merging the QuerySets)
+        # or "sliced". Some evaluations use multiple strategies, e.g. removing
+        # duplicates from ordered results.
+        self.strategies = []
+        # The statistics of each QuerySet, by index.
+        self.sources = {}
+        # The number of comparisons made while merging ordered QuerySets.
+        self.comparisons = 0
+        # The total number of queries (including any which could not be
+        # attributed to a QuerySet, e.g. prefetching related objects).
+        self.queries = 0
+        # The total time (in seconds).
+        self.time = 0.0
+        # The total number of rows fetched from the QuerySets.
+        self.fetched = 0
+        # The number of results, if the evaluation returns results.
+        self.results = None
+        # The index and the QuerySet queries are currently attributed to.
+        self._current = None
+        # The QueryBudgets checked on each query and row fetched.
+        self.budgets = ()
+
+    def source(self, index):
+        """Return the statistics of a QuerySet."""
+        try:
+            return self.sources[index]
+        except KeyError:
+            stats = self.sources[index] = SourceStats(index)
+            return stats
+
+    @contextmanager
+    def capture(self, querysets):
+        """Count the queries made (and time taken) on the QuerySets' databases."""
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in {qs.db for qs in querysets}:
+                stack.enter_context(connections[alias].execute_wrapper(self._execute))
+            try:
+                yield self
+            finally:
+                self.time += time.perf_counter() - start
+
+    def _execute(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self._current is None:
+            for budget in self.budgets:
+                budget.check_queries(self, None)
+            return execute(sql, params, many, context)
+
+        index, qs = self._current
+        stats = self.source(index)
+        stats.queries += 1
+        stats.sql.append(sql)
+        for budget in self.budgets:
+            budget.check_queries(self, index)
+
+        kwargs = {
+            "index": index,
+            "using": context["connection"].alias,
+            "sql": sql,
+            "params": params,
+            "stats": self,
+        }
+        pre_source_query.send(sender=qs.model, **kwargs)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            post_source_query.send(sender=qs.model, duration=duration, **kwargs)
+
+    @contextmanager
+    def _attribute(self, index, qs):
+        """Attribute the queries and time to a QuerySet."""
+        stats = self.source(index)
+        stats.model = qs.model
+        stats.using = qs.db
+        self._current = index, qs
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.time += time.perf_counter() - start
+            self._current = None
+
+    def call(self, index, qs, func):
+        """Call a function of a QuerySet (e.g. count()) and return the result."""
+        with self._attribute(index, qs):
+            return func()
+
+    def track_iterator(self, index, qs, rows):
+        """Iterate over the rows of a QuerySet (or an iterator of them)."""
+        with self._attribute(index, qs):
+            # Evaluating a QuerySet happens as soon as it is iterated.
+            iterator = iter(rows)
+        while True:
+            with self._attribute(index, qs) as stats:
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    stats.exhausted = True
+                    return
+                stats.fetched += 1
+                self.fetched += 1
+                for budget in self.budgets:
+                    budget.check_rows(self, index)
+            yield row
+
+    def track_projection(self, project):
+        """
+        Wrap the function which converts a row (of a QuerySet) into a result,
+        it is called for each row which is returned.
+        """
+
+        def tracked(row, index):
+            self.source(index).yielded += 1
+            return row if project is None else project(row, index)
+
+        return tracked
+
+    def track_comparator(self, comparator):
+        """Wrap a comparison function of rows."""
+
+        def tracked(row_1, row_2):
+            self.comparisons += 1
+            return comparator(row_1, row_2)
+
+        return tracked
+
+    def __repr__(self):
+        return "<EvaluationStats %s (%s): queries=%d time=%.6f results=%s>" % (
+            self.method,
+            ", ".join(self.strategies),
+            self.queries,
+            self.time,
+            self.results,
+        )
+
+
+class StatsRecorder:
+    """Keeps the statistics of the last evaluation, shared between clones."""
+
+    def __init__(self):
+        self.last = None
+
+    def start(self, method):
+        self.last = EvaluationStats(method)
+        return self.last
+
+
+def track_call(stats, index, qs, func):
+    """Call a function of a QuerySet, recording it if stats is not None."""
+    if stats is None:
+        return func()
+    return stats.call(index, qs, func)
@@ -0,0 +1,47 @@
+from django.test import TestCase
+
+from benchmarks import memory, suite
+
+
+class TestBenchmarks(TestCase):
+    """The benchmarks measure the expected results."""
+
+    def setUp(self):
+        suite.load_data(3, 4)
+
+    def test_cases(self):
+        cases = suite.get_cases(sources=(3,), rows=(4,))
+        self.assertEqual(len(cases), 4 * 4 * 3)
+        # A deep slice starts half way through the results.
+        expected = {"all": 12, "first": suite.PAGE_SIZE, "deep": 6}
+        for result in suite.run(cases, repeat=1):
+            self.assertEqual(result.count, expected[result.case.slice], result.case)
+
+    def test_interleaved(self):
+        """Ordering by title interleaves every source."""
+        case = suite.Case(3, 4, "interleaved", "flat", "all")
+        self.assertEqual(
+            list(suite.make_sequence(case)), ["%08d" % i for i in range(12)]
+        )
+
+        case = case._replace(ordering="reversed")
+        self.assertEqual(
+            list(suite.make_sequence(case)), ["%08d" % i for i in reversed(range(12))]
+        )
+
+    def test_max_total_rows(self):
+        cases = suite.get_cases(sources=(10, 500), rows=(1000,))
+        self.assertEqual({case.sources for case in cases}, {10})
+
+
+class TestMemoryBenchmarks(TestCase):
+    def test_measure(self):
+        cases = memory.get_cases(rows=(20,), iterables=("values",))
+        results = {r.case.mode: r for r in memory.run(cases, sources=2)}
+        self.assertEqual(set(results), set(memory.MODES))
+        for result in results.values():
+            self.assertEqual(result.count, 20)
+            self.assertGreaterEqual(result.peak, result.retained)
+
+        # The cached results are retained, unlike those from iterator().
+        self.assertGreater(results["cached"].retained, results["iterator"].retained)
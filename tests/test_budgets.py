@@ -0,0 +1,277 @@
+"""
+The number of queries and rows fetched by each method, as a function of the
+number of QuerySets and the size of the slice.
+
+"""
+import unittest
+from contextlib import contextmanager
+from math import ceil
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.db.models import Count
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from queryset_sequence import QuerySetSequence
+from tests.models import Article, Author, Book, PeriodicalPublisher
+
+# In-case someone doesn't have Django REST Framework installed, guard tests.
+try:
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    factory = APIRequestFactory()
+
+    from queryset_sequence.pagination import (
+        SequenceCursorPagination,
+        SequenceKeysetPagination,
+    )
+except ImportError:
+    factory = None
+    SequenceCursorPagination = SequenceKeysetPagination = object
+
+
+class TestBudgetBase(TestCase):
+    # The number of QuerySets and the rows of each.
+    SOURCES = 6
+    ROWS = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        publisher = PeriodicalPublisher.objects.create(name="Publisher")
+        cls.authors = Author.objects.bulk_create(
+            [Author(name="Author %d" % i) for i in range(cls.SOURCES)]
+        )
+
+        # Alternate books and articles, titles are numbered such that ordering
+        # by title interleaves every QuerySet.
+        for i, author in enumerate(cls.authors):
+            for j in range(cls.ROWS):
+                title = "%08d" % (j * cls.SOURCES + i)
+                if i % 2:
+                    Article.objects.create(
+                        title=title, author=author, publisher=publisher
+                    )
+                else:
+                    Book.objects.create(title=title, author=author, pages=j)
+
+    def sequence(self, sources):
+        """A QuerySetSequence of the first sources QuerySets."""
+        return QuerySetSequence(
+            *[
+                (Article if i % 2 else Book).objects.filter(author=author)
+                for i, author in enumerate(self.authors[:sources])
+            ]
+        )
+
+    @contextmanager
+    def measure(self):
+        """Count the queries made and the rows fetched from the database."""
+        counts = {"rows": 0}
+
+        def fetchone(cursor):
+            row = cursor.cursor.fetchone()
+            counts["rows"] += row is not None
+            return row
+
+        def fetchmany(cursor, *args, **kwargs):
+            rows = cursor.cursor.fetchmany(*args, **kwargs)
+            counts["rows"] += len(rows)
+            return rows
+
+        def fetchall(cursor):
+            rows = cursor.cursor.fetchall()
+            counts["rows"] += len(rows)
+            return rows
+
+        with patch.object(CursorWrapper, "fetchone", fetchone, create=True):
+            with patch.object(CursorWrapper, "fetchmany", fetchmany, create=True):
+                with patch.object(CursorWrapper, "fetchall", fetchall, create=True):
+                    with CaptureQueriesContext(connection) as context:
+                        yield counts
+        counts["queries"] = len(context.captured_queries)
+
+    @contextmanager
+    def assertBudget(self, queries, rows):
+        """Assert the number of queries made and rows fetched."""
+        with self.measure() as counts:
+            yield
+        self.assertEqual(counts["queries"], queries, "Unexpected number of queries.")
+        self.assertEqual(counts["rows"], rows, "Unexpected number of rows fetched.")
+
+
+class TestBudgets(TestBudgetBase):
+    def test_iterate(self):
+        for k in (1, 3, 6):
+            with self.subTest(sources=k), self.assertBudget(k, k * self.ROWS):
+                self.assertEqual(len(self.sequence(k)), k * self.ROWS)
+
+    def test_count(self):
+        for k in (1, 3, 6):
+            with self.subTest(sources=k), self.assertBudget(k, k):
+                self.assertEqual(self.sequence(k).count(), k * self.ROWS)
+
+    def test_count_slice(self):
+        """QuerySets are counted until the end of the slice is reached."""
+        for n in (1, 4, 6, 10):
+            queries = ceil(n / self.ROWS)
+            with self.subTest(size=n), self.assertBudget(queries, queries):
+                self.assertEqual(self.sequence(6)[:n].count(), n)
+
+    def test_exists(self):
+        for k in (1, 3, 6):
+            with self.subTest(sources=k), self.assertBudget(1, 1):
+                self.assertTrue(self.sequence(k).exists())
+
+            with self.subTest(sources=k), self.assertBudget(k, 0):
+                self.assertFalse(self.sequence(k).filter(title="").exists())
+
+    def test_first_last(self):
+        for k in (1, 3, 6):
+            with self.subTest(sources=k), self.assertBudget(1, 1):
+                self.sequence(k).first()
+
+            # Ordered, the first result of every QuerySet is compared.
+            qss = self.sequence(k).order_by("title")
+            with self.subTest(sources=k), self.assertBudget(k, k):
+                self.assertEqual(qss.first().title, "%08d" % 0)
+            with self.subTest(sources=k), self.assertBudget(k, k):
+                qss.last()
+            with self.subTest(sources=k), self.assertBudget(k, k):
+                qss.earliest("title")
+
+    def test_get(self):
+        for k in (1, 3, 6):
+            with self.subTest(sources=k), self.assertBudget(k, 1):
+                self.sequence(k).get(title="%08d" % 0)
+
+    def test_aggregate(self):
+        """Aggregates are computed by a single query, one row per QuerySet."""
+        for k in (1, 3, 6):
+            with self.subTest(sources=k), self.assertBudget(1, k):
+                result = self.sequence(k).aggregate(n=Count("pk"))
+            self.assertEqual(result, {"n": k * self.ROWS})
+
+    def test_slice(self):
+        """
+        Unordered slices only query the QuerySets they need, independent of the
+        number of QuerySets.
+        """
+        for k in (3, 6):
+            for n in (1, 4, 6):
+                with self.subTest(sources=k, size=n):
+                    with self.assertBudget(ceil(n / self.ROWS), n):
+                        self.assertEqual(len(self.sequence(k)[:n]), n)
+
+    def test_slice_offset(self):
+        """
+        The QuerySets before the start of the slice are counted, but not
+        fetched.
+        """
+        n = 4
+        for offset in (2, 6, 8, 13):
+            # The QuerySets which are skipped and the one the slice starts in
+            # (unless it starts at the beginning of it) are counted.
+            counted = offset // self.ROWS + bool(offset % self.ROWS)
+            fetched = ceil((offset % self.ROWS + n) / self.ROWS)
+            with self.subTest(offset=offset):
+                with self.assertBudget(counted + fetched, counted + n):
+                    data = list(self.sequence(6)[offset : offset + n])
+                self.assertEqual(len(data), n)
+
+    def test_index(self):
+        with self.assertBudget(1, 1):
+            self.sequence(6)[0]
+        # Counting the first two QuerySets, then fetching from the second.
+        with self.assertBudget(3, 3):
+            self.sequence(6)[self.ROWS + 1]
+
+    def test_slice_queryset_order(self):
+        """Ordering by the QuerySet is the same as unordered."""
+        with self.assertBudget(1, 3):
+            list(self.sequence(6).order_by("#", "title")[:3])
+        with self.assertBudget(1, 3):
+            list(self.sequence(6).order_by("-#", "title")[:3])
+
+    def test_slice_ordered(self):
+        """
+        Ordered slices fetch at most the end of the slice from every QuerySet.
+        """
+        for k in (3, 6):
+            titles = sorted(self.sequence(k).values_list("title", flat=True))
+            for high in (1, 3, 6):
+                rows = k * min(high, self.ROWS)
+                with self.subTest(sources=k, high=high):
+                    with self.assertBudget(k, rows):
+                        data = list(self.sequence(k).order_by("title")[:high])
+                    self.assertEqual([it.title for it in data], titles[:high])
+
+        with self.assertBudget(6, 6 * 3):
+            list(self.sequence(6).order_by("-title")[2:3])
+
+
+class _Pagination(SequenceCursorPagination):
+    page_size = 5
+    ordering = "title"
+
+
+class _KeysetPagination(SequenceKeysetPagination):
+    page_size = 5
+    ordering = "-title"
+
+
+@unittest.skipIf(
+    not factory, "Must have Django REST Framework installed to run pagination tests."
+)
+class TestPaginationBudgets(TestBudgetBase):
+    def test_pages(self):
+        """
+        Each page fetches at most the page (and the item after it) from the
+        QuerySets it spans, independent of the number of QuerySets and of how
+        deep the page is.
+        """
+        pagination = _Pagination()
+        size = pagination.page_size + 1
+        for k in (3, 6):
+            url = "/"
+            titles = []
+            while url:
+                request = Request(factory.get(url))
+                with self.measure() as counts:
+                    page = pagination.paginate_queryset(self.sequence(k), request)
+                with self.subTest(sources=k, page=len(titles) // size):
+                    # The cursor might be at the end of a QuerySet.
+                    self.assertLessEqual(counts["queries"], ceil(size / self.ROWS) + 1)
+                    self.assertLessEqual(counts["rows"], size)
+
+                titles.extend(it.title for it in page)
+                url = pagination.get_next_link()
+
+            self.assertEqual(len(titles), k * self.ROWS)
+
+    def test_keyset_pages(self):
+        """
+        Each page of a keyset pagination queries every QuerySet once, fetching
+        at most the page (and the item after it) from each, independent of how
+        deep the page is.
+        """
+        pagination = _KeysetPagination()
+        size = pagination.page_size + 1
+        for k in (3, 6):
+            url = "/"
+            titles = []
+            while url:
+                request = Request(factory.get(url))
+                with self.measure() as counts:
+                    page = pagination.paginate_queryset(self.sequence(k), request)
+                with self.subTest(sources=k, page=len(titles) // size):
+                    self.assertEqual(counts["queries"], k)
+                    self.assertLessEqual(counts["rows"], k * min(size, self.ROWS))
+
+                titles.extend(it.title for it in page)
+                url = pagination.get_next_link()
+
+            self.assertEqual(titles, sorted(titles, reverse=True))
+            self.assertEqual(len(titles), k * self.ROWS)
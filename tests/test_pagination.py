@@ -1,5 +1,10 @@
+import json
 import unittest
+import zlib
+from base64 import b64encode, urlsafe_b64encode
 from datetime import date
+from unittest.mock import patch
+from urllib import parse
 
 from django.test import TestCase
 
@@ -11,13 +16,18 @@ try:
 
     factory = APIRequestFactory()
 
-    from queryset_sequence.pagination import SequenceCursorPagination
+    from queryset_sequence.pagination import (
+        SequenceCursorPagination,
+        SequenceKeysetPagination,
+        SequenceVectorPagination,
+    )
 except ImportError:
     factory = None
-    SequenceCursorPagination = object
+    SequenceCursorPagination = SequenceKeysetPagination = object
+    SequenceVectorPagination = object
 
 from queryset_sequence import QuerySetSequence
-from tests.models import Author, Book, Publisher
+from tests.models import Article, Author, Book, PeriodicalPublisher, Publisher
 
 
 class _TestPagination(SequenceCursorPagination):
@@ -279,3 +289,243 @@ class TestSequenceCursorPagination(TestCase):
             next_url = self.pagination.get_next_link()
 
         self.assertIsNone(next_url)
+
+
+class _TestKeysetPagination(SequenceKeysetPagination):
+    page_size = 4
+    ordering = "-release"
+
+
+@unittest.skipIf(
+    not factory, "Must have Django REST Framework installed to run pagination tests."
+)
+class TestSequenceKeysetPagination(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name="Jane Doe")
+        publisher = PeriodicalPublisher.objects.create(name="Mad Magazine")
+
+        # Interleave the releases of books and articles, with some releases on
+        # the same day (also across models).
+        for d in range(1, 8):
+            Book.objects.create(
+                title="Book %d" % d,
+                author=author,
+                pages=d,
+                release=date(2018, 10, d),
+            )
+            Article.objects.create(
+                title="Article %d" % d,
+                author=author,
+                publisher=publisher,
+                release=date(2018, 10, d // 2 + 1),
+            )
+
+        self.pagination = _TestKeysetPagination()
+        self.queryset = QuerySetSequence(Book.objects.all(), Article.objects.all())
+        self.expected = [
+            item.title for item in self.queryset.order_by("-release", "#", "pk")
+        ]
+
+    def paginate(self, url, queryset=None):
+        request = Request(factory.get(url))
+        page = self.pagination.paginate_queryset(queryset or self.queryset, request)
+        return [
+            item["title"] if isinstance(item, dict) else item.title for item in page
+        ]
+
+    def test_pages(self):
+        """Pages follow the ordering across QuerySets."""
+        url = "/"
+        pages = []
+        while url:
+            pages.append(self.paginate(url))
+            url = self.pagination.get_next_link()
+
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+        # Both models are interleaved.
+        self.assertEqual(pages[0], ["Book 7", "Book 6", "Book 5", "Book 4"])
+        self.assertEqual(pages[1], ["Article 6", "Article 7", "Book 3", "Article 4"])
+
+    def test_previous(self):
+        """Previous links return to the same pages."""
+        urls = ["/"]
+        pages = [self.paginate("/")]
+        self.assertIsNone(self.pagination.get_previous_link())
+        while self.pagination.get_next_link():
+            urls.append(self.pagination.get_next_link())
+            pages.append(self.paginate(urls[-1]))
+
+        for i in range(len(pages) - 1, 0, -1):
+            self.paginate(urls[i])
+            previous_url = self.pagination.get_previous_link()
+            self.assertEqual(self.paginate(previous_url), pages[i - 1])
+            # And forward again.
+            self.assertEqual(self.paginate(self.pagination.get_next_link()), pages[i])
+
+        # Back on the first page, there is no previous page.
+        self.paginate(previous_url)
+        self.assertIsNone(self.pagination.get_previous_link())
+
+    def test_queries(self):
+        """Every page queries each QuerySet once, however deep it is."""
+        url = "/"
+        while url:
+            with self.assertNumQueries(2):
+                self.paginate(url)
+            url = self.pagination.get_next_link()
+
+    def test_ascending(self):
+        class TestPagination(type(self.pagination)):
+            ordering = ("release", "title")
+
+        self.pagination = TestPagination()
+        expected = [
+            item.title for item in self.queryset.order_by("release", "title", "#", "pk")
+        ]
+        url = "/"
+        titles = []
+        while url:
+            titles.extend(self.paginate(url))
+            url = self.pagination.get_next_link()
+        self.assertEqual(titles, expected)
+
+    def test_stable(self):
+        """Removing items does not change the following pages."""
+        self.paginate("/")
+        next_url = self.pagination.get_next_link()
+        second = self.paginate(next_url)
+
+        Book.objects.filter(title__in=["Book 7", "Book 6"]).delete()
+        self.assertEqual(self.paginate(next_url), second)
+
+    def test_values(self):
+        """The fields of the ordering must be included."""
+        queryset = self.queryset.values("#", "pk", "title", "release")
+        url = "/"
+        titles = []
+        while url:
+            titles.extend(self.paginate(url, queryset))
+            url = self.pagination.get_next_link()
+        self.assertEqual(titles, self.expected)
+
+    def test_key_ordering(self):
+        self.assertEqual(
+            self.pagination.get_key_ordering(("-release",)), ("-release", "#", "pk")
+        )
+        self.assertEqual(
+            self.pagination.get_key_ordering(("-#", "release", "pk")),
+            ("-#", "release", "pk"),
+        )
+
+    def test_invalid_cursor(self):
+        for position in ('"a"', "[1, 2]", '["2018-10-01", "0", 1]', '["a", 0, 1]'):
+            cursor = b64encode(parse.urlencode({"p": position}).encode()).decode()
+            with self.subTest(position=position):
+                with self.assertRaises(exceptions.NotFound):
+                    self.paginate("/?cursor=%s" % cursor)
+
+    def test_not_sequence(self):
+        with self.assertRaises(ValueError):
+            self.paginate("/", Book.objects.all())
+
+
+class _TestVectorPagination(SequenceVectorPagination):
+    page_size = 4
+    ordering = "-release"
+
+
+class TestSequenceVectorPagination(TestSequenceKeysetPagination):
+    """The tests of SequenceKeysetPagination apply, with a cursor per QuerySet."""
+
+    def setUp(self):
+        super().setUp()
+        self.pagination = _TestVectorPagination()
+
+    def test_positions(self):
+        """The cursor has the position of each QuerySet returned so far."""
+        self.paginate("/")
+        self.assertEqual(
+            self.pagination.next_position, {0: ("a", [date(2018, 10, 4), 4])}
+        )
+        self.assertEqual(
+            self.pagination.previous_position, {0: ("b", [date(2018, 10, 7), 7])}
+        )
+
+        self.paginate(self.pagination.get_next_link())
+        books = list(Book.objects.order_by("pk").values_list("pk", flat=True))
+        articles = list(Article.objects.order_by("pk").values_list("pk", flat=True))
+        self.assertEqual(
+            self.pagination.next_position,
+            {
+                0: ("a", [date(2018, 10, 3), books[2]]),
+                1: ("a", [date(2018, 10, 3), articles[3]]),
+            },
+        )
+
+    def test_exhausted(self):
+        """QuerySets are not queried once every row of them was returned."""
+        self.queryset = QuerySetSequence(
+            Book.objects.all(), Article.objects.filter(release__gte=date(2018, 10, 4))
+        )
+        # The articles are all on the first two pages.
+        queries = []
+        url = "/"
+        while url:
+            with self.assertNumQueries(len(queries) < 2 and 2 or 1):
+                self.paginate(url)
+            queries.append(url)
+            url = self.pagination.get_next_link()
+        self.assertEqual(self.pagination.next_position[1], ("e", None))
+
+        # Going back queries them again.
+        with self.assertNumQueries(2):
+            self.paginate(self.pagination.get_previous_link())
+
+    def test_stats(self):
+        """Statistics are only collected if enabled on the QuerySetSequence."""
+        with patch("queryset_sequence.stats.EvaluationStats") as stats_class:
+            self.paginate("/")
+        stats_class.assert_not_called()
+
+        queryset = self.queryset.collect_stats()
+        self.paginate("/", queryset)
+        stats = queryset.last_stats
+        self.assertEqual((stats.results, stats.queries), (5, 2))
+        self.assertEqual([s.queries for s in stats.sources.values()], [1, 1])
+        self.assertEqual([s.yielded for s in stats.sources.values()], [4, 1])
+
+    def test_cursor_size(self):
+        """Cursors stay compact and URL-safe with many QuerySets."""
+        queryset = QuerySetSequence(*[Book.objects.all() for _ in range(40)])
+        self.pagination.page_size = 60
+        self.assertEqual(
+            self.paginate("/", queryset), ["Book 7"] * 40 + ["Book 6"] * 20
+        )
+        self.assertEqual(len(self.pagination.next_position), 40)
+
+        url = self.pagination.get_next_link()
+        cursor = parse.parse_qs(parse.urlparse(url).query)["cursor"][0]
+        self.assertRegex(cursor, "^[A-Za-z0-9_-]+$")
+        self.assertIn("cursor=%s" % cursor, url)
+        self.assertLess(len(cursor), 400)
+
+        self.assertEqual(
+            self.paginate(url, queryset), ["Book 6"] * 20 + ["Book 5"] * 40
+        )
+
+    def test_invalid_cursor(self):
+        def encode(data):
+            return urlsafe_b64encode(zlib.compress(json.dumps(data).encode())).decode()
+
+        for cursor in (
+            "123",
+            encode([]),
+            encode({"a": {"0": ["2018-10-01"]}}),
+            encode({"a": {"x": ["2018-10-01", 1]}}),
+            encode({"a": {"0": ["a", 1]}}),
+            encode({"e": ["x"]}),
+        ):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(exceptions.NotFound):
+                    self.paginate("/?cursor=%s" % cursor)
@@ -1,6 +1,11 @@
+import gc
+import json
+import pickle
+import weakref
 from datetime import date
+from decimal import Decimal
 from unittest import skip, skipIf
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import django
 from django import forms
@@ -10,12 +15,37 @@ from django.core.exceptions import (
     MultipleObjectsReturned,
     ObjectDoesNotExist,
 )
-from django.db import connection
-from django.db.models import Count, Q
-from django.db.models.query import EmptyQuerySet
-from django.test import TestCase
-
-from queryset_sequence import QuerySetSequence
+from django.db import NotSupportedError, connection, models
+from django.db.models import (
+    Avg,
+    Count,
+    DateTimeField,
+    F,
+    Max,
+    Min,
+    Prefetch,
+    Q,
+    StdDev,
+    Sum,
+    Value,
+    Variance,
+)
+from django.db.models.functions import Cast, TruncDay
+from django.db.models.query import EmptyQuerySet, QuerySet
+from django.db.models.signals import pre_delete
+from django.db.models.sql.compiler import SQLCompiler
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from queryset_sequence import QuerySetSequence, signals
+from queryset_sequence.budget import QueryBudget, QueryBudgetExceeded, query_budget
+from queryset_sequence.distinct import dedupe
+from queryset_sequence.explain import (
+    SourcePlan,
+    explain_queryset,
+    parse_mysql,
+    parse_postgresql,
+)
 from tests.models import (
     Article,
     Author,
@@ -138,15 +168,24 @@ class TestLength(TestBase):
         with self.assertNumQueries(2):
             self.assertEqual(self.all[1:].count(), 4)
 
-        # This evaluates the QuerySets, which also causes count() on each to be
-        # called.
-        with self.assertNumQueries(4):
+        # Counting stops at the end of the slice.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.all[:2].count(), 2)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.all[1:3].count(), 2)
+        self.assertEqual(self.all[4:10].count(), 1)
+        self.assertEqual(self.all[10:].count(), 0)
+
+        # This counts the first QuerySet (to skip into it) and evaluates both
+        # QuerySets.
+        with self.assertNumQueries(3):
             self.assertEqual(len(self.all[1:]), 4)
 
     @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
     async def test_acount_slice(self):
         """Ensure the proper length is calculated when a slice is taken."""
         self.assertEqual(await self.all[1:].acount(), 4)
+        self.assertEqual(await self.all[1:3].acount(), 2)
 
     def test_empty_count(self):
         """An empty QuerySetSequence has a count of 0."""
@@ -162,6 +201,105 @@ class TestLength(TestBase):
         self.assertEqual(len(self.empty), 0)
 
 
+class TestChaining(TestBase):
+    def test_deferred(self):
+        """Chained calls are applied to each QuerySet once, when needed."""
+        qss = QuerySetSequence(
+            Book.objects.all(),
+            Book.objects.filter(title="Fiction"),
+            Article.objects.all(),
+            Book.objects.filter(title="Biography"),
+        )
+        with patch.object(QuerySet, "_chain", autospec=True) as mock_chain:
+            mock_chain.side_effect = lambda qs: qs._clone()
+            qss = qss.filter(author=self.bob).order_by("title").select_related()
+            # Only a QuerySet of each model is checked while chaining.
+            self.assertEqual(mock_chain.call_count, 6)
+
+            qss._querysets
+            # Each method is called once per QuerySet.
+            self.assertEqual(mock_chain.call_count, 12)
+
+        self.assertEqual(
+            [it.title for it in qss],
+            ["Biography", "Biography", "Fiction", "Fiction", "Some Article"],
+        )
+
+    def test_shared(self):
+        """Clones share the QuerySets until they're modified."""
+        qss = self.all.order_by("title")
+        clone = qss.all()
+        for qs, clone_qs in zip(qss._base_querysets, clone._base_querysets):
+            self.assertIs(clone_qs, qs)
+
+        # Applying the operations of a clone does not affect the original.
+        self.assertEqual(len(clone.filter(author=self.alice)), 2)
+        self.assertEqual(len(qss), 5)
+
+    def test_arguments_copied(self):
+        """Changing an argument after chaining doesn't change the results."""
+        book = Book.objects.get(title="Fiction")
+        ids = [book.pk]
+        titles = {"Fiction"}
+        qss = self.all.filter(pk__in=ids).filter(Q(title__in=titles))
+        ids.extend(Article.objects.values_list("pk", flat=True))
+        titles.add("Some Article")
+        self.assertEqual([it.title for it in qss], ["Fiction"])
+
+    def test_errors(self):
+        """Invalid arguments raise when chaining, as for a QuerySet."""
+        with self.assertNumQueries(0):
+            with self.assertRaises(FieldError):
+                self.all.filter(pages=10)
+            with self.assertRaises(FieldError):
+                self.all.values("unknown")
+
+    def test_reused(self):
+        """Clones reuse the QuerySets the pending operations were applied to."""
+        qss = self.all.filter(title__contains="i").order_by("title").select_related()
+        self.assertEqual(len(qss.all()), 4)
+
+        with patch.object(QuerySet, "_chain", autospec=True) as mock_chain:
+            mock_chain.side_effect = lambda qs: qs._clone()
+            for _ in range(3):
+                self.assertEqual(len(qss.all()), 4)
+            mock_chain.assert_not_called()
+
+            # Only further operations are applied.
+            self.assertEqual(len(qss.filter(author=self.bob)), 3)
+            self.assertEqual(mock_chain.call_count, 2)
+
+    def test_shared_not_cached(self):
+        """Evaluating a clone does not cache results in the shared QuerySets."""
+        qss = QuerySetSequence(Book.objects.all(), Article.objects.all())
+        clones = [
+            lambda: qss.all(),
+            lambda: qss.collect_stats(),
+            lambda: qss.identity_map(),
+            lambda: qss.prefetch_related("author"),
+            lambda: qss.cache_sql(),
+            lambda: qss.for_model(Book),
+            lambda: qss[0:10],
+        ]
+        before = [len(clone()) for clone in clones]
+        self.assertEqual([clone().count() for clone in clones], before)
+
+        Book.objects.create(title="New", author=self.alice, pages=1)
+        for clone, length in zip(clones, before):
+            with self.subTest(length=length):
+                self.assertEqual(len(clone()), length + 1)
+                self.assertEqual(clone().count(), length + 1)
+                self.assertTrue(clone().filter(title="New").exists())
+
+    def test_evaluated_querysets(self):
+        """QuerySets which were evaluated are not shared with clones."""
+        qss = self.all.all()
+        for qs in qss.get_querysets():
+            list(qs)
+        Book.objects.create(title="New", author=self.alice, pages=1)
+        self.assertEqual(len(qss.all()), 6)
+
+
 class TestIterator(TestBase):
     """Test the iterator when no ordering is set."""
 
@@ -176,6 +314,26 @@ class TestIterator(TestBase):
             data = [it.title for it in self.all.iterator()]
         self.assertEqual(data, TestIterator.TITLES_BY_PK)
 
+    def test_iterator_ordered(self):
+        """An iterator can interleave ordered QuerySets."""
+        with self.assertNumQueries(2):
+            data = [it.title for it in self.all.order_by("title").iterator()]
+        self.assertEqual(data, sorted(self.TITLES_BY_PK))
+
+    def test_iterator_values(self):
+        """An iterator can be used with values(), including the QuerySet index."""
+        with self.assertNumQueries(2):
+            data = list(
+                self.all.values_list("#", "title").order_by("release").iterator()
+            )
+        self.assertEqual(data[0], (1, "Some Article"))
+        self.assertEqual(data[-1], (0, "Biography"))
+
+    def test_iterator_no_cache(self):
+        """An iterator does not fill the result cache."""
+        list(self.all.iterator())
+        self.assertIsNone(self.all._result_cache)
+
     def test_iter(self):
         """Directly iteratoring the query should return the same results."""
         with self.assertNumQueries(2):
@@ -377,6 +535,50 @@ class TestRelated(TestBase):
             authors = [b.author.name for b in books]
         self.assertEqual(authors, self.EXPECTED_ORDER)
 
+    def test_select_related_identity_map(self):
+        """The identity map shares related objects across QuerySets."""
+        with self.assertNumQueries(2):
+            books = list(self.all.select_related("author").identity_map())
+        with self.assertNumQueries(0):
+            authors = [b.author.name for b in books]
+        self.assertEqual(authors, self.EXPECTED_ORDER)
+
+        # Bob wrote the first book and the last article.
+        self.assertIs(books[0].author, books[-1].author)
+        self.assertIs(books[2].author, books[3].author)
+
+        # Without the identity map each row has its own instance.
+        books = list(self.all.select_related("author"))
+        self.assertIsNot(books[0].author, books[-1].author)
+
+    def test_identity_map_nested(self):
+        """Related objects of related objects are shared too."""
+        qss = QuerySetSequence(
+            Article.objects.select_related("author", "publisher"),
+            BlogPost.objects.select_related("author", "publisher"),
+        ).identity_map()
+        items = list(qss)
+        self.assertIs(items[0].publisher, items[1].publisher)
+        self.assertIs(items[2].author, items[3].author)
+
+    def test_identity_map_iterator(self):
+        """Only related objects are kept by the identity map, not the results."""
+        qss = self.all.select_related("author").identity_map()
+        it = qss.iterator()
+        first = weakref.ref(next(it))
+        second = next(it)
+        gc.collect()
+        self.assertIsNone(first())
+
+        # Bob wrote the second book and the last article.
+        self.assertIs(second.author, list(it)[-1].author)
+
+    def test_identity_map_disabled(self):
+        """The identity map can be turned off again."""
+        qss = self.all.select_related("author").identity_map().identity_map(False)
+        books = list(qss)
+        self.assertIsNot(books[0].author, books[-1].author)
+
     # TODO Add a test for select_related that follows multiple ForeignKeys.
 
     def test_clear_select_related(self):
@@ -393,13 +595,78 @@ class TestRelated(TestBase):
         self.empty.select_related("author")
 
     def test_prefetch_related(self):
-        """Now ensure one database query for all authors, per QuerySet."""
-        with self.assertNumQueries(4):
+        """Now ensure one database query for all authors, across QuerySets."""
+        with self.assertNumQueries(3):
             books = list(self.all.prefetch_related("author"))
         with self.assertNumQueries(0):
             authors = [b.author.name for b in books]
         self.assertEqual(authors, self.EXPECTED_ORDER)
 
+        # The same author instance is shared across QuerySets.
+        self.assertIs(books[0].author, books[-1].author)
+
+    def test_prefetch_related_different_models(self):
+        """Related objects of different models are each fetched once."""
+        qss = QuerySetSequence(Article.objects.all(), BlogPost.objects.all())
+        with self.assertNumQueries(4):
+            items = list(qss.prefetch_related("publisher"))
+        with self.assertNumQueries(0):
+            publishers = [it.publisher.name for it in items]
+        self.assertEqual(publishers, ["Mad Magazine"] * 3 + ["Wacky Website"])
+
+    def test_prefetch_related_many_to_many(self):
+        """Relations which cannot be batched are prefetched per model."""
+        qss = QuerySetSequence(Book.objects.all(), Book.objects.filter(pages=10))
+        with self.assertNumQueries(3):
+            books = list(qss.prefetch_related(Prefetch("publishers")))
+        with self.assertNumQueries(0):
+            publishers = [[p.name for p in b.publishers.all()] for b in books]
+        self.assertEqual(publishers, [["Big Books"]] * 3)
+
+    def test_prefetch_related_iterator(self):
+        """Prefetching also happens for each chunk when using an iterator."""
+        with self.assertNumQueries(4):
+            books = list(self.all.prefetch_related("author").iterator(chunk_size=3))
+        with self.assertNumQueries(0):
+            authors = [b.author.name for b in books]
+        self.assertEqual(authors, self.EXPECTED_ORDER)
+
+    def test_prefetch_related_get(self):
+        """The result of get() is prefetched."""
+        with self.assertNumQueries(3):
+            book = self.all.prefetch_related("author").get(title="Fiction")
+        with self.assertNumQueries(0):
+            self.assertEqual(book.author.name, "Bob")
+
+    def test_prefetch_related_first(self):
+        """The results of first() and last() are prefetched."""
+        qss = self.all.prefetch_related("author")
+        for ordered in (qss, qss.order_by("title")):
+            for method in ("first", "last"):
+                with self.subTest(ordered=ordered.ordered, method=method):
+                    with self.assertNumQueries(3 if ordered.ordered else 2):
+                        item = getattr(ordered, method)()
+                    with self.assertNumQueries(0):
+                        item.author.name
+
+    def test_prefetch_related_latest(self):
+        """The results of latest() and earliest() are prefetched."""
+        qss = self.all.prefetch_related("author")
+        for method in ("latest", "earliest"):
+            with self.subTest(method=method):
+                with self.assertNumQueries(3):
+                    item = getattr(qss, method)("title")
+                with self.assertNumQueries(0):
+                    item.author.name
+
+    def test_prefetch_related_in_bulk(self):
+        """The results of in_bulk() are prefetched across QuerySets."""
+        with self.assertNumQueries(3):
+            items = self.all.prefetch_related("author").in_bulk()
+        with self.assertNumQueries(0):
+            authors = sorted(item.author.name for item in items.values())
+        self.assertEqual(authors, ["Alice", "Alice", "Bob", "Bob", "Bob"])
+
     # TODO Add a test for prefetch_related that follows multiple ForeignKeys.
 
     def test_clear_prefetch_related(self):
@@ -511,12 +778,85 @@ class TestDistinct(TestBase):
 
     def test_multiple_querysets_same_model(self):
         """
-        Calling distinct on a QuerySetSequence made up of multiple QuerySet instances
-        of the same model is not supported.
+        Instances in multiple QuerySets of the same model are only returned once.
         """
-        qss = QuerySetSequence(Book.objects.all(), Book.objects.all())
-        with self.assertRaises(NotImplementedError):
-            qss.distinct()
+        qss = QuerySetSequence(
+            Book.objects.all(), Book.objects.filter(title="Biography")
+        ).distinct()
+        self.assertEqual([b.title for b in qss], ["Fiction", "Biography"])
+        self.assertEqual(qss.count(), 2)
+
+        # The first duplicate is kept.
+        self.assertEqual([getattr(b, "#") for b in qss], [0, 0])
+
+    def test_ordered(self):
+        """Duplicates are removed while merging ordered QuerySets."""
+        qss = QuerySetSequence(
+            Book.objects.all(), Book.objects.filter(title="Biography")
+        ).order_by("pk")
+        with patch("queryset_sequence.dedupe") as mock_dedupe:
+            titles = [b.title for b in qss.distinct()]
+        self.assertEqual(titles, ["Fiction", "Biography"])
+        mock_dedupe.assert_not_called()
+
+    def test_fields(self):
+        """Results can be distinct by fields, across models."""
+        qss = self.all.order_by("author__name").distinct("author__name")
+        self.assertEqual([r.author.name for r in qss], ["Alice", "Bob"])
+
+        qss = self.all.values("author").distinct("author")
+        self.assertEqual(len(qss), 2)
+
+    def test_values_list(self):
+        qss = self.all.values_list("author__name", flat=True).distinct()
+        self.assertEqual(sorted(qss), ["Alice", "Bob"])
+
+        # The QuerySet index is part of the result, so results of different
+        # QuerySets are distinct.
+        qss = self.all.values_list("#", "author__name").distinct()
+        self.assertEqual(list(qss), [(0, "Bob"), (1, "Alice"), (1, "Bob")])
+
+        qss = self.all.values("#", "author__name").distinct()
+        self.assertEqual(
+            list(qss),
+            [
+                {"#": 0, "author__name": "Bob"},
+                {"#": 1, "author__name": "Alice"},
+                {"#": 1, "author__name": "Bob"},
+            ],
+        )
+
+        # Without it, duplicates are removed across QuerySets.
+        qss = self.all.values("author__name").distinct()
+        self.assertEqual(
+            list(qss), [{"author__name": "Bob"}, {"author__name": "Alice"}]
+        )
+
+        with self.assertRaises(FieldError):
+            list(self.all.values_list("title").distinct("author"))
+
+    def test_slicing(self):
+        """Slicing applies to the distinct results."""
+        qss = self.all.values_list("author__name", flat=True).distinct()
+        self.assertEqual(list(qss[1:]), ["Alice"])
+
+    def test_spill_to_disk(self):
+        """Keys past the in-memory limit are still deduplicated."""
+        qss = QuerySetSequence(
+            Book.objects.all(), Article.objects.all(), Book.objects.all()
+        )
+        qss = qss.values_list("title", flat=True).distinct(max_in_memory=1)
+        self.assertEqual(sorted(qss), sorted(self.TITLES_BY_PK))
+
+    def test_spill_to_disk_equal_keys(self):
+        """Keys on disk are compared by equality, not by their pickles."""
+        a = "".join(["a", "b"])
+        b = "".join(["a", "b"])
+        results = [("x",), (a, a), (a, b), (1,), (1.0,), (Decimal("1.00"),)]
+        self.assertEqual(
+            list(dedupe(results, lambda result: result, max_in_memory=1)),
+            [("x",), (a, a), (1,)],
+        )
 
 
 class TestFilter(TestBase):
@@ -1262,8 +1602,8 @@ class TestSlicing(TestBase):
 
     def test_single_element(self):
         """Single element."""
-        # 2 counts + evaluating one QuerySet.
-        with self.assertNumQueries(3):
+        # Only the first QuerySet is evaluated.
+        with self.assertNumQueries(1):
             result = self.all[0]
         self.assertEqual(result.title, "Fiction")
         self.assertIsInstance(result, Book)
@@ -1273,8 +1613,8 @@ class TestSlicing(TestBase):
         with self.assertNumQueries(0):
             qss = self.all[0:2]
 
-        # 2 counts + evaluating one QuerySet.
-        with self.assertNumQueries(3):
+        # Only the first QuerySet is evaluated.
+        with self.assertNumQueries(1):
             data = [it.title for it in qss]
         self.assertEqual(["Fiction", "Biography"], data)
 
@@ -1283,20 +1623,19 @@ class TestSlicing(TestBase):
         with self.assertNumQueries(0):
             qss = self.all[0:2]
 
-        # 2 counts + evaluating one QuerySet.
-        with self.assertNumQueries(3):
+        # Only the first QuerySet is evaluated.
+        with self.assertNumQueries(1):
             result = list(qss)
             data = [it.title for it in result]
         self.assertEqual(["Fiction", "Biography"], data)
 
     def test_multiple_QuerySets(self):
         """Test slicing across elements from multiple QuerySets."""
-        # 2 counts + 2 evaluations.
         with self.assertNumQueries(0):
             qss = self.all[1:3]
 
-        # 2 counts + evaluating two QuerySets.
-        with self.assertNumQueries(4):
+        # Counting the first QuerySet + evaluating two QuerySets.
+        with self.assertNumQueries(3):
             data = [it.title for it in qss]
         self.assertEqual(["Biography", "Django Rocks"], data)
 
@@ -1305,8 +1644,8 @@ class TestSlicing(TestBase):
         with self.assertNumQueries(0):
             result = self.all[1:3]
         self.assertIsInstance(result, QuerySetSequence)
-        # Evaluate the QuerySet.
-        with self.assertNumQueries(3):
+        # Counting the first QuerySet (which is skipped) + evaluating the second.
+        with self.assertNumQueries(2):
             article = result[1]
         self.assertEqual(article.title, "Django Rocks")
 
@@ -1319,14 +1658,14 @@ class TestSlicing(TestBase):
         with self.assertNumQueries(0):
             qss = qss[1:2]
 
-        # Evaluate the QuerySet.
-        with self.assertNumQueries(3):
+        # Counting the first QuerySet (which is skipped) + evaluating the second.
+        with self.assertNumQueries(2):
             data = [it.title for it in qss]
         self.assertEqual(data, ["Django Rocks"])
 
     def test_step(self):
         """Test behavior when a step is provided to the slice."""
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(2):
             qss = self.all[0:4:2]
             data = [it.title for it in qss]
         self.assertIsInstance(qss, list)
@@ -1706,6 +2045,35 @@ class TestContains(TestBase):
         obj = self.all.get_querysets()[0].first()
         self.assertFalse(self.empty.contains(obj))
 
+    def test_only_matching_model(self):
+        """Only QuerySets of the model of the item are queried."""
+        obj = Article.objects.first()
+        qss = QuerySetSequence(
+            Book.objects.all(), Article.objects.none(), Article.objects.all()
+        )
+        with patch.object(QuerySet, "contains", autospec=True) as mock_contains:
+            mock_contains.return_value = False
+            self.assertFalse(qss.contains(obj))
+        self.assertEqual(
+            [call.args[0].model for call in mock_contains.call_args_list],
+            [Article, Article],
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.all.contains(Book(title="Unsaved"))
+
+        with self.assertRaises(TypeError):
+            self.all.values("title").contains(Book.objects.first())
+
+        with self.assertRaises(TypeError):
+            self.all.contains("Fiction")
+
+    @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
+    async def test_acontains(self):
+        obj = await Article.objects.afirst()
+        self.assertTrue(await self.all.acontains(obj))
+
 
 class TestUpdate(TestBase):
     def test_update(self):
@@ -1765,12 +2133,918 @@ class TestDelete(TestBase):
         with self.assertNumQueries(2):
             self.assertEqual(self.all.count(), 3)
 
+    def test_delete_shared_cascade(self):
+        """Cascades shared between QuerySets are only collected once."""
+        qss = QuerySetSequence(
+            Author.objects.filter(name="Alice"), Author.objects.filter(name="Alice")
+        )
+        # The queries are: collecting the authors (and their books) for the
+        # first QuerySet, collecting the authors for the second QuerySet (which
+        # are already collected), fast deleting the articles and blog posts,
+        # then deleting the authors.
+        with self.assertNumQueries(6):
+            result = qss.delete()
+        self.assertEqual(result, (3, {"tests.Article": 2, "tests.Author": 1}))
+
+    def test_origin(self):
+        """The origin of the delete signals is the QuerySetSequence."""
+        origins = []
+
+        def receiver(sender, origin, **kwargs):
+            origins.append((sender, origin))
+
+        pre_delete.connect(receiver)
+        self.addCleanup(pre_delete.disconnect, receiver)
+        qss = self.all.filter(author=self.bob)
+        qss.delete()
+        self.assertCountEqual(origins, [(Book, qss), (Book, qss), (Article, qss)])
+
+    def test_sliced(self):
+        """Deleting a slice is not supported."""
+        with self.assertRaises(TypeError):
+            self.all[1:].delete()
+        self.assertEqual(self.all.count(), 5)
+
+    def test_values(self):
+        """Deleting after values() is not supported."""
+        with self.assertRaises(TypeError):
+            self.all.values("title").delete()
+
     def test_empty(self):
         """Calling delete on an empty QuerySetSequence should work."""
         result = self.empty.delete()
         self.assertEqual(result[0], 0)
         self.assertEqual(result[1], {})
 
+    @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
+    async def test_adelete(self):
+        result = await self.all.filter(author=self.alice).adelete()
+        self.assertEqual(result, (2, {"tests.Article": 2}))
+
+
+class TestBulkCreate(TestBase):
+    def test_bulk_create(self):
+        """Instances are created by the QuerySet of their model."""
+        objs = [
+            Book(title="New Book", author=self.bob, pages=5),
+            Article(
+                title="New Article", author=self.alice, publisher=self.mad_magazine
+            ),
+            Book(title="Another Book", author=self.bob, pages=6),
+        ]
+        with self.assertNumQueries(2):
+            result = self.all.bulk_create(objs)
+        # The instances are returned in the same order.
+        self.assertEqual(result, objs)
+        self.assertEqual(
+            [obj.title for obj in result], ["New Book", "New Article", "Another Book"]
+        )
+
+        self.assertEqual(self.all.count(), 8)
+        self.assertEqual(Book.objects.filter(title__endswith="Book").count(), 2)
+
+    def test_unknown_model(self):
+        """Instances of a model without a QuerySet cannot be created."""
+        with self.assertRaises(ValueError):
+            self.all.bulk_create([Author(name="Carol")])
+        self.assertEqual(Author.objects.count(), 2)
+
+    def test_empty(self):
+        """Creating nothing does not query."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.all.bulk_create([]), [])
+
+    @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
+    async def test_abulk_create(self):
+        objs = [Book(title="New Book", author=self.bob, pages=5)]
+        self.assertEqual(await self.all.abulk_create(objs), objs)
+        self.assertEqual(await self.all.acount(), 6)
+
+
+class TestBulkUpdate(TestBase):
+    def test_bulk_update(self):
+        """Instances are updated by the QuerySet of their model."""
+        objs = list(self.all)
+        for obj in objs:
+            obj.title = obj.title.upper()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.all.bulk_update(objs, ["title"]), 5)
+
+        self.assertEqual(
+            [it.title for it in self.all.all()],
+            [title.upper() for title in self.TITLES_BY_PK],
+        )
+
+    def test_unknown_model(self):
+        """If any instance cannot be updated, no changes are made."""
+        objs = list(self.all)
+        for obj in objs:
+            obj.title = "Changed"
+        with self.assertRaises(ValueError):
+            self.all.bulk_update(objs + [self.alice], ["title"])
+        self.assertEqual([it.title for it in self.all.all()], self.TITLES_BY_PK)
+
+    @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
+    async def test_abulk_update(self):
+        book = await Book.objects.aget(title="Fiction")
+        book.pages = 11
+        self.assertEqual(await self.all.abulk_update([book], ["pages"]), 1)
+
+
+class TestInBulk(TestBase):
+    def test_in_bulk(self):
+        """Objects are keyed by the QuerySet index and primary key."""
+        book = Book.objects.get(title="Biography")
+        article = Article.objects.get(title="Some Article")
+        with self.assertNumQueries(2):
+            result = self.all.in_bulk([book.pk, article.pk])
+        self.assertEqual(result[(0, book.pk)], book)
+        self.assertEqual(result[(1, article.pk)], article)
+        self.assertEqual(getattr(result[(1, article.pk)], "#"), 1)
+
+    def test_all(self):
+        """Without ids every object is returned."""
+        with self.assertNumQueries(2):
+            result = self.all.in_bulk()
+        self.assertEqual(len(result), 5)
+        self.assertEqual(
+            sorted(obj.title for obj in result.values()), sorted(self.TITLES_BY_PK)
+        )
+
+    def test_model_ids(self):
+        """Ids for a model are only looked up in QuerySets of that model."""
+        article = Article.objects.get(title="Some Article")
+        with self.assertNumQueries(1):
+            result = self.all.in_bulk([(Article, article.pk)])
+        self.assertEqual(result, {(1, article.pk): article})
+
+    def test_no_matching_model(self):
+        """QuerySets which cannot contain the ids are not queried."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.all.in_bulk([(BlogPost, 1)]), {})
+
+    def test_field_name(self):
+        """A unique field can be used instead of the primary key."""
+        book = Book.objects.get(title="Biography")
+        with self.assertNumQueries(1):
+            result = self.all.in_bulk([(Book, book.id)], field_name="id")
+        self.assertEqual(result, {(0, book.id): book})
+
+    def test_empty_ids(self):
+        """An empty list of ids does not query."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.all.in_bulk([]), {})
+
+    def test_sliced(self):
+        """Slicing is not supported."""
+        with self.assertRaises(TypeError):
+            self.all[1:].in_bulk()
+
+    @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
+    async def test_ain_bulk(self):
+        book = await Book.objects.aget(title="Biography")
+        result = await self.all.ain_bulk([(Book, book.pk)])
+        self.assertEqual(result, {(0, book.pk): book})
+
+
+class TestAggregate(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        # Split the books across QuerySets.
+        self.books = QuerySetSequence(
+            Book.objects.filter(pages__lt=15), Book.objects.filter(pages__gte=15)
+        )
+
+    def test_aggregate(self):
+        """Aggregates are combined from each QuerySet in a single query."""
+        with self.assertNumQueries(1):
+            result = self.all.aggregate(
+                Count("id"), earliest=Min("release"), latest=Max("release")
+            )
+        self.assertEqual(
+            result,
+            {
+                "id__count": 5,
+                "earliest": date(1979, 1, 1),
+                "latest": date(2002, 12, 24),
+            },
+        )
+
+    def test_split_aggregates(self):
+        """Aggregates which are split into partial aggregates are combined."""
+        with self.assertNumQueries(1):
+            result = self.books.aggregate(
+                Sum("pages"),
+                Avg("pages"),
+                StdDev("pages"),
+                variance=Variance("pages", sample=True),
+            )
+        self.assertEqual(result["pages__sum"], 30)
+        self.assertEqual(result["pages__avg"], 15)
+        self.assertAlmostEqual(result["pages__stddev"], 5)
+        self.assertAlmostEqual(result["variance"], 50)
+
+    def test_variance_large_mean(self):
+        """The variance is precise when the mean is large compared to the spread."""
+        value = F("pages") + 10**12
+        for aggregate in (Variance, StdDev):
+            for sample in (False, True):
+                with self.subTest(aggregate=aggregate.__name__, sample=sample):
+                    expected = Book.objects.aggregate(
+                        result=aggregate(value, sample=sample)
+                    )["result"]
+                    result = self.books.aggregate(
+                        result=aggregate(value, sample=sample)
+                    )["result"]
+                    self.assertAlmostEqual(result, expected)
+
+    def test_filter(self):
+        """The filter of an aggregate is applied to each QuerySet."""
+        result = self.all.aggregate(bob=Count("id", filter=Q(author=self.bob)))
+        self.assertEqual(result, {"bob": 3})
+
+    def test_empty(self):
+        """Aggregates of no rows are NULL, unless a default is given."""
+        books = self.books.filter(pages__gt=100)
+        self.assertEqual(
+            books.aggregate(Sum("pages"), Avg("pages"), Count("pages")),
+            {"pages__sum": None, "pages__avg": None, "pages__count": 0},
+        )
+        self.assertEqual(books.aggregate(total=Sum("pages", default=0)), {"total": 0})
+
+    def test_not_combinable(self):
+        """QuerySets which cannot be combined are aggregated separately."""
+        with self.assertNumQueries(2):
+            result = QuerySetSequence(
+                Book.objects.distinct(), Article.objects.all()
+            ).aggregate(Count("id"))
+        self.assertEqual(result, {"id__count": 5})
+
+    def test_unsupported(self):
+        """Aggregates which cannot be combined raise an error."""
+        with self.assertRaises(NotImplementedError):
+            self.all.aggregate(Count("author", distinct=True))
+
+        with self.assertRaises(NotImplementedError):
+            self.all[1:].aggregate(Count("id"))
+
+        with self.assertRaises(TypeError):
+            self.all.aggregate(Count("id") + Count("id"))
+
+    @skipIf(django.VERSION < (4, 1), "Not supported in Django < 4.1.")
+    async def test_aaggregate(self):
+        result = await self.books.aaggregate(Avg("pages"))
+        self.assertEqual(result, {"pages__avg": 15})
+
+
+class TestMergeGroups(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        self.by_author = (
+            self.all.values("author__name")
+            .annotate(count=Count("id"), latest=Max("release"))
+            .merge_groups()
+        )
+
+    def test_merge_groups(self):
+        """The groups of each QuerySet are combined by the group key."""
+        with self.assertNumQueries(2):
+            data = list(self.by_author.order_by("author__name"))
+        self.assertEqual(
+            data,
+            [
+                {"author__name": "Alice", "count": 2, "latest": date(1990, 8, 14)},
+                {"author__name": "Bob", "count": 3, "latest": date(2002, 12, 24)},
+            ],
+        )
+        self.assertEqual(self.by_author.count(), 2)
+
+    def test_not_merged(self):
+        """Without merge_groups() each QuerySet returns its own groups."""
+        data = list(self.all.values("author__name").annotate(count=Count("id")))
+        self.assertEqual(len(data), 3)
+
+    def test_order_by_aggregate(self):
+        """Groups can be ordered by an aggregate and sliced to the top groups."""
+        data = list(self.by_author.order_by("-count")[:1])
+        self.assertEqual([row["author__name"] for row in data], ["Bob"])
+
+    def test_reverse(self):
+        data = self.by_author.order_by("author__name").reverse()
+        self.assertEqual([row["author__name"] for row in data], ["Bob", "Alice"])
+
+    def test_values_list(self):
+        data = (
+            self.all.values_list("author__name")
+            .annotate(Count("id"))
+            .merge_groups()
+            .order_by("author__name")
+        )
+        self.assertEqual(list(data), [("Alice", 2), ("Bob", 3)])
+
+        data = (
+            self.all.values_list("author__name", named=True)
+            .annotate(Count("id"))
+            .merge_groups()
+            .order_by("-author__name")
+        )
+        self.assertEqual([row.id__count for row in data], [3, 2])
+
+    def test_no_aggregates(self):
+        """Without aggregates, each group is returned once."""
+        data = self.all.values_list("author__name", flat=True).merge_groups()
+        self.assertEqual(list(data.order_by("author__name")), ["Alice", "Bob"])
+
+    def test_invalid(self):
+        with self.assertRaises(TypeError):
+            list(self.all.merge_groups())
+
+        with self.assertRaises(FieldError):
+            list(self.by_author.order_by("title"))
+
+
+class TestSetOperations(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        self.alice_articles = Article.objects.filter(author=self.alice)
+
+    def assertCombinator(self, qss, combinator):
+        for qs in qss.get_querysets():
+            self.assertEqual(qs.query.combinator, combinator)
+
+    def test_union(self):
+        """The QuerySets of each model are combined by the database."""
+        qss = QuerySetSequence(
+            Book.objects.filter(pages=10), self.alice_articles
+        ).union(Book.objects.filter(pages=20), Article.objects.all())
+        self.assertCombinator(qss, "union")
+        with self.assertNumQueries(2):
+            data = [it.title for it in qss.order_by("title")]
+        self.assertEqual(data, sorted(self.TITLES_BY_PK))
+
+    def test_union_all(self):
+        qss = self.all.union(Book.objects.all(), all=True)
+        self.assertEqual(qss.count(), 7)
+
+    def test_intersection(self):
+        qss = self.all.intersection(self.alice_articles)
+        self.assertCombinator(qss, "intersection")
+        self.assertEqual(
+            sorted(it.title for it in qss), ["Alice in Django-land", "Django Rocks"]
+        )
+
+    def test_difference(self):
+        qss = self.all.difference(self.alice_articles)
+        self.assertEqual(
+            [it.title for it in qss.order_by("title")],
+            ["Biography", "Fiction", "Some Article"],
+        )
+
+    def test_union_same_model(self):
+        """QuerySets of the same model in a side are chained, without duplicates."""
+        fiction = Book.objects.filter(title="Fiction")
+        qss = QuerySetSequence(Book.objects.all(), fiction)
+        self.assertEqual(
+            [it.title for it in qss.union(fiction).order_by("title")],
+            ["Biography", "Fiction"],
+        )
+        self.assertEqual(qss.union(fiction, all=True).count(), 4)
+
+    def test_intersection_values(self):
+        """Values are compared while iterating."""
+        qss = self.all.values_list("title", flat=True).intersection(
+            self.alice_articles.values_list("title"),
+            QuerySetSequence(Book.objects.all(), Article.objects.all()),
+        )
+        self.assertEqual(sorted(qss), ["Alice in Django-land", "Django Rocks"])
+        self.assertEqual(qss.count(), 2)
+        self.assertTrue(qss.exists())
+
+    def test_ordered(self):
+        """Ordered results are compared in runs of the ordering."""
+        qss = (
+            QuerySetSequence(Book.objects.all(), Book.objects.filter(pages=10))
+            .order_by("-pages")
+            .difference(Book.objects.filter(title="Biography"))
+        )
+        with patch("queryset_sequence.dedupe") as mock_dedupe:
+            self.assertEqual([it.title for it in qss], ["Fiction"])
+        mock_dedupe.assert_not_called()
+
+        qss = (
+            self.all.values_list("title", flat=True)
+            .order_by("title")
+            .intersection(
+                self.alice_articles.values_list("title"),
+                Article.objects.values_list("title"),
+            )
+        )
+        self.assertEqual(list(qss), ["Alice in Django-land", "Django Rocks"])
+        self.assertEqual(qss.first(), "Alice in Django-land")
+        self.assertEqual(qss.last(), "Django Rocks")
+        self.assertEqual(list(qss[1:]), ["Django Rocks"])
+
+    def test_not_supported(self):
+        qss = self.all.values_list("title").difference(self.alice_articles)
+        with self.assertRaises(NotSupportedError):
+            qss.filter(title="Fiction")
+
+        with self.assertRaises(NotSupportedError):
+            qss.union(Book.objects.all())
+
+        with self.assertRaises(TypeError):
+            self.all[1:].union(Book.objects.all())
+
+
+class TestDates(TestBase):
+    def setUp(self):
+        super().setUp()
+
+        # An article released the same year as a book.
+        Article.objects.create(
+            title="Bonus Article",
+            author=self.bob,
+            publisher=self.mad_magazine,
+            release=date(2001, 1, 5),
+        )
+
+    def test_dates(self):
+        """The dates of each QuerySet are merged without duplicates."""
+        with self.assertNumQueries(2):
+            data = list(self.all.dates("release", "year"))
+        self.assertEqual(
+            data, [date(year, 1, 1) for year in [1979, 1980, 1990, 2001, 2002]]
+        )
+
+    def test_order(self):
+        data = list(self.all.dates("release", "year", order="DESC")[:3])
+        self.assertEqual(data, [date(year, 1, 1) for year in [2002, 2001, 1990]])
+
+    def test_filtered(self):
+        qss = self.all.filter(author=self.bob).dates("release", "month")
+        self.assertEqual(
+            list(qss),
+            [date(1979, 1, 1), date(2001, 1, 1), date(2001, 6, 1), date(2002, 12, 1)],
+        )
+        self.assertEqual(qss.count(), 4)
+
+
+class TestForModel(TestBase):
+    def test_for_model(self):
+        """Only the QuerySets of the model are kept, with their index."""
+        qss = self.all.for_model(Article)
+        with self.assertNumQueries(1):
+            data = list(qss)
+        self.assertEqual(len(data), 3)
+        self.assertEqual({getattr(it, "#") for it in data}, {1})
+
+    def test_filter(self):
+        """The QuerySets can still be filtered by their index."""
+        qss = self.all.for_model(Article).filter(**{"#": 1})
+        self.assertEqual(qss.count(), 3)
+
+    def test_no_matches(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(list(self.all.for_model(BlogPost)), [])
+            self.assertEqual(self.all.for_model(BlogPost).count(), 0)
+
+    def test_get_instance(self):
+        """Getting by a model instance only queries QuerySets of its model."""
+        article = Article.objects.get(title="Some Article")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.all.get(pk=article), article)
+
+        blog_post = BlogPost.objects.get()
+        with self.assertNumQueries(0):
+            with self.assertRaises(ObjectDoesNotExist):
+                self.all.get(pk=blog_post)
+
+
+class TestCacheSQL(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.as_sql = patch(
+            "django.db.models.sql.compiler.SQLCompiler.as_sql",
+            autospec=True,
+            side_effect=SQLCompiler.as_sql,
+        )
+
+    def test_reused(self):
+        """The SQL is compiled once for clones with the same operations."""
+        qss = self.all.cache_sql()
+        with self.as_sql as as_sql:
+            with self.assertNumQueries(2):
+                first = list(qss.filter(title__contains="i").order_by("title"))
+            self.assertEqual(as_sql.call_count, 2)
+
+            with self.assertNumQueries(2):
+                second = list(qss.filter(title__contains="i").order_by("title"))
+            self.assertEqual(as_sql.call_count, 2)
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [it.title for it in second],
+            ["Alice in Django-land", "Biography", "Fiction", "Some Article"],
+        )
+
+    def test_arguments(self):
+        """Operations with different arguments are compiled separately."""
+        qss = self.all.cache_sql()
+        with self.as_sql as as_sql:
+            self.assertEqual(len(qss.filter(title="Fiction")), 1)
+            self.assertEqual(len(qss.filter(title="Biography")), 1)
+            self.assertEqual(as_sql.call_count, 4)
+
+    def test_values(self):
+        qss = self.all.cache_sql()
+        with self.as_sql as as_sql:
+            list(qss.values("title"))
+            data = list(qss.values("title"))
+            self.assertEqual(as_sql.call_count, 2)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0], {"title": "Fiction"})
+
+    def test_no_matches(self):
+        qss = self.all.cache_sql()
+        for _ in range(2):
+            with self.assertNumQueries(0):
+                self.assertEqual(list(qss.filter(pk__in=[])), [])
+
+    def test_clone(self):
+        """Changing the QuerySets stops caching."""
+        qss = self.all.cache_sql().filter(title="Fiction")
+        qs = qss.get_querysets()[0]
+        self.assertIs(type(qs.filter(pages=10).query), type(Book.objects.all().query))
+        self.assertEqual(qs.count(), 1)
+        self.assertEqual(qs.filter(pages=20).count(), 0)
+
+    def test_argument_types(self):
+        """Equal arguments of different types are compiled separately."""
+        qss = self.all.cache_sql()
+        self.assertEqual(len(qss.filter(title__in=["1"])), 0)
+        # The titles are not numbers, but the parameters are different.
+        with self.as_sql as as_sql:
+            self.assertEqual(len(qss.filter(title__in=[1.0])), 0)
+            self.assertEqual(as_sql.call_count, 2)
+
+        qss = QuerySetSequence(Book.objects.all()).cache_sql()
+        book = Book.objects.get(title="Fiction")
+        self.assertEqual(len(qss.filter(pages=Value(book.pages))), 1)
+        with self.as_sql as as_sql:
+            self.assertEqual(len(qss.filter(pages=Value(float(book.pages)))), 1)
+            self.assertEqual(as_sql.call_count, 1)
+
+    def test_timezone(self):
+        """SQL which uses the current timezone is compiled for each timezone."""
+        books = Book.objects.filter(title="Fiction")
+        day = TruncDay(Cast("release", DateTimeField()))
+        qss = QuerySetSequence(books).cache_sql().annotate(day=day).values_list("day")
+        with timezone.override("UTC"):
+            utc = list(qss.all())
+        with timezone.override("America/New_York"):
+            new_york = list(qss.all())
+            expected = list(books.annotate(day=day).values_list("day"))
+        self.assertEqual(new_york, expected)
+        self.assertNotEqual(new_york, utc)
+
+        # The SQL is cached for each timezone.
+        with self.as_sql as as_sql:
+            with timezone.override("UTC"):
+                self.assertEqual(list(qss.all()), utc)
+            with timezone.override("America/New_York"):
+                self.assertEqual(list(qss.all()), new_york)
+            as_sql.assert_not_called()
+
+    def test_pickle(self):
+        """QuerySets with a cached SQL can be pickled, without the cache."""
+        qss = self.all.cache_sql().filter(title__contains="i")
+        for qs in qss.get_querysets():
+            with self.subTest(model=qs.model.__name__):
+                unpickled = pickle.loads(pickle.dumps(qs))
+                self.assertIs(type(unpickled.query), type(qs.model.objects.all().query))
+                self.assertFalse(hasattr(unpickled.query, "_sql_cache"))
+                self.assertEqual(list(unpickled), list(qs))
+
+    def test_disabled(self):
+        qss = self.all.cache_sql().cache_sql(False)
+        with self.as_sql as as_sql:
+            list(qss.all())
+            list(qss.all())
+            self.assertEqual(as_sql.call_count, 4)
+
+
+class TestStats(TestBase):
+    def test_disabled(self):
+        self.assertIsNone(self.all.last_stats)
+        qss = self.all.collect_stats().collect_stats(False)
+        list(qss)
+        self.assertIsNone(qss.last_stats)
+
+    def test_ordered(self):
+        qss = self.all.collect_stats()
+        self.assertIsNone(qss.last_stats)
+
+        data = list(qss.order_by("title")[:3])
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "iterate")
+        self.assertEqual(stats.strategies, ["ordered"])
+        self.assertEqual(stats.results, 3)
+        self.assertEqual(stats.queries, 2)
+        self.assertGreater(stats.comparisons, 0)
+        self.assertGreater(stats.time, 0)
+
+        self.assertEqual(
+            [it.title for it in data],
+            ["Alice in Django-land", "Biography", "Django Rocks"],
+        )
+        books, articles = stats.sources[0], stats.sources[1]
+        self.assertEqual((books.queries, books.fetched, books.yielded), (1, 2, 1))
+        self.assertEqual(
+            (articles.queries, articles.fetched, articles.yielded), (1, 2, 2)
+        )
+        self.assertEqual(books.overfetch, 1)
+
+    def test_sliced(self):
+        qss = self.all.collect_stats()
+        list(qss[2:4])
+        stats = qss.last_stats
+        self.assertEqual(stats.strategies, ["sliced"])
+        # The books are only counted, to skip them.
+        self.assertEqual((stats.sources[0].queries, stats.sources[0].fetched), (1, 0))
+        self.assertEqual(stats.sources[1].yielded, 2)
+
+    def test_distinct(self):
+        qss = self.all.collect_stats().values("title").order_by("title").distinct()
+        list(qss)
+        self.assertEqual(qss.last_stats.strategies, ["ordered", "distinct-sorted"])
+
+    def test_methods(self):
+        qss = self.all.collect_stats()
+
+        qss.count()
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "count")
+        self.assertEqual([s.queries for s in stats.sources.values()], [1, 1])
+
+        qss.exists()
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "exists")
+        self.assertEqual(list(stats.sources), [0])
+
+        qss.get(title="Django Rocks")
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "get")
+        self.assertEqual(stats.queries, 2)
+
+        self.assertEqual(len(list(qss.values("title").iterator())), 5)
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "iterator")
+        self.assertEqual(stats.results, 5)
+        self.assertEqual(stats.sources[1].fetched, 3)
+
+    def test_single_object_methods(self):
+        qss = self.all.collect_stats()
+        for ordered in (qss, qss.order_by("title")):
+            for method in ("first", "last"):
+                with self.subTest(ordered=ordered.ordered, method=method):
+                    getattr(ordered, method)()
+                    stats = ordered.last_stats
+                    self.assertEqual(stats.method, method)
+                    queries = 2 if ordered.ordered else 1
+                    self.assertEqual(stats.queries, queries)
+                    self.assertEqual(len(stats.sources), queries)
+
+        for method in ("latest", "earliest"):
+            with self.subTest(method=method):
+                getattr(qss, method)("title")
+                stats = qss.last_stats
+                self.assertEqual(stats.method, method)
+                self.assertEqual([s.queries for s in stats.sources.values()], [1, 1])
+
+    def test_in_bulk(self):
+        qss = self.all.collect_stats()
+        qss.in_bulk()
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "in_bulk")
+        self.assertEqual(stats.results, 5)
+        self.assertEqual([s.queries for s in stats.sources.values()], [1, 1])
+
+    def test_aggregate(self):
+        # A single query for every QuerySet.
+        qss = self.all.collect_stats()
+        qss.aggregate(Count("id"))
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "aggregate")
+        self.assertEqual(stats.queries, 1)
+
+        # A query for each QuerySet.
+        qss = QuerySetSequence(Book.objects.distinct(), Article.objects.all())
+        qss = qss.collect_stats()
+        qss.aggregate(Count("id"))
+        stats = qss.last_stats
+        self.assertEqual(stats.method, "aggregate")
+        self.assertEqual([s.queries for s in stats.sources.values()], [1, 1])
+
+    def test_budget_first(self):
+        """Query budgets apply to first()."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(max_queries=1):
+                self.all.order_by("title").first()
+
+    def test_clones(self):
+        """The evaluation of clones is recorded (e.g. from pagination)."""
+        qss = self.all.collect_stats()
+        list(qss.filter(title__contains="i")[:1])
+        self.assertEqual(qss.last_stats.results, 1)
+
+    def test_iterator_caller_queries(self):
+        """Queries made while iterating the results aren't recorded."""
+        qss = self.all.collect_stats()
+        for _ in qss.iterator():
+            self.assertEqual(Author.objects.count(), 2)
+        stats = qss.last_stats
+        self.assertEqual(stats.results, 5)
+        self.assertEqual(stats.queries, 2)
+        self.assertEqual([s.queries for s in stats.sources.values()], [1, 1])
+
+    def test_iterator_interleaved(self):
+        """Iterators can be interleaved, each records its own queries."""
+        books = QuerySetSequence(Book.objects.all()).collect_stats()
+        articles = QuerySetSequence(Article.objects.all()).collect_stats()
+        book_iterator = books.iterator(chunk_size=1)
+        article_iterator = articles.iterator(chunk_size=1)
+        for _ in zip(book_iterator, article_iterator):
+            pass
+        list(article_iterator)
+        self.assertEqual(connection.execute_wrappers, [])
+
+        self.assertEqual((books.last_stats.results, books.last_stats.queries), (2, 1))
+        self.assertEqual(
+            (articles.last_stats.results, articles.last_stats.queries), (3, 1)
+        )
+
+
+class TestSignals(TestBase):
+    def connect(self, signal):
+        """Connect a receiver which records the arguments of each call."""
+        calls = []
+
+        def receiver(**kwargs):
+            calls.append(kwargs)
+
+        signal.connect(receiver)
+        self.addCleanup(signal.disconnect, receiver)
+        return calls
+
+    def test_disabled(self):
+        """Evaluating is not instrumented without any receivers."""
+        self.assertIsNone(self.all._start_stats("iterate"))
+
+    def test_evaluate(self):
+        pre = self.connect(signals.pre_evaluate)
+        post = self.connect(signals.post_evaluate)
+
+        qss = self.all.filter(title="Fiction")
+        self.assertEqual(qss.count(), 1)
+
+        self.assertEqual(len(pre), 1)
+        self.assertEqual(pre[0]["sender"], QuerySetSequence)
+        self.assertIs(pre[0]["sequence"], qss)
+        self.assertEqual(pre[0]["method"], "count")
+
+        self.assertEqual(len(post), 1)
+        stats = post[0]["stats"]
+        self.assertEqual(stats.queries, 2)
+        self.assertEqual(stats.sources[0].model, Book)
+        self.assertEqual(stats.sources[1].using, "default")
+
+        list(qss.iterator())
+        self.assertEqual([c["method"] for c in post], ["count", "iterator"])
+        self.assertEqual(post[-1]["stats"].results, 1)
+
+    def test_source_query(self):
+        pre = self.connect(signals.pre_source_query)
+        post = self.connect(signals.post_source_query)
+
+        list(self.all.order_by("title"))
+        self.assertEqual([c["sender"] for c in pre], [Book, Article])
+        self.assertEqual([c["index"] for c in post], [0, 1])
+        self.assertEqual(post[0]["using"], "default")
+        self.assertIn("tests_book", post[0]["sql"])
+        self.assertGreaterEqual(post[0]["duration"], 0)
+
+    def test_slow_source_logger(self):
+        slow_logger = signals.SlowSourceLogger(threshold=0).connect()
+        self.addCleanup(slow_logger.disconnect)
+        with self.assertLogs("queryset_sequence", "WARNING") as logs:
+            list(self.all)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("QuerySet #0 (Book)", logs.output[0])
+        self.assertIn("tests_article", logs.output[1])
+
+    def test_slow_source_logger_threshold(self):
+        mock_logger = Mock()
+        slow_logger = signals.SlowSourceLogger(60, logger=mock_logger).connect()
+        self.addCleanup(slow_logger.disconnect)
+        list(self.all)
+        mock_logger.log.assert_not_called()
+
+
+class TestQueryBudget(TestBase):
+    def test_disabled(self):
+        """Evaluating is not instrumented without a budget."""
+        self.assertIsNone(self.all._start_stats("iterate"))
+        with self.all.query_budget(max_queries=2):
+            self.assertIsNotNone(self.all._start_stats("iterate"))
+        self.assertIsNone(self.all._start_stats("iterate"))
+
+    def test_within(self):
+        with self.all.query_budget(max_queries=2, max_rows=5):
+            self.assertEqual(len(self.all.all()), 5)
+            self.assertEqual(self.all.count(), 5)
+
+    def test_queries(self):
+        """The QuerySet making the query over the budget is named."""
+        with self.all.query_budget(max_queries=1):
+            with self.assertRaises(QueryBudgetExceeded) as context:
+                self.all.count()
+        self.assertEqual(
+            str(context.exception),
+            "QuerySetSequence count() exceeded its budget of 1 queries: query 2 "
+            "was made by QuerySet #1 (Article) on database 'default'. Queries by "
+            "QuerySet: #0: 1, #1: 1; outside of the QuerySets: 0.",
+        )
+        self.assertEqual(context.exception.stats.method, "count")
+
+    def test_lazy_loads(self):
+        """Queries outside of the QuerySets, e.g. N+1 queries, are counted."""
+        # Comparing the authors of each result loads them.
+        qss = self.all.order_by("author__name")
+        with qss.query_budget(max_queries=2):
+            with self.assertRaises(QueryBudgetExceeded) as context:
+                list(qss)
+        self.assertIn(
+            "iteration (ordered) exceeded its budget of 2 queries: query 3 was not "
+            "made by one of the QuerySets (e.g. loading a related object lazily).",
+            str(context.exception),
+        )
+
+    def test_iterator_caller_queries(self):
+        """Queries made while iterating the results don't count."""
+        with self.all.query_budget(max_queries=2):
+            for _ in self.all.iterator():
+                self.assertEqual(Author.objects.count(), 2)
+
+    def test_rows(self):
+        qss = self.all.order_by("title")
+        with qss.query_budget(max_rows=4):
+            with self.assertRaises(QueryBudgetExceeded) as context:
+                list(qss.iterator())
+        self.assertIn(
+            "iterator() (ordered) exceeded its budget of 4 rows: row 5 was fetched "
+            "from QuerySet #",
+            str(context.exception),
+        )
+
+    def test_log(self):
+        with self.all.query_budget(max_queries=0, action="log"):
+            with self.assertLogs("queryset_sequence", "WARNING") as logs:
+                self.assertEqual(self.all.count(), 5)
+        # Logged once, for the first query over the budget.
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("count() exceeded its budget of 0 queries", logs.output[0])
+
+    def test_invalid_action(self):
+        with self.assertRaises(ValueError):
+            QueryBudget(action="ignore")
+
+    def test_scope(self):
+        """
+        The budget of a QuerySetSequence applies to its clones, but not to other
+        QuerySetSequences.
+        """
+        qss = QuerySetSequence(Book.objects.all(), Article.objects.all())
+        with self.all.query_budget(max_queries=1):
+            self.assertEqual(qss.count(), 5)
+            with self.assertRaises(QueryBudgetExceeded):
+                self.all.filter(title="Fiction").count()
+
+    def test_global(self):
+        """Without a QuerySetSequence, the budget applies to all of them."""
+        qss = QuerySetSequence(Book.objects.all(), Article.objects.all())
+        with query_budget(max_queries=1):
+            with self.assertRaises(QueryBudgetExceeded):
+                qss.count()
+
+    @override_settings(QUERYSET_SEQUENCE_QUERY_BUDGET={"max_rows": 2})
+    def test_setting(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            list(self.all)
+        self.assertEqual(len(self.all.filter(title="Fiction")), 1)
+
 
 class TestExplain(TestBase):
     def test_supported(self):
@@ -1781,6 +3055,262 @@ class TestExplain(TestBase):
         self.assertEqual(len(explanation.split("\n")), 2)
 
 
+@skipIf(connection.vendor != "sqlite", "The plans are specific to SQLite.")
+class TestExplainSources(TestBase):
+    def test_sources(self):
+        """Each QuerySet is explained separately."""
+        qss = QuerySetSequence(Book.objects.all(), Article.objects.all())
+        with self.assertNumQueries(2):
+            sources = qss.explain_sources()
+
+        self.assertEqual([s.index for s in sources], [0, 1])
+        self.assertEqual([s.model for s in sources], [Book, Article])
+        self.assertEqual([s.using for s in sources], ["default", "default"])
+        self.assertEqual([s.format for s in sources], ["text", "text"])
+        self.assertEqual(sources[0].plan, Book.objects.all().explain())
+        # SQLite does not estimate the cost or rows, without analyzing nothing
+        # is timed.
+        self.assertIsNone(sources[0].cost)
+        self.assertIsNone(sources[0].rows)
+        self.assertIsNone(sources[0].time)
+        self.assertFalse(any(s.slowest for s in sources))
+        # A scan without filtering or ordering is not a problem.
+        self.assertEqual(sources[0].warnings, [])
+
+    def test_index(self):
+        """The QuerySet index is kept after filtering on '#'."""
+        sources = self.all.filter(**{"#": 1}).explain_sources()
+        self.assertEqual([s.index for s in sources], [1])
+
+    def test_warnings(self):
+        """Sequential scans of the filtered and ordered columns are flagged."""
+        qss = QuerySetSequence(
+            Book.objects.filter(pages__gt=5), Article.objects.filter(pk=1)
+        ).order_by("title")
+        book, article = qss.explain_sources()
+        self.assertEqual(
+            book.warnings,
+            [
+                "Sequential scan on tests_book filtering on pages.",
+                "Sequential scan on tests_book sorted by title.",
+            ],
+        )
+        # Found using the primary key.
+        self.assertEqual(article.warnings, [])
+
+    def test_warnings_related(self):
+        """Only the columns of the scanned table are reported."""
+        (book,) = QuerySetSequence(
+            Book.objects.filter(author__name="Bob")
+        ).explain_sources()
+        # SQLite scans the authors, then finds their books by the index.
+        self.assertEqual(
+            book.warnings, ["Sequential scan on tests_author filtering on name."]
+        )
+
+    def test_analyze(self):
+        """Analyzing executes and times each query, marking the slowest."""
+        with self.assertNumQueries(4):
+            sources = self.all.explain_sources(analyze=True)
+        self.assertTrue(all(s.time >= 0 for s in sources))
+        slowest = [s for s in sources if s.slowest]
+        self.assertEqual(len(slowest), 1)
+        self.assertEqual(slowest[0].time, max(s.time for s in sources))
+        self.assertIn("[slowest]", str(slowest[0]))
+
+    def test_str(self):
+        (book,) = QuerySetSequence(Book.objects.order_by("title")).explain_sources()
+        lines = str(book).split("\n")
+        self.assertEqual(lines[0], "#0 Book (default): cost=None rows=None")
+        self.assertEqual(
+            lines[1], "Warning: Sequential scan on tests_book sorted by title."
+        )
+        self.assertEqual("\n".join(lines[2:]), book.plan)
+
+    def test_parallel(self):
+        """Not in parallel in a transaction, unless asked for."""
+        with patch("queryset_sequence.explain.ThreadPoolExecutor") as executor:
+            self.all.explain_sources()
+        executor.assert_not_called()
+
+        with patch(
+            "queryset_sequence.explain.can_run_in_parallel", return_value=True
+        ), patch(
+            "queryset_sequence.explain._explain_in_thread",
+            side_effect=lambda index, qs, analyze, options: explain_queryset(
+                index, qs, analyze, **options
+            ),
+        ) as explain_in_thread:
+            sources = self.all.explain_sources()
+        self.assertEqual(explain_in_thread.call_count, 2)
+        self.assertEqual([s.model for s in sources], [Book, Article])
+
+
+class TestExplainParsers(TestCase):
+    """The JSON plans of other databases."""
+
+    POSTGRESQL_PLAN = [
+        {
+            "Plan": {
+                "Node Type": "Sort",
+                "Total Cost": 25.8,
+                "Plan Rows": 7,
+                "Sort Key": ["title"],
+                "Plans": [
+                    {
+                        "Node Type": "Seq Scan",
+                        "Relation Name": "tests_book",
+                        "Total Cost": 25.5,
+                        "Plan Rows": 7,
+                        "Filter": "(pages > 5)",
+                    }
+                ],
+            },
+            "Planning Time": 0.1,
+            "Execution Time": 12.5,
+        }
+    ]
+
+    MYSQL_PLAN = {
+        "query_block": {
+            "select_id": 1,
+            "cost_info": {"query_cost": "1.25"},
+            "ordering_operation": {
+                "using_filesort": True,
+                "table": {
+                    "table_name": "tests_book",
+                    "access_type": "ALL",
+                    "rows_examined_per_scan": 3,
+                    "rows_produced_per_join": 1,
+                    "attached_condition": "(`tests_book`.`pages` > 5)",
+                },
+            },
+        }
+    }
+
+    def setUp(self):
+        self.source = SourcePlan(0, Book.objects.all())
+        self.filters = {"tests_book": ["pages"]}
+
+    def test_postgresql(self):
+        parse_postgresql(
+            self.source, json.dumps(self.POSTGRESQL_PLAN), self.filters, ["title"]
+        )
+        self.assertEqual(self.source.cost, 25.8)
+        self.assertEqual(self.source.rows, 7)
+        self.assertEqual(self.source.time, 0.0125)
+        self.assertEqual(
+            self.source.warnings,
+            [
+                "Sequential scan on tests_book filtering on pages.",
+                "Sequential scan on tests_book sorted by title.",
+            ],
+        )
+
+    def test_postgresql_index(self):
+        plan = [
+            {
+                "Plan": {
+                    "Node Type": "Index Scan",
+                    "Relation Name": "tests_book",
+                    "Total Cost": 8.3,
+                    "Plan Rows": 1,
+                }
+            }
+        ]
+        parse_postgresql(self.source, json.dumps(plan), self.filters, ["title"])
+        self.assertEqual(self.source.cost, 8.3)
+        self.assertIsNone(self.source.time)
+        self.assertEqual(self.source.warnings, [])
+
+    def test_mysql(self):
+        parse_mysql(self.source, json.dumps(self.MYSQL_PLAN), self.filters, ["title"])
+        self.assertEqual(self.source.cost, 1.25)
+        self.assertEqual(self.source.rows, 1)
+        self.assertEqual(
+            self.source.warnings,
+            [
+                "Sequential scan on tests_book filtering on pages.",
+                "Sequential scan on tests_book sorted by title.",
+            ],
+        )
+
+
+class TestCheckIndexes(TestBase):
+    def test_covered(self):
+        """Foreign keys and the primary key are indexed."""
+        self.assertEqual(self.all.check_indexes(), [])
+        self.assertEqual(self.all.order_by("pk").check_indexes(), [])
+        self.assertEqual(self.all.order_by("#", "-id").check_indexes(), [])
+        self.assertEqual(self.all.filter(author=1).check_indexes(), [])
+
+    def test_ordering(self):
+        with self.assertNumQueries(0):
+            missing = self.all.order_by("#", "-title").check_indexes()
+        self.assertEqual(
+            [(m.index, m.model, m.fields) for m in missing],
+            [(0, Book, ("title",)), (1, Article, ("title",))],
+        )
+        self.assertEqual(
+            str(missing[0]),
+            "QuerySet #0 (Book) has no index on (title) for ordering by title.",
+        )
+        self.assertEqual(
+            missing[0].hint,
+            "Add models.Index(fields=['title']) to Book.Meta.indexes.",
+        )
+
+    def test_filter_and_ordering(self):
+        """The filtered fields come first, followed by the ordered fields."""
+        missing = self.all.filter(author=1).order_by("title").check_indexes()
+        self.assertEqual(
+            [m.fields for m in missing], [("author", "title"), ("author", "title")]
+        )
+        self.assertEqual(
+            str(missing[0]),
+            "QuerySet #0 (Book) has no index on (author, title) for filtering on "
+            "author and ordering by title.",
+        )
+
+    def test_related(self):
+        """Only the fields of the table of each QuerySet need an index."""
+        qss = self.all.filter(author__name="Bob").order_by("author__name", "title")
+        self.assertEqual(qss.check_indexes(), [])
+
+    def test_composite(self):
+        """Composite indexes and unique constraints are used."""
+        qss = self.all.filter(author=1, release__isnull=False).order_by("title")
+        indexes = [models.Index(fields=["release", "author", "-title"])]
+        with patch.object(Book._meta, "indexes", indexes):
+            self.assertEqual([m.model for m in qss.check_indexes()], [Article])
+
+        constraints = [
+            models.UniqueConstraint(fields=["author", "release", "title"], name="u")
+        ]
+        with patch.object(Book._meta, "constraints", constraints):
+            self.assertEqual([m.model for m in qss.check_indexes()], [Article])
+
+        # Partial indexes are ignored, as is an index in the wrong order.
+        indexes = [
+            models.Index(
+                fields=["author", "release", "title"], name="i", condition=Q()
+            ),
+            models.Index(fields=["title", "author", "release"], name="j"),
+        ]
+        with patch.object(Book._meta, "indexes", indexes):
+            self.assertEqual([m.model for m in qss.check_indexes()], [Book, Article])
+
+    def test_once_per_model(self):
+        """Multiple QuerySets of a model needing the same index report it once."""
+        qss = QuerySetSequence(
+            Book.objects.filter(pages=1), Book.objects.filter(pages=2)
+        ).order_by("title")
+        missing = qss.check_indexes()
+        self.assertEqual(
+            [(m.index, m.fields) for m in missing], [(0, ("pages", "title"))]
+        )
+
+
 class TestGetQueryset(TestBase):
     """Tests related to retrieving QuerySets from the sequence."""
 
@@ -1822,30 +3352,6 @@ class TestCannotImplement(TestCase):
         with self.assertRaises(ImplementedIn41):
             await self.all.aupdate_or_create()
 
-    def test_bulk_create(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.bulk_create([])
-
-    async def test_abulk_create(self):
-        with self.assertRaises(ImplementedIn41):
-            await self.all.abulk_create([])
-
-    def test_bulk_update(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.bulk_update([], [])
-
-    async def test_abulk_update(self):
-        with self.assertRaises(ImplementedIn41):
-            await self.all.abulk_update([], [])
-
-    def test_in_bulk(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.in_bulk()
-
-    async def test_ain_bulk(self):
-        with self.assertRaises(ImplementedIn41):
-            await self.all.ain_bulk()
-
 
 class TestNotImplemented(TestCase):
     """The following methods have not been implemented in QuerySetSequence."""
@@ -1853,26 +3359,6 @@ class TestNotImplemented(TestCase):
     def setUp(self):
         self.all = QuerySetSequence()
 
-    def test_dates(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.dates(None, None)
-
-    def test_datetimes(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.datetimes(None, None)
-
-    def test_union(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.union()
-
-    def test_intersection(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.intersection()
-
-    def test_difference(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.difference()
-
     def test_select_for_update(self):
         with self.assertRaises(NotImplementedError):
             self.all.select_for_update()
@@ -1911,31 +3397,15 @@ class TestNotImplemented(TestCase):
         with self.assertRaises(ImplementedIn41):
             await self.all.alast()
 
-    def test_aggregate(self):
-        with self.assertRaises(NotImplementedError):
-            self.all.aggregate()
-
-    async def test_aaggregate(self):
-        with self.assertRaises(ImplementedIn41):
-            await self.all.aaggregate()
-
     @skipIf(django.VERSION >= (4, 1), "aexists exists starting on Django 4.1.")
     async def test_aexists(self):
         with self.assertRaises(AttributeError):
             await self.all.aexists()
 
-    async def test_acontains(self):
-        with self.assertRaises(ImplementedIn41):
-            await self.all.acontains()
-
     async def test_aupdate(self):
         with self.assertRaises(ImplementedIn41):
             await self.all.aupdate()
 
-    async def test_adelete(self):
-        with self.assertRaises(ImplementedIn41):
-            await self.all.adelete()
-
     async def test_aexplain(self):
         with self.assertRaises(ImplementedIn41):
             await self.all.aexplain()
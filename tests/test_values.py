@@ -2,6 +2,7 @@ import datetime
 
 from django.db import connection
 
+from queryset_sequence import ValuesIterable, ValuesListIterable
 from tests.models import Author, Book
 from tests.test_querysetsequence import TestBase
 
@@ -142,6 +143,39 @@ class TestValues(TestBase):
         # Check that only the requested fields are returned.
         self.assertEqual(values[0], {"title": "Django Rocks"})
 
+    def test_order_by_other_field_reverse(self):
+        """Ordering by a reversed field that isn't returned should work."""
+        with self.assertNumQueries(2):
+            values = list(self.all.values("title").order_by("-release"))
+        self.assertEqual(values[0], {"title": "Biography"})
+        self.assertEqual(values[-1], {"title": "Some Article"})
+
+    def test_order_by_all_fields(self):
+        """Ordering when no fields are given should return every field."""
+        with self.assertNumQueries(2):
+            values = list(self.all.values().order_by("title"))
+        self.assertEqual([it["title"] for it in values], sorted(self.TITLES_BY_PK))
+        self.assertCountEqual(
+            values[0].keys(),
+            ["#", "id", "author_id", "publisher_id", "release", "title"],
+        )
+
+    def test_order_by_reverse_qs(self):
+        """The QuerySet index follows the QuerySet when reversing by '#'."""
+        with self.assertNumQueries(2):
+            values = list(self.all.values("#", "title").order_by("-#"))
+        self.assertEqual(values[0], {"#": 1, "title": "Django Rocks"})
+        self.assertEqual(values[-1], {"#": 0, "title": "Biography"})
+
+    def test_projection(self):
+        """Rows are only rebuilt when the returned shape differs."""
+        self.assertIsNone(ValuesIterable(self.all.values("title"))._get_projection())
+        self.assertIsNotNone(
+            ValuesIterable(
+                self.all.values("title").order_by("release")
+            )._get_projection()
+        )
+
 
 class TestValuesList(TestBase):
     def test_values_list(self):
@@ -229,6 +263,52 @@ class TestValuesList(TestBase):
         # Check that only the requested fields are returned.
         self.assertEqual(values[0], ("Django Rocks",))
 
+    def test_order_by_qss_field_first(self):
+        """The QuerySet index can be the first field when ordering by another."""
+        with self.assertNumQueries(2):
+            values = list(self.all.values_list("#", "title").order_by("title"))
+        self.assertEqual(
+            values,
+            [
+                (1, "Alice in Django-land"),
+                (0, "Biography"),
+                (1, "Django Rocks"),
+                (0, "Fiction"),
+                (1, "Some Article"),
+            ],
+        )
+
+    def test_qss_field_position(self):
+        """The QuerySet index is returned in the requested position."""
+        with self.assertNumQueries(2):
+            data = list(self.all.values_list("title", "#", "pk").order_by("#", "pk"))
+        self.assertEqual(
+            [it[:2] for it in data][1:3], [("Biography", 0), ("Django Rocks", 1)]
+        )
+
+    def test_order_by_other_field_reverse(self):
+        """Ordering by a reversed field that isn't returned should work."""
+        with self.assertNumQueries(2):
+            values = list(self.all.values_list("title").order_by("-release"))
+        self.assertEqual(values[0], ("Biography",))
+        self.assertEqual(values[-1], ("Some Article",))
+
+    def test_projection(self):
+        """Rows are only rebuilt when the returned shape differs."""
+        self.assertIsNone(
+            ValuesListIterable(self.all.values_list("title"))._get_projection()
+        )
+        self.assertIsNone(
+            ValuesListIterable(
+                self.all.values_list("title").order_by("title")
+            )._get_projection()
+        )
+        self.assertIsNotNone(
+            ValuesListIterable(
+                self.all.values_list("title").order_by("release")
+            )._get_projection()
+        )
+
 
 class TestFlatValuesList(TestBase):
     def test_values_list(self):
@@ -1,9 +1,21 @@
 import unittest
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.views.generic import ListView
 
 from queryset_sequence import QuerySetSequence
-from tests.models import AbtractModel, Author
+from queryset_sequence.indexes import check_view_indexes
+from tests.models import AbtractModel, Article, Author, Book
+
+
+class OrderedListView(ListView):
+    queryset = QuerySetSequence(
+        Book.objects.all(), Article.objects.filter(author=1)
+    ).order_by("title")
+
+
+urlpatterns = [path("ordered/", OrderedListView.as_view())]
 
 # In-case someone doesn't have Django REST Framework installed, guard tests.
 try:
@@ -39,6 +51,30 @@ try:
         serializer_class = TestSerializer
         permission_classes = []
 
+    from queryset_sequence.pagination import SequenceCursorPagination
+
+    class TestPagination(SequenceCursorPagination):
+        ordering = "name"
+
+    class PaginatedListView(generics.ListAPIView):
+        queryset = QuerySetSequence(Author.objects.all(), model=Author)
+        serializer_class = TestSerializer
+        pagination_class = TestPagination
+
+    from queryset_sequence.pagination import SequenceKeysetPagination
+
+    class TestKeysetPagination(SequenceKeysetPagination):
+        ordering = "-name"
+
+    class KeysetListView(PaginatedListView):
+        pagination_class = TestKeysetPagination
+
+    urlpatterns += [
+        path("list/", TestListView.as_view()),
+        path("paginated/", PaginatedListView.as_view()),
+        path("keyset/", KeysetListView.as_view()),
+    ]
+
 except ImportError:
     factory = None
 
@@ -89,3 +125,49 @@ class TestViews(TestCase):
         response = AbstractModelTestListView.as_view()(request)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 0)
+
+
+@override_settings(ROOT_URLCONF="tests.test_views")
+class TestCheckViewIndexes(TestCase):
+    def test_check(self):
+        """The QuerySetSequence of each view in the URLconf is checked."""
+        warnings = [w for w in check_view_indexes() if w.obj is OrderedListView]
+        self.assertEqual(
+            [w.msg for w in warnings],
+            [
+                "QuerySet #0 (Book) has no index on (title) for ordering by title.",
+                "QuerySet #1 (Article) has no index on (author, title) for "
+                "filtering on author and ordering by title.",
+            ],
+        )
+        self.assertEqual(
+            warnings[0].hint, "Add models.Index(fields=['title']) to Book.Meta.indexes."
+        )
+        self.assertEqual(warnings[0].id, "queryset_sequence.W001")
+
+    @unittest.skipIf(
+        not factory, "Must have Django REST Framework installed to run view tests."
+    )
+    def test_pagination(self):
+        """The ordering of the pagination class is checked."""
+        warnings = [w for w in check_view_indexes() if w.obj is not OrderedListView]
+        self.assertEqual(
+            [(w.obj, w.msg) for w in warnings],
+            [
+                (
+                    PaginatedListView,
+                    "QuerySet #0 (Author) has no index on (name) for ordering by "
+                    "name.",
+                ),
+                # Including the primary key, to break ties.
+                (
+                    KeysetListView,
+                    "QuerySet #0 (Author) has no index on (name, id) for ordering "
+                    "by name, id.",
+                ),
+            ],
+        )
+
+    @override_settings(ROOT_URLCONF=None)
+    def test_no_urlconf(self):
+        self.assertEqual(check_view_indexes(), [])